@@ -1,426 +1,701 @@
-import re
-import pandas
-import os
-from tabulate import tabulate
-from datetime import date
-
-# Functions
-
-
-def make_statement(statement, decoration):
-    """Emphasises headings by adding decoration
-    at the start and end"""
-
-    return f"{decoration * 3} {statement} {decoration * 3}\n"
-
-
-def yes_no_check(question):
-    """Checks that users enter yes / no / y / n"""
-
-    while True:
-
-        response = input(question).lower()
-
-        if response == "y" or response == "yes":
-            return "yes"
-        elif response == "n" or response == "no":
-            return "no"
-
-        print(f"Please answer yes / no (y / n)")
-
-
-def instructions():
-    """Displays instructions"""
-
-    print(make_statement("Instructions", "ℹ️")) # Instruction heading for aesthetics.
-
-    print('''This program will ask you for...
-    - The name of the recipe
-    - The amount of servings you are going to prepare
-    - The names of the ingredients
-    - The amounts used for each ingredient
-    - The amounts bought for each ingredient
-    - The price of the amount bought
-
-⚠️ You are also supposed to enter the Amount with the Unit! (no units are also possible.)
-Note that all the units are metric units and are in measured in nz standards!
-
-The Available Units are 
-Mass Units - grams, kilograms
-Volume Units - milliliters, liters, teaspoons(5ml), cups(250ml), tablespoons(15ml)
-
-The program will output an list with all the things that the
-user entered along with the cost to make for each ingredient.
-The program will also calculate the total cost to make and the 
-total cost to make per serving.
-
-The program will then ask if you want to write the information to file
-which basically means that it will print the output to note document.
-⚠️ If your Recipe Name contains any special characters or has more than 30 characters, 
-the name of the file will be defaulted to Recipe_Cost_Calculator_dd_mm_yyyy.
-
-At the end, the program will ask if you want to return to the start of the program.
-
-''')
-
-
-def not_blank(question):
-    """Checks user response is not blank"""
-
-    while True:
-        response = input(question).strip()
-
-        if response != "":
-            return response
-        else:
-            print("❌ Sorry, this can't be blank.")
-
-
-def num_check(question, num_type="float", question_type="price"):
-    """Checks if the input is an integer or not"""
-
-    # Changes error message depending on the number type.
-    if num_type == "float":
-        error = "❌ Please enter a number more than 0."
-    else:
-        error = "❌ Please enter an integer more than 0."
-
-    # Check datatype is correct and that number
-    # is more than zero
-    while True:
-        try:
-            response = input(question)
-
-            # checks if the response starts with a dollar sign $
-            if question_type == "price":
-                response = response.lstrip("$")
-
-            if num_type == "float":
-                response = float(response)
-            else:
-                response = int(response)
-
-            if response > 0:
-                return response
-            else:
-                print(error)
-
-        except ValueError:
-            print(error)
-            # prints an error message if the user does not enter an integer.
-
-
-def get_amount_and_unit(question):
-    """Gets the Amount and the Unit at once and returns them to the program."""
-
-    while True:
-        response = input(question).strip()  # Removes any leading and trailing whitespaces.
-
-        # Checks for simple integer with no Unit (e.g. 4 (eggs) or 10 (grapes))
-        if response.isdigit():
-
-            # Checks if the integer is equal to 0
-            if int(response) == 0:
-                print("❌ Please enter an integer greater than 0.")
-                continue
-
-            # return the Integer and the unit as None to the program.
-            return int(response), None
-
-        # Checks for Quantity with unit (e.g. 100g, 25.5 millilitres or 3 tablespoons)
-        # Uses Regex to separate the number and the unit.
-        match = re.fullmatch(r"([0-9]*\.?[0-9]+)\s*([a-zA-Z]+)", response)
-
-        # Checks if the input matches the pattern
-        if not match:
-            print("❌ Please enter a valid input! (e.g. 100kg, 20 millilitres or just 4.)")
-            continue
-
-        number = float(match.group(1))  # Convert the quantity to float
-
-        unit = match.group(2).lower()  # Convert the unit to lowercase
-
-        # Checks if the quantity is positive.
-        if number <= 0:
-            print("❌ Please enter a number higher than 0.")
-            continue
-
-        # Checks if the unit is in the Units dictionary (means that if it is a valid unit).
-        if unit not in units_dict:
-            print("❌ Invalid unit! Valid units include"
-                  " weight classes(kg, g) and volume classes(l, ml, tsp, tbsp, cups)")
-            continue
-
-        # return the number and the unit.
-        return number, unit
-    # Return None statement to avoid a light warning due to some IDE issues
-    return None
-
-
-def are_units_compatible(u1, u2):
-    """Checks if units are compatible"""
-
-    # Checks if both the units have the same base unit
-    # returns boolean value True if they do.
-    return units_dict[u1][0] == units_dict[u2][0]
-
-def convert_amount(quantity, u1, u2):
-    """Converts amount between compatible units"""
-
-    # Takes the factor of both the units.
-    factor_1 = units_dict[u1][1]
-    factor_2 = units_dict[u2][1]
-
-    # Convert bought amount into the same unit as used amount
-    # It calculates this by multiplying the bought quantity
-    # with factor 1 to see how much that quantity is in base units
-    # then it is divided by the factor 2 to get the converted amount
-    converted_quantity = quantity * factor_1 / factor_2
-
-    # Returns the converted amount
-    return converted_quantity
-
-
-def currency(x):
-    """Formats numbers as currency ($#.##)"""
-    return "${:.2f}".format(x)
-
-
-def valid_filename(filename):
-    """Checks if filename has illegal characters and is not too long"""
-
-    # Replaces the spaces in the filename to underscores
-    filename = filename.replace(" ", "_") + "_RRC"
-
-    # Checks if the filename is too long
-    if len(filename) >= 35:
-        # If filename is too long filename will be defaulted to standard format.
-        filename = f"Recipe_Cost_Calculator_{day}_{month}_{year}"
-
-    # Iterates over the filename for individual characters
-    for letter in filename:
-        # Checks if the filename contains any illegal characters.
-        if letter.isalnum() is False and letter != "_":
-            # If filename contains special characters defaults to standard format.
-            filename = f"Recipe_Cost_Calculator_{day}_{month}_{year}"
-        else:
-            return filename
-
-    # returns the original filename if it is valid.
-    return filename
-
-
-# Main Routine
-
-# Initializing the Units
-
-units_dict = {
-    # No unit
-    None: ("none", 1),
-
-    # Mass
-    "g": ("g", 1), "gram": ("g", 1), "grams": ("g", 1),
-    "kg": ("g", 1000), "kilogram": ("g", 1000), "kilograms": ("g", 1000),
-
-    # Volume
-    "ml": ("ml", 1), "millilitre": ("ml", 1), "millilitres": ("ml", 1),
-    "l": ("ml", 1000), "litre": ("ml", 1000), "litres": ("ml", 1000),
-    "tsp": ("ml", 5), "teaspoon": ("ml", 5), "teaspoons": ("ml", 5),
-    "tbsp": ("ml", 15), "tablespoon": ("ml", 15), "tablespoons": ("ml", 15),
-    "cup": ("ml", 250), "cups": ("ml", 250),
-}
-
-
-# Program heading
-print(make_statement("Recipe Cost Calculator", "🥝"))
-
-print()
-if yes_no_check("Do you want to see the instructions? ") == "yes":
-    instructions()
-print()
-
-# loop to allow to the user to use the program multiple times in one run.
-while True:
-
-    # Recipe Details heading
-    print(make_statement("Recipe Details", "==="))
-
-    # Get Recipe Details
-    recipe_name = not_blank("Recipe Name: ")
-    servings = num_check("Servings: ", "integer")
-    print()
-
-    # List for Pandas
-    all_names = []
-    all_amounts = []
-    all_amounts_bought = []
-    all_prices = []
-    all_costs = []
-    all_costs_raw = []
-
-    # Recipe Dictionary for pandas.
-    recipe_dict = {
-        'Ingredient Name': all_names,
-        'Amount Used': all_amounts,
-        'Amount Bought': all_amounts_bought,
-        'Price Paid': all_prices,
-        'Cost to Make': all_costs
-    }
-
-    # Ingredient Details Heading
-    print(make_statement("Ingredient Details", "---"))
-
-    # Loop to get Ingredient Details.
-    while True:
-        # Get name and check it is not blank.
-        name = not_blank("Ingredient Name (or 'xxx' to finish): ")
-
-        # check if the user enters at least one ingredient
-        if name.lower() == "xxx" and len(all_names) == 0:
-            print("❌ You must enter at least one ingredient!")
-            continue
-
-        # checks if the user wants to end the loop
-        elif name.lower() == "xxx":
-            break
-
-        # store the names.
-        all_names.append(name)
-
-        # asks for the Amount used
-        amount_used, unit_used = get_amount_and_unit("Amount Used: ")
-
-        # asks for the Amount bought
-        converted_amt = None # defining converted amount outside the loop.
-
-        while True:
-            amount_bought, unit_bought = get_amount_and_unit("Amount Bought: ")
-
-            # Checks if the units
-            # of both amounts are compatible with each other
-            if not are_units_compatible(unit_used, unit_bought):
-                print(f"❌ The Units are not compatible"
-                      f", please use units with the base unit [ {units_dict[unit_used][0]} ]")
-                continue
-
-            # converts the amount bought according to the unit of the amount used.
-            # so that the cost to make can be calculated correctly.
-            converted_amt = convert_amount(amount_bought, unit_bought, unit_used)
-
-            # checks if the bought amount is less than the amount used
-            if converted_amt < amount_used:
-                print("❌ The Amount bought can not be less than the Amount Used!")
-                continue
-            break
-
-        # Asks for the price
-        price = num_check("Price Paid: ")
-        print()
-
-        # Calculate cost to make
-        cost_to_make = price * (amount_used / converted_amt)
-
-        # Store data
-        # if the Unit is None, it will be stored as blank
-        all_amounts.append(f"{amount_used}{unit_used or ''}")
-        all_amounts_bought.append(f"{amount_bought}{unit_bought or ''}")
-        all_prices.append(currency(price))
-        all_costs.append(currency(cost_to_make))
-        all_costs_raw.append(cost_to_make)
-
-    # Convert recipe data into a DataFrame for neat table formatting
-    recipe_frame = pandas.DataFrame(recipe_dict)
-
-    # Display table and recipe details
-    print()
-    print(make_statement("Recipe Cost Table", "📜"))
-    print(f"Recipe Name: {recipe_name}")
-    print(f"Servings: {servings} \n")
-    print(tabulate(recipe_frame, headers='keys', tablefmt='fancy_grid', showindex=False))
-
-
-    # Calculate and output total cost to make and the cost per serve.
-    total_cost = sum(all_costs_raw)
-    total_cost_per_serving = total_cost / servings
-    print()
-    print(f"💰 Total Cost to Make: {currency(total_cost)}")
-    print(f"💰 Per Serve: {currency(total_cost_per_serving)} \n")
-    print()
-
-    # Asks if the user wants to record this information to file.
-    want_file = yes_no_check("Do you want to record this information in a file (y/n)?: ")
-    if want_file == "yes":
-
-        # strings / output area
-
-        # Get current date for file name and heading
-        today = date.today()
-
-        # Get day, month and year as individual strings
-        day = today.strftime("%d")
-        month = today.strftime("%m")
-        year = today.strftime("%Y")
-
-        # Headings / Strings
-        main_heading_string = make_statement(f"Recipe Cost Calculator"
-                                             f"({recipe_name}, {day}/{month}/{year})", "=")
-
-        name_string = f"Recipe Name: {recipe_name}"
-
-        servings_string = f"Amount of Servings: {servings}"
-
-        ingredient_heading_string = make_statement(f"Ingredient Details", "-")
-
-        # Use 'psql' format for file output since 'fancy_grid' uses emojis that break in plain text
-        recipe_table_string = tabulate(recipe_frame, headers='keys', tablefmt='psql', showindex=False)
-
-        total_cost_string = f"Total Cost to Make: {currency(total_cost)}"
-
-        per_serve_string = f"Cost Per Serve: {currency(total_cost_per_serving)}"
-
-        ending_string = "!Thank You for Trying out the Recipe Cost Calculator!"
-
-
-        # List of strings to be outputted / written to file
-        to_write = [
-            main_heading_string, name_string,
-            servings_string, "\n", ingredient_heading_string,
-             recipe_table_string, "\n", total_cost_string,
-            per_serve_string, "\n", ending_string, "\n",
-        ]
-
-        # checks if the recipe name has no illegal characters or is not too long
-        # if the recipe name is valid, it will be chosen as the filename.
-        safe_filename = valid_filename(recipe_name)
-
-        # Writes to file
-        write_to = "{}.txt".format(safe_filename)
-        text_file = open(write_to, "w+", encoding = "utf-8" )
-
-        # write the item to file
-        for item in to_write:
-            text_file.write(item)
-            text_file.write("\n")
-            text_file.flush() # Allow multiple files to be written in one run.
-            os.fsync(text_file.fileno()) # Makes sure the file is saved to disk.
-
-        # Confirmation of file save along with the chosen filename.
-        print(f"The Filename is {safe_filename} and has been saved.")
-
-
-    # Thank you note :)
-    print("\n !Thank you for trying out the Recipe Cost Calculator! \n")
-
-    # Asks the user if they want to restart.
-    return_to_start = not_blank("Enter R to return to the start of the program "
-                            "(enter any other letter to close): ").strip()
-
-    # checks if the user enters r, if they do , restarts.
-    if return_to_start.lower() == "r":
-        print()
-        # return to the start of the program.
-        # allows multiple recipes to be calculated in one run.
-        continue
-
-    else:
-        break   #  Ends the Program.
+import argparse
+import math
+import sys
+from datetime import date
+from importlib.util import find_spec
+import rcc_metrics
+import rcc_money
+from rcc_report import ReportWriter
+from rcc_table import render_table
+from rcc_catalogue import normalize_name
+from rcc_currency import currency_table
+from rcc_history import parse_date
+from rcc_records import IngredientTable
+from rcc_units import units_dict, unit_registry
+
+# Functions
+
+
+def make_statement(statement, decoration):
+    """Emphasises headings by adding decoration
+    at the start and end"""
+
+    return f"{decoration * 3} {statement} {decoration * 3}\n"
+
+
+def yes_no_check(question):
+    """Checks that users enter yes / no / y / n"""
+
+    while True:
+
+        response = input(question).lower()
+
+        if response == "y" or response == "yes":
+            return "yes"
+        elif response == "n" or response == "no":
+            return "no"
+
+        print(f"Please answer yes / no (y / n)")
+
+
+def instructions():
+    """Displays instructions"""
+
+    print(make_statement("Instructions", "ℹ️")) # Instruction heading for aesthetics.
+
+    print('''This program will ask you for...
+    - The name of the recipe
+    - The amount of servings you are going to prepare
+    - The names of the ingredients
+    - The amounts used for each ingredient
+    - The amounts bought for each ingredient
+    - The price of the amount bought
+
+⚠️ You are also supposed to enter the Amount with the Unit! (no units are also possible.)
+Note that the metric units are in measured in nz standards!
+
+The Available Units are 
+Mass Units - grams, kilograms, ounces(oz), pounds(lb)
+Volume Units - milliliters, liters, teaspoons(5ml), cups(250ml), tablespoons(15ml), fl oz, pinches
+Common ingredients (like flour, sugar and milk) can be used by volume and bought by weight.
+
+Prices are in NZD, or write the currency with the price (e.g. USD 3.50, A$4.20)
+if there is a rates file for it (--rates).
+
+The program will output an list with all the things that the
+user entered along with the cost to make for each ingredient.
+The program will also calculate the total cost to make and the 
+total cost to make per serving.
+
+The program will then ask if you want to write the information to file
+which basically means that it will print the output to note document.
+⚠️ If your Recipe Name contains any special characters or has more than 30 characters, 
+the name of the file will be defaulted to Recipe_Cost_Calculator_dd_mm_yyyy.
+
+At the end, the program will ask if you want to return to the start of the program.
+
+''')
+
+
+def not_blank(question):
+    """Checks user response is not blank"""
+
+    while True:
+        response = input(question).strip()
+
+        if response != "":
+            return response
+        else:
+            print("❌ Sorry, this can't be blank.")
+
+
+def parse_number(response, num_type="float", question_type="price"):
+    """Checks that a response is a number more than 0 and returns it.
+    Raises a ValueError with the error message if it is not."""
+
+    # Changes error message depending on the number type.
+    if num_type == "float":
+        error = "❌ Please enter a number more than 0."
+    else:
+        error = "❌ Please enter an integer more than 0."
+
+    # Prices can have a currency code or symbol (e.g. $3.50 or USD 3.50),
+    # they are converted into the reporting currency.
+    if question_type == "price" and num_type == "float":
+        price, currency_id = parse_price(response)
+        price = currency_table.to_report(price, currency_id)
+        rcc_money.check_dollars(price)
+        return price
+
+    # checks if the response starts with a dollar sign $
+    if question_type == "price":
+        response = response.lstrip("$")
+
+    # Check datatype is correct and that number
+    # is more than zero
+    try:
+        if num_type == "float":
+            response = float(response)
+        else:
+            response = int(response)
+    except ValueError:
+        raise ValueError(error) from None
+
+    # nan fails every comparison, so it is checked this way round (inf isn't a number either).
+    if not 0 < response < math.inf:
+        raise ValueError(error)
+
+    return response
+
+
+def parse_price(response):
+    """Splits a price into the number (more than 0) and the currency id, e.g. US$3.50.
+    Raises a ValueError with the error message if it is not valid."""
+
+    # The currency table parses the price (or remembers it from last time).
+    return currency_table.parse_price(response)
+
+
+def num_check(question, num_type="float", question_type="price"):
+    """Checks if the input is an integer or not"""
+
+    while True:
+        try:
+            return parse_number(input(question), num_type, question_type)
+
+        except ValueError as error:
+            print(error)
+            # prints an error message if the user does not enter an integer.
+
+
+def parse_amount_and_unit(response):
+    """Splits a response into the Amount and the Unit.
+    Raises a ValueError with the error message if it is not valid."""
+
+    # The unit registry parses the response (or remembers it from last time)
+    # and gives back the unit as an id.
+    number, unit_id = unit_registry.parse_amount(response)
+
+    # return the number and the unit.
+    return number, unit_registry.names[unit_id]
+
+
+def get_amount_and_unit(question):
+    """Gets the Amount and the Unit at once and returns them to the program."""
+
+    while True:
+        try:
+            return parse_amount_and_unit(input(question))
+
+        except ValueError as error:
+            print(error)
+
+
+def are_units_compatible(u1, u2, ingredient=None):
+    """Checks if units are compatible"""
+
+    # Checks if the unit registry has a conversion between the units
+    # (units with the same base unit have one, and mass and volume
+    # have one for an ingredient with a known density).
+    # The common case is looked up here straight from its table.
+    if u2 in unit_registry.conversions[u1]:
+        return True
+    return ingredient is not None and unit_registry.are_compatible(u1, u2, ingredient)
+
+
+def convert_amount(quantity, u1, u2, ingredient=None):
+    """Converts amount between compatible units"""
+
+    # Convert bought amount into the same unit as used amount
+    # It calculates this by multiplying the bought quantity
+    # with factor 1 to see how much that quantity is in base units
+    # then it is divided by the factor 2 to get the converted amount
+    # (both factors are looked up together from the unit registry,
+    # with the ingredient's density between mass and volume)
+    conversion = unit_registry.conversions[u1].get(u2)
+    if conversion is None:
+        conversion = unit_registry.conversion(u1, u2, ingredient)
+
+    multiply_by, divide_by = conversion
+    return quantity * multiply_by / divide_by
+
+
+def check_amount_bought(amount_used, unit_used, amount_bought, unit_bought, ingredient=None):
+    """Checks the Amount Bought against the Amount Used and returns
+    the Amount Bought converted into the unit of the Amount Used.
+    Raises a ValueError with the error message if it is not valid."""
+
+    # Checks if the units
+    # of both amounts are compatible with each other
+    if not are_units_compatible(unit_used, unit_bought, ingredient):
+        raise ValueError(f"❌ The Units are not compatible"
+                         f", please use units with the base unit [ {units_dict[unit_used][0]} ]")
+
+    # converts the amount bought according to the unit of the amount used.
+    # so that the cost to make can be calculated correctly.
+    converted_amt = convert_amount(amount_bought, unit_bought, unit_used, ingredient)
+
+    # checks if the bought amount is less than the amount used
+    if converted_amt < amount_used:
+        raise ValueError("❌ The Amount bought can not be less than the Amount Used!")
+
+    return converted_amt
+
+
+def calculate_cost(price, amount_used, converted_amt):
+    """Calculates the cost to make from the price paid
+    and the share of the (converted) amount bought that was used"""
+    return price * (amount_used / converted_amt)
+
+
+def currency(x):
+    """Formats numbers as currency ($#.##, with the symbol of the reporting currency),
+    rounded the same way as the batch results (rcc_money)"""
+    return rcc_money.currency(rcc_money.from_dollars(x), currency_table.symbol)
+
+
+def valid_filename(filename):
+    """Checks if filename has illegal characters and is not too long"""
+
+    # Replaces the spaces in the filename to underscores
+    filename = filename.replace(" ", "_") + "_RRC"
+
+    # Checks if the filename is too long, or has any illegal characters
+    # (only letters, numbers and underscores are allowed), in one pass.
+    if len(filename) >= 35 or not filename.replace("_", "").isalnum():
+
+        # Defaults to the standard format with the current date.
+        today = date.today()
+        filename = f"Recipe_Cost_Calculator_{today.strftime('%d')}_{today.strftime('%m')}_{today.strftime('%Y')}"
+
+    # returns the original filename if it is valid.
+    return filename
+
+
+def make_report(recipe_name, servings, recipe_table_string, total_cost, total_cost_per_serving):
+    """Makes the list of strings that are written to the report file"""
+
+    # Get current date for file name and heading
+    today = date.today()
+
+    # Get day, month and year as individual strings
+    day = today.strftime("%d")
+    month = today.strftime("%m")
+    year = today.strftime("%Y")
+
+    # Headings / Strings
+    main_heading_string = make_statement(f"Recipe Cost Calculator"
+                                         f"({recipe_name}, {day}/{month}/{year})", "=")
+
+    name_string = f"Recipe Name: {recipe_name}"
+
+    servings_string = f"Amount of Servings: {servings}"
+
+    ingredient_heading_string = make_statement(f"Ingredient Details", "-")
+
+    total_cost_string = f"Total Cost to Make: {currency(total_cost)}"
+
+    per_serve_string = f"Cost Per Serve: {currency(total_cost_per_serving)}"
+
+    ending_string = "!Thank You for Trying out the Recipe Cost Calculator!"
+
+    # List of strings to be outputted / written to file
+    to_write = [
+        main_heading_string, name_string,
+        servings_string, "\n", ingredient_heading_string,
+        recipe_table_string, "\n", total_cost_string,
+        per_serve_string, "\n", ending_string, "\n",
+    ]
+
+    return to_write
+
+
+def make_table(recipe_dict, tablefmt):
+    """Formats the recipe dictionary as a table.
+    The built-in renderer draws the usual tables, tabulate is only imported
+    (the first time) for the tables it can't draw the same way."""
+
+    with rcc_metrics.timer("render"):
+        table = render_table(recipe_dict, tablefmt)
+        if table is not None:
+            return table
+
+        from tabulate import tabulate
+        return tabulate(recipe_dict, headers='keys', tablefmt=tablefmt, showindex=False)
+
+
+def get_bought_and_price(name, amount_used, unit_used):
+    """Asks for the Amount Bought and the Price Paid of an ingredient.
+    Returns the amount bought, unit bought, converted amount bought and price."""
+
+    while True:
+        amount_bought, unit_bought = get_amount_and_unit("Amount Bought: ")
+
+        # Checks the units are compatible and that
+        # the bought amount is not less than the amount used
+        try:
+            converted_amt = check_amount_bought(amount_used, unit_used,
+                                                amount_bought, unit_bought, name)
+        except ValueError as error:
+            print(error)
+            continue
+        break
+
+    # Asks for the price
+    price = num_check("Price Paid: ")
+
+    return amount_bought, unit_bought, converted_amt, price
+
+
+def use_catalogue(catalogue, name, amount_used, unit_used):
+    """Offers the Amount Bought and Price Paid saved in the catalogue for an ingredient.
+    Returns the same as get_bought_and_price(), or None if they are not used."""
+
+    if catalogue is None:
+        return None
+
+    # With --fuzzy, a misspelt name is matched to the closest catalogue name.
+    match, entry = catalogue.match(name)
+    if entry is None:
+        return None
+
+    amount_bought, unit_bought, price = entry
+
+    # The saved pack has to work with the Amount Used.
+    try:
+        converted_amt = check_amount_bought(amount_used, unit_used, amount_bought, unit_bought, name)
+    except ValueError:
+        return None
+
+    if match != normalize_name(name):
+        print(f"📒 Did you mean {match}?")
+    print(f"📒 Catalogue: {amount_bought}{unit_bought or ''} bought for {currency(price)}")
+    if yes_no_check("Use the catalogue Amount Bought and Price Paid (y/n)? ") == "no":
+        return None
+
+    return amount_bought, unit_bought, converted_amt, price
+
+
+# Main Routine
+
+def main(catalogue=None):
+    """Runs the interactive Recipe Cost Calculator.
+    If a price catalogue is given, it fills in the Amount Bought and Price Paid."""
+
+    # Program heading
+    print(make_statement("Recipe Cost Calculator", "🥝"))
+
+    print()
+    if yes_no_check("Do you want to see the instructions? ") == "yes":
+        instructions()
+    print()
+
+    # loop to allow to the user to use the program multiple times in one run.
+    while True:
+
+        # Recipe Details heading
+        print(make_statement("Recipe Details", "==="))
+
+        # Get Recipe Details
+        recipe_name = not_blank("Recipe Name: ")
+        servings = num_check("Servings: ", "integer")
+        print()
+
+        # The ingredients, kept as raw numbers until the table is drawn.
+        ingredients = IngredientTable()
+
+        # Ingredient Details Heading
+        print(make_statement("Ingredient Details", "---"))
+
+        # Loop to get Ingredient Details.
+        while True:
+            # Get name and check it is not blank.
+            name = not_blank("Ingredient Name (or 'xxx' to finish): ")
+
+            # check if the user enters at least one ingredient
+            if name.lower() == "xxx" and len(ingredients) == 0:
+                print("❌ You must enter at least one ingredient!")
+                continue
+
+            # checks if the user wants to end the loop
+            elif name.lower() == "xxx":
+                break
+
+            # asks for the Amount used
+            amount_used, unit_used = get_amount_and_unit("Amount Used: ")
+
+            # Uses the Amount Bought and Price Paid from the catalogue (if the user wants to)
+            # otherwise asks for them and saves them to the catalogue for next time.
+            bought = use_catalogue(catalogue, name, amount_used, unit_used)
+
+            if bought is None:
+                bought = get_bought_and_price(name, amount_used, unit_used)
+
+                # Saved under the name as typed (it wasn't the catalogue name that was offered).
+                if catalogue is not None:
+                    catalogue.save(name, bought[0], bought[1], bought[3], exact=True)
+                    catalogue.commit()
+
+            amount_bought, unit_bought, converted_amt, price = bought
+            print()
+
+            # Calculate cost to make
+            cost_to_make = calculate_cost(price, amount_used, converted_amt)
+
+            # Store data
+            ingredients.add(name, amount_used, unit_used, amount_bought, unit_bought, price, cost_to_make)
+
+        # Display table and recipe details
+        print()
+        print(make_statement("Recipe Cost Table", "📜"))
+        print(f"Recipe Name: {recipe_name}")
+        print(f"Servings: {servings} \n")
+
+        # The table columns are only formatted now, to be drawn.
+        recipe_dict = ingredients.columns()
+        print(make_table(recipe_dict, 'fancy_grid'))
+
+
+        # Calculate and output total cost to make and the cost per serve.
+        total_cost = ingredients.total_cost()
+        total_cost_per_serving = total_cost / servings
+        print()
+        print(f"💰 Total Cost to Make: {currency(total_cost)}")
+        print(f"💰 Per Serve: {currency(total_cost_per_serving)} \n")
+        print()
+
+        # Asks if the user wants to record this information to file.
+        want_file = yes_no_check("Do you want to record this information in a file (y/n)?: ")
+        if want_file == "yes":
+
+            # checks if the recipe name has no illegal characters or is not too long
+            # if the recipe name is valid, it will be chosen as the filename.
+            safe_filename = valid_filename(recipe_name)
+
+            # Use 'psql' format for file output since 'fancy_grid' uses emojis that break in plain text
+            recipe_table_string = make_table(recipe_dict, 'psql')
+
+            to_write = make_report(recipe_name, servings, recipe_table_string,
+                                   total_cost, total_cost_per_serving)
+
+            # Writes the whole report to a new file in one go and makes sure it is saved to disk.
+            # A number is added to the filename if there is already a report with that name.
+            with ReportWriter(durability="file") as report_writer:
+                filename = report_writer.write_report(safe_filename, to_write)
+
+            # Confirmation of file save along with the chosen filename.
+            print(f"The Filename is {filename.removesuffix('.txt')} and has been saved.")
+
+
+        # Thank you note :)
+        print("\n !Thank you for trying out the Recipe Cost Calculator! \n")
+
+        # Asks the user if they want to restart.
+        return_to_start = not_blank("Enter R to return to the start of the program "
+                                "(enter any other letter to close): ").strip()
+
+        # checks if the user enters r, if they do , restarts.
+        if return_to_start.lower() == "r":
+            print()
+            # return to the start of the program.
+            # allows multiple recipes to be calculated in one run.
+            continue
+
+        else:
+            break   #  Ends the Program.
+
+
+def get_arguments():
+    """Reads the command line options"""
+
+    parser = argparse.ArgumentParser(description="Recipe Cost Calculator")
+    parser.add_argument("--batch", nargs="+", metavar="FILE",
+                        help="cost the recipes in these CSV / JSON files (or recipe stores) "
+                             "without any prompts")
+    parser.add_argument("--stdin", action="store_true",
+                        help="read the answers to the questions from stdin in one go, "
+                             "with no prompts (errors are listed at the end)")
+    parser.add_argument("--output", metavar="FILE",
+                        help="file to write the batch results to (default: the screen)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv",
+                        help="format of the batch results (default: csv)")
+    parser.add_argument("--reports", metavar="DIR",
+                        help="also write a report file for every batch recipe into this folder")
+    parser.add_argument("--shards", type=int, default=0, metavar="N",
+                        help="spread the batch reports over N sub-folders (up to 256)")
+    parser.add_argument("--durability", choices=["none", "file", "batch"], default="batch",
+                        help="when batch reports are fsynced to disk (default: batch)")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="number of processes costing batch recipes (default: 1)")
+    parser.add_argument("--unordered", action="store_true",
+                        help="with --jobs, write batch results as soon as they are ready")
+    parser.add_argument("--catalogue", metavar="FILE",
+                        help="SQLite ingredient price catalogue that fills in the "
+                             "Amount Bought and Price Paid")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="with --catalogue, match misspelt ingredient names to the closest "
+                             "catalogue names (and offer them as \"did you mean\" when asking)")
+    parser.add_argument("--as-of", metavar="DATE",
+                        help="with --catalogue, fill in batch ingredients with the catalogue prices "
+                             "as they were on this date (YYYY-MM-DD)")
+    parser.add_argument("--trend", nargs=2, metavar=("FROM", "TO"),
+                        help="with --catalogue, write the cost of every batch recipe on each date "
+                             "from FROM to TO that one of its catalogue prices changed")
+    parser.add_argument("--import-history", metavar="FILE",
+                        help="add the dated prices in this csv file (Date, Ingredient Name, "
+                             "Amount Bought, Price Paid) to the --catalogue price history")
+    parser.add_argument("--packs", metavar="FILE",
+                        help="csv list of the pack sizes on offer (Ingredient Name, Amount Bought, "
+                             "Price Paid), the cheapest mix is bought for batch ingredients "
+                             "with no Amount Bought and Price Paid")
+    parser.add_argument("--units", metavar="FILE",
+                        help='JSON file of extra units and ingredient densities, e.g. '
+                             '{"units": {"stick": "113g"}, "densities": {"oats": "1 cup = 90g"}}')
+    parser.add_argument("--rates", metavar="FILE",
+                        help='JSON file of exchange rates for prices paid in other currencies, '
+                             'e.g. {"base": "NZD", "rates": {"AUD": 1.09, "USD": 1.68}}')
+    parser.add_argument("--currency", metavar="CODE",
+                        help="currency the costs are worked out in (default: NZD, "
+                             "others need a rate in --rates)")
+    parser.add_argument("--stream", action="store_true",
+                        help="cost batch csv feeds a row at a time (for feeds too big for memory)")
+    parser.add_argument("--rows", metavar="FILE",
+                        help="with --stream, also write every costed ingredient row to this csv file")
+    parser.add_argument("--export", metavar="FILE",
+                        help="also write every batch recipe and ingredient row to this "
+                             ".csv, .jsonl or .parquet file")
+    parser.add_argument("--make-store", metavar="DIR",
+                        help="convert the --batch files into a memory-mapped recipe store "
+                             "instead of costing them")
+    parser.add_argument("--scale", type=int, metavar="N",
+                        help="write the cost curve of every batch recipe over 1 .. N servings "
+                             "(cost to make and packs to buy) instead of the results")
+    parser.add_argument("--prices", metavar="FILE",
+                        help="csv feed of price changes (Ingredient Name, Price Paid, Amount Bought) "
+                             "applied to the batch recipes, the results are after the changes")
+    parser.add_argument("--serve", type=int, nargs="?", const=8765, metavar="PORT",
+                        help="run the costing service on localhost (default port: 8765)")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="time each stage and save the timings and counters to this "
+                             "JSON file (or Prometheus text if it ends with .prom) at exit")
+
+    arguments = parser.parse_args()
+
+    if arguments.stream and (arguments.jobs > 1 or arguments.reports or arguments.catalogue):
+        parser.error("--stream can't be used with --jobs, --reports or --catalogue")
+    if arguments.fuzzy and not arguments.catalogue:
+        parser.error("--fuzzy needs --catalogue")
+    try:
+        if arguments.as_of:
+            arguments.as_of = parse_date(arguments.as_of)
+        if arguments.trend:
+            arguments.trend = [parse_date(day) for day in arguments.trend]
+    except ValueError as error:
+        parser.error(f"--as-of / --trend: {error}")
+    if (arguments.as_of or arguments.trend) and not (arguments.batch and arguments.catalogue):
+        parser.error("--as-of and --trend need --batch and --catalogue")
+    if arguments.trend:
+        if arguments.as_of or arguments.make_store or arguments.scale or arguments.packs:
+            parser.error("--trend can't be used with --as-of, --make-store, --scale or --packs")
+        if arguments.jobs > 1 or arguments.reports or arguments.export:
+            parser.error("--trend can't be used with --jobs, --reports or --export")
+        if arguments.trend[0] > arguments.trend[1]:
+            parser.error("--trend FROM has to be on or before TO")
+    if arguments.import_history:
+        if not arguments.catalogue:
+            parser.error("--import-history needs --catalogue")
+        if arguments.batch or arguments.stdin or arguments.serve is not None:
+            parser.error("--import-history can't be used with --batch, --stdin or --serve")
+    if arguments.units:
+        try:
+            unit_registry.load(arguments.units)
+        except (OSError, ValueError) as error:
+            parser.error(f"--units: {error}")
+    try:
+        if arguments.rates:
+            currency_table.load(arguments.rates)
+        if arguments.currency:
+            currency_table.set_report(arguments.currency)
+    except (OSError, ValueError) as error:
+        parser.error(f"--rates / --currency: {error}")
+    if arguments.rows and not arguments.stream:
+        parser.error("--rows needs --stream")
+    if arguments.serve is not None and not 0 <= arguments.serve <= 65535:
+        parser.error("--serve PORT has to be between 0 (any free port) and 65535")
+    if arguments.stdin and (arguments.batch or arguments.serve is not None):
+        parser.error("--stdin can't be used with --batch or --serve")
+    if arguments.packs and (not arguments.batch or arguments.stream):
+        parser.error("--packs needs --batch (and can't be used with --stream)")
+    if not 0 <= arguments.shards <= 256:
+        parser.error("--shards has to be between 0 and 256")
+    if arguments.make_store and not arguments.batch:
+        parser.error("--make-store needs --batch")
+    if arguments.scale is not None:
+        if not arguments.batch or arguments.stream or arguments.make_store:
+            parser.error("--scale needs --batch (and can't be used with --stream or --make-store)")
+        if arguments.jobs > 1 or arguments.reports or arguments.export:
+            parser.error("--scale can't be used with --jobs, --reports or --export")
+        if not 1 <= arguments.scale <= 1000:
+            parser.error("--scale has to be between 1 and 1000")
+    if arguments.prices:
+        if not arguments.batch or arguments.stream or arguments.make_store:
+            parser.error("--prices needs --batch (and can't be used with --stream or --make-store)")
+        if arguments.scale or arguments.trend or arguments.jobs > 1:
+            parser.error("--prices can't be used with --scale, --trend or --jobs")
+        if arguments.reports or arguments.export:
+            parser.error("--prices can't be used with --reports or --export")
+    if arguments.export:
+        if not arguments.batch or arguments.stream:
+            parser.error("--export needs --batch (and can't be used with --stream)")
+        if not arguments.export.endswith((".csv", ".jsonl", ".parquet")):
+            parser.error("--export has to be a .csv, .jsonl or .parquet file")
+        if arguments.export.endswith(".parquet") and find_spec("pyarrow") is None:
+            parser.error("--export to a .parquet file needs the pyarrow package (pip install pyarrow)")
+
+    return arguments
+
+
+if __name__ == "__main__":
+    arguments = get_arguments()
+
+    if arguments.metrics:
+        rcc_metrics.enable(arguments.metrics)
+
+    # Mistakes in the files or rows given are shown without a traceback.
+    try:
+        if arguments.serve is not None:
+            # Local JSON costing service for other tools.
+            import rcc_service
+            rcc_service.run_service(arguments.serve)
+        elif arguments.import_history:
+            # Adds dated prices to the catalogue's price history.
+            import rcc_import
+            rcc_import.run_import_history(arguments.import_history, arguments.catalogue,
+                                          arguments.fuzzy)
+        elif arguments.make_store:
+            # Converts the recipe files into a recipe store for batch mode.
+            import rcc_store
+            rcc_store.run_make_store(arguments.batch, arguments.make_store, arguments.catalogue,
+                                     arguments.packs, arguments.fuzzy, arguments.as_of)
+        elif arguments.scale:
+            # Cost curves of the recipe files over 1 .. N servings.
+            import rcc_scaling
+            rcc_scaling.run_scale(arguments.batch, arguments.scale, arguments.output,
+                                  arguments.format, arguments.catalogue, arguments.packs,
+                                  arguments.fuzzy, arguments.as_of)
+        elif arguments.trend:
+            # Cost trends of the recipe files from the catalogue's price history.
+            import rcc_trend
+            rcc_trend.run_trend(arguments.batch, *arguments.trend, arguments.output,
+                                arguments.format, arguments.catalogue, arguments.fuzzy)
+        elif arguments.prices:
+            # The recipe files after a feed of price changes, costed incrementally.
+            import rcc_recipe
+            rcc_recipe.run_prices(arguments.batch, arguments.prices, arguments.output,
+                                  arguments.format, arguments.catalogue, arguments.packs,
+                                  arguments.fuzzy, arguments.as_of)
+        elif arguments.batch:
+            # Headless mode, costs the recipe files without asking anything.
+            import rcc_batch
+            rcc_batch.run_batch(arguments.batch, arguments.output, arguments.format,
+                                arguments.reports, arguments.durability,
+                                arguments.jobs, not arguments.unordered, arguments.catalogue,
+                                arguments.stream, arguments.rows, arguments.export,
+                                arguments.shards, arguments.packs, arguments.fuzzy, arguments.as_of)
+        elif arguments.stdin:
+            # The interactive questions answered from stdin, without the prompts.
+            import rcc_stdin
+            status = rcc_stdin.run_stdin(arguments.output, arguments.format, arguments.reports,
+                                         arguments.durability, arguments.shards,
+                                         arguments.catalogue, fuzzy=arguments.fuzzy)
+            sys.exit(status)
+        elif arguments.catalogue:
+            from rcc_catalogue import PriceCatalogue
+            with PriceCatalogue(arguments.catalogue, arguments.fuzzy) as price_catalogue:
+                main(price_catalogue)
+        else:
+            main()
+    except (OSError, ValueError) as error:
+        message = str(error)
+        print(message if message.startswith("❌") else f"❌ {message}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,8 @@
+"""Benchmarks for the Recipe Cost Calculator.
+
+Run them from the top of the repository, e.g.
+    python -m benchmarks.bench_cost_engine
+
+benchmarks.suite times the hot functions and saves JSON results
+that can be compared between commits.
+"""
@@ -0,0 +1,139 @@
+"""Compares the scalar cost loop with the columnar (NumPy) cost engine.
+
+Costs random ingredient rows (1M rows in 100k recipes by default) with
+the per-ingredient loop of batch mode (rcc_batch.cost_recipe()) and with
+the columnar engine batch mode uses (rcc_batch.cost_columns()), and
+checks they give the same totals. Each one is run --repeats times and
+the fastest run is shown.
+
+The same columns are also costed in float dollars, the way the engine
+did before money was kept in micro-cents, to show what the exact sums
+cost next to the column building every batch chunk does anyway.
+
+    python -m benchmarks.bench_cost_engine [--rows 1000000] [--recipes 100000] [--repeats 1]
+"""
+import argparse
+import random
+import time
+
+import numpy
+
+import rcc_money
+import rcc_vector
+from rcc_batch import cost_columns
+from rcc_units import units_dict
+from B02_RCC_Final import check_amount_bought
+
+ROWS = 1_000_000
+RECIPES = 100_000
+
+
+def make_rows(rows, recipes, seed=1):
+    """Makes random (but always valid) ingredient rows"""
+
+    rng = random.Random(seed)
+    units = {"g": ["g", "kg"], "ml": ["ml", "l", "tsp", "tbsp", "cups"], "none": [None]}
+    data = []
+
+    for _ in range(rows):
+        base = rng.choice(list(units))
+        unit_used, unit_bought = rng.choice(units[base]), rng.choice(units[base])
+        amount_used = rng.randint(1, 20)
+
+        # Buys at least as much as is used.
+        amount_bought = amount_used * units_dict[unit_used][1] / units_dict[unit_bought][1]
+        amount_bought *= rng.uniform(1, 10)
+
+        data.append((rng.randrange(recipes), amount_used, unit_used,
+                     amount_bought, unit_bought, round(rng.uniform(0.5, 30), 2)))
+
+    data.sort(key=lambda row: row[0])
+    return data
+
+
+def scalar(data, servings):
+    """The per-ingredient loop of rcc_batch.cost_recipe() (micro-cents)"""
+
+    totals = [0] * len(servings)
+    for recipe_id, amount_used, unit_used, amount_bought, unit_bought, price in data:
+        converted_amt = check_amount_bought(amount_used, unit_used, amount_bought, unit_bought)
+        totals[recipe_id] += rcc_money.cost_to_make(rcc_money.from_dollars(price),
+                                                    amount_used, converted_amt)
+
+    return totals, [rcc_money.divide(total, serves) for total, serves in zip(totals, servings)]
+
+
+def columnar(columns, servings):
+    """The columnar engine of batch mode (units already turned into ids)"""
+
+    recipe_ids, amount_used, unit_used, amount_bought, unit_bought, price = columns
+    costs, totals, per_serve, failed = cost_columns(recipe_ids, amount_used, unit_used,
+                                                    amount_bought, unit_bought,
+                                                    rcc_money.from_dollars_array(price), servings)
+    return totals, per_serve
+
+
+def columnar_float(columns, servings):
+    """The columnar engine in float dollars, before micro-cents (for comparison only)"""
+
+    recipe_ids, amount_used, unit_used, amount_bought, unit_bought, price = columns
+    converted_amt, valid = rcc_vector.check_rows(amount_used, unit_used, amount_bought, unit_bought)
+    costs = numpy.where(valid, price * (amount_used / converted_amt), numpy.nan)
+    totals = numpy.bincount(recipe_ids, weights=costs, minlength=len(servings))
+    return totals, totals / servings
+
+
+def best_time(function, *arguments, repeats=1):
+    """Runs a function repeats times, returns (its result, the fastest time)"""
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*arguments)
+        times.append(time.perf_counter() - start)
+
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=ROWS, help="ingredient rows costed")
+    parser.add_argument("--recipes", type=int, default=RECIPES, help="recipes the rows belong to")
+    parser.add_argument("--repeats", type=int, default=1, help="timed runs of each engine")
+    arguments = parser.parse_args()
+
+    rows, recipes = arguments.rows, arguments.recipes
+    data = make_rows(rows, recipes)
+    servings = [random.Random(2).randint(1, 12) for _ in range(recipes)]
+
+    (scalar_totals, scalar_per_serve), scalar_time = best_time(scalar, data, servings,
+                                                               repeats=arguments.repeats)
+
+    # Building the columns is timed on its own since it is parsing work.
+    start = time.perf_counter()
+    recipe_ids, amount_used, unit_used, amount_bought, unit_bought, price = (
+        [row[column] for row in data] for column in range(6))
+    columns = (numpy.array(recipe_ids, dtype=numpy.intp), numpy.array(amount_used, dtype=float),
+               rcc_vector.encode_units(unit_used), numpy.array(amount_bought, dtype=float),
+               rcc_vector.encode_units(unit_bought), numpy.array(price, dtype=float))
+    encode_time = time.perf_counter() - start
+
+    (totals, per_serve), columnar_time = best_time(columnar, columns, numpy.array(servings),
+                                                   repeats=arguments.repeats)
+    _, float_time = best_time(columnar_float, columns, numpy.array(servings),
+                              repeats=arguments.repeats)
+
+    # What micro-cents add to a chunk: column building and costing together.
+    extra = (columnar_time - float_time) / (encode_time + float_time)
+
+    print(f"{rows} ingredient rows, {recipes} recipes")
+    print(f"scalar loop:     {scalar_time:.3f}s")
+    print(f"column building: {encode_time:.3f}s")
+    print(f"columnar engine: {columnar_time:.3f}s ({scalar_time / columnar_time:.0f}x faster)")
+    print(f"  in float:      {float_time:.3f}s (micro-cents add {extra:.0%} to building + costing)")
+    print(f"same totals:     {numpy.array_equal(totals, scalar_totals)}")
+    print(f"same per serve:  {numpy.array_equal(per_serve, scalar_per_serve)}")
+
+
+if __name__ == "__main__":
+    main()
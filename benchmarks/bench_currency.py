@@ -0,0 +1,78 @@
+"""Prices in other currencies: converting row by row against a column at a time.
+
+Converts a column of prices (1M by default) written in NZD, AUD, USD and
+EUR (as codes or symbols, e.g. "USD 3.50", "A$4.20") into the reporting
+currency, two ways:
+  - splitting each price and multiplying it by its rate, one row at a time
+  - CurrencyTable: the cached parse of each price string into the number
+    and currency id, then one to_report_array() for the whole column
+and checks they give the same prices.
+
+    python -m benchmarks.bench_currency [--rows 1000000]
+"""
+import argparse
+import random
+import time
+
+import numpy
+
+from rcc_currency import CurrencyTable
+
+RATES = {"AUD": 1.09, "USD": 1.68, "EUR": 1.82}
+
+# How the prices are written
+FORMATS = ["{}", "${}", "NZD {}", "USD {}", "{} AUD", "US${}", "A${}", "€{}"]
+
+
+def make_prices(rows, seed=1):
+    """Random price strings, most of them seen more than once (like a price list)"""
+
+    rng = random.Random(seed)
+    prices = [rng.choice(FORMATS).format(round(rng.uniform(0.5, 40), 2)) for _ in range(min(rows, 5000))]
+    return [rng.choice(prices) for _ in range(rows)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="prices converted")
+    arguments = parser.parse_args()
+
+    prices = make_prices(arguments.rows)
+    table = CurrencyTable(values=RATES)
+
+    # Row at a time: every price is parsed and multiplied by its own rate.
+    start = time.perf_counter()
+    parse_uncached = table.parse_uncached
+    rates = table.rates
+    by_row = []
+    for price in prices:
+        number, currency_id, error = parse_uncached(price.strip())
+        by_row.append(number * rates[currency_id])
+    row_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parse_price = table.parse_price
+    numbers = []
+    currency_ids = []
+    for price in prices:
+        number, currency_id = parse_price(price)
+        numbers.append(number)
+        currency_ids.append(currency_id)
+    parse_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    by_column = table.to_report_array(numbers, currency_ids)
+    column_seconds = time.perf_counter() - start
+
+    same = numpy.array_equal(by_row, by_column)
+    total = parse_seconds + column_seconds
+    print(f"{arguments.rows} prices in {len(RATES) + 1} currencies")
+    print(f"row at a time:             {row_seconds * 1000:>8.1f}ms")
+    print(f"cached parse + one column: {total * 1000:>8.1f}ms  ({row_seconds / total:.1f}x faster)  "
+          f"same prices: {same}")
+    print(f"  the column conversion:   {column_seconds * 1000:>8.1f}ms")
+    print(f"parse cache: {table.parse_cached.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Report filename allocation at volume.
+
+Writes many reports (100k by default) with lots of repeated recipe names
+into one output folder, with a stat() probe for every candidate name
+(the usual way to find a free name), with the FilenameAllocator, and
+with the allocator spread over shard folders.
+
+    python -m benchmarks.bench_filenames [--reports 100000] [--shards 256]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from rcc_report import ReportWriter
+from B02_RCC_Final import valid_filename, make_report
+
+TO_WRITE = make_report("Benchmark Recipe", 4, "+---+\n| x |\n+---+", 12.5, 3.125)
+
+
+def make_names(count, seed=1):
+    """Recipe names, a few thousand different ones, some with illegal characters"""
+
+    rng = random.Random(seed)
+    names = [f"Recipe {number}" for number in range(2_000)] + ["Mum's Soup", "Pie #2"]
+    return [rng.choice(names) for _ in range(count)]
+
+
+def write_stat_probe(directory, names, shards):
+    """Finds a free filename by checking the disk for name.txt, name_2.txt, ..."""
+
+    with ReportWriter(directory, "none") as writer:
+        for name in names:
+            base = valid_filename(name)
+            number = 1
+            filename = f"{base}.txt"
+
+            while os.path.exists(os.path.join(directory, filename)):
+                number += 1
+                filename = f"{base}_{number}.txt"
+
+            writer.write(filename, TO_WRITE)
+
+
+def write_allocator(directory, names, shards):
+    """Lets the report writer's FilenameAllocator pick the filenames"""
+
+    with ReportWriter(directory, "none", shards) as writer:
+        for name in names:
+            writer.write_report(valid_filename(name), TO_WRITE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=100_000, help="reports to write")
+    parser.add_argument("--shards", type=int, default=256, help="shard folders for the last run")
+    arguments = parser.parse_args()
+
+    names = make_names(arguments.reports)
+    print(f"{arguments.reports} reports, {len(set(names))} different recipe names")
+
+    for label, function, shards in (("stat() probe", write_stat_probe, 0),
+                                    ("allocator", write_allocator, 0),
+                                    (f"allocator, {arguments.shards} shards", write_allocator,
+                                     arguments.shards)):
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            function(directory, names, shards)
+            seconds = time.perf_counter() - start
+
+        print(f"{label:<24} {seconds:>7.2f}s {arguments.reports / seconds:>9.0f} reports/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Did-you-mean lookups: the trigram index against scanning every name.
+
+Makes a vocabulary of ingredient names (100k by default) and misspells
+some of them (a letter changed, dropped or doubled), then finds the
+closest names for each typo three ways:
+  - rcc_fuzzy.NameIndex
+  - working out the same trigram similarity against every name
+  - difflib.get_close_matches (on a few typos, it is slow)
+and checks the index gives the same names as the full scan.
+
+    python -m benchmarks.bench_fuzzy [--names 100000] [--queries 2000]
+"""
+import argparse
+import difflib
+import random
+import string
+import time
+
+from rcc_fuzzy import NameIndex, trigrams, CUTOFF
+
+WORDS = ["flour", "sugar", "butter", "milk", "plain", "brown", "caster", "whole", "wheat", "rice",
+         "oil", "olive", "coconut", "almond", "vanilla", "extract", "cocoa", "powder", "baking",
+         "soda", "salt", "pepper", "black", "white", "cream", "cheese", "cheddar", "tomato", "paste",
+         "garlic", "onion", "red", "green", "chilli", "lemon", "juice", "honey", "maple", "syrup",
+         "yeast", "dry", "instant", "oats", "rolled", "raisins", "walnut", "pecan", "cinnamon",
+         "ground", "nutmeg", "organic", "free range", "eggs", "smoked", "paprika", "lime", "mint"]
+
+# Closest names asked for
+LIMIT = 3
+
+
+def make_names(count, seed=1):
+    """count different ingredient names, some with a brand or size number"""
+
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        name = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+        if rng.random() < 0.7:
+            name += f" {rng.randint(1, 999)}"
+        names.add(name)
+
+    return sorted(names)
+
+
+def misspell(name, rng):
+    """The name with one letter changed, dropped or doubled"""
+
+    place = rng.randrange(len(name))
+    typo = rng.choice(["change", "drop", "double"])
+    if typo == "change":
+        return name[:place] + rng.choice(string.ascii_lowercase) + name[place + 1:]
+    if typo == "drop":
+        return name[:place] + name[place + 1:]
+    return name[:place] + name[place] + name[place:]
+
+
+def scan(text, names, name_grams):
+    """The closest names by scanning every one of them"""
+
+    grams = trigrams(text)
+    matches = []
+    for name, other in zip(names, name_grams):
+        score = 2 * len(grams & other) / (len(grams) + len(other))
+        if score >= CUTOFF:
+            matches.append((score, name))
+
+    matches.sort(key=lambda match: -match[0])
+    return [name for score, name in matches[:LIMIT]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--names", type=int, default=100_000, help="names in the vocabulary")
+    parser.add_argument("--queries", type=int, default=2000, help="misspelt names looked up")
+    arguments = parser.parse_args()
+
+    names = make_names(arguments.names)
+    rng = random.Random(2)
+    picked = [rng.choice(names) for _ in range(arguments.queries)]
+    queries = [misspell(name, rng) for name in picked]
+
+    start = time.perf_counter()
+    index = NameIndex(names)
+    index.freeze()
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    suggestions = [[name for name, score in index.suggest(query, LIMIT)] for query in queries]
+    index_seconds = (time.perf_counter() - start) / len(queries)
+
+    # The full scan and difflib are slow, so they only look up some of the typos.
+    checked = queries[:max(1, len(queries) // 20)]
+    name_grams = [trigrams(name) for name in names]
+    start = time.perf_counter()
+    scanned = [scan(query, names, name_grams) for query in checked]
+    scan_seconds = (time.perf_counter() - start) / len(checked)
+
+    slow = checked[:5]
+    start = time.perf_counter()
+    for query in slow:
+        difflib.get_close_matches(query, names, LIMIT)
+    difflib_seconds = (time.perf_counter() - start) / len(slow)
+
+    same = suggestions[:len(checked)] == scanned
+    hits = sum(original in found for original, found in zip(picked, suggestions))
+
+    print(f"{len(names)} names, {len(queries)} typos, index made in {build_seconds * 1000:.0f}ms")
+    print(f"difflib:        {difflib_seconds * 1000:>9.3f}ms per lookup")
+    print(f"scan all names: {scan_seconds * 1000:>9.3f}ms per lookup")
+    print(f"trigram index:  {index_seconds * 1000:>9.3f}ms per lookup  "
+          f"({scan_seconds / index_seconds:.0f}x faster than the scan)  same as the scan: {same}")
+    print(f"misspelt name in the top {LIMIT}: {hits / len(queries):.1%}")
+
+
+if __name__ == "__main__":
+    main()
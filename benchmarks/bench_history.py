@@ -0,0 +1,142 @@
+"""Price history queries: binary search of sorted days against scanning them.
+
+Saves 5 years of daily prices for 10k ingredients (by default) to the
+price history of a catalogue file in a temporary folder, opens it again
+and times:
+  - the price of random ingredients on random days (the first lookup of
+    an ingredient reads its history from the file, later ones don't)
+  - the prices in force over random 90 day ranges
+  - the days the cost of a 10 ingredient recipe changed over a year
+against looking the same prices up by scanning the days of an ingredient
+one at a time, and checks they give the same prices.
+
+    python -m benchmarks.bench_history [--ingredients 10000] [--days 1826] [--queries 20000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date
+
+import numpy
+
+from rcc_history import PriceHistory, PriceSeries
+
+# Days in a range query
+RANGE_DAYS = 90
+
+
+def make_history(path, ingredients, days, seed=1):
+    """Saves a price for every day to the history of every ingredient, returns the first day"""
+
+    rng = numpy.random.default_rng(seed)
+    first_day = date(2020, 1, 1).toordinal()
+    day_numbers = numpy.arange(first_day, first_day + days, dtype=numpy.int32).tobytes()
+    pack_sizes = numpy.ones(days).tobytes()
+    unit_ids = numpy.zeros(days, dtype=numpy.uint16).tobytes()
+
+    connection = sqlite3.connect(path)
+    history = PriceHistory(connection)
+
+    for number in range(ingredients):
+        # A random walk of prices around $5
+        prices = numpy.round(numpy.abs(numpy.cumsum(rng.normal(0, 0.05, days)) + 5), 2)
+        name = f"ingredient {number}"
+        history.series[name] = PriceSeries(day_numbers, pack_sizes, unit_ids, "kg", prices.tobytes())
+        history.changed.add(name)
+
+        # Written a thousand at a time, so they don't all stay in memory.
+        if len(history.changed) == 1000:
+            history.write()
+            history.series.clear()
+
+    history.write()
+    connection.commit()
+    connection.close()
+    return first_day
+
+
+def scan_as_of(series, day):
+    """The price on a day, found by scanning the days one at a time"""
+
+    found = None
+    for index, saved_day in enumerate(series.days):
+        if saved_day > day:
+            break
+        found = index
+    return None if found is None else series.entry(found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ingredients", type=int, default=10_000, help="ingredients in the history")
+    parser.add_argument("--days", type=int, default=1826, help="days of prices for each ingredient")
+    parser.add_argument("--queries", type=int, default=20_000, help="lookups timed")
+    arguments = parser.parse_args()
+
+    rng = random.Random(2)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "history.db")
+
+        start = time.perf_counter()
+        first_day = make_history(path, arguments.ingredients, arguments.days)
+        build_seconds = time.perf_counter() - start
+        size = os.path.getsize(path)
+
+        connection = sqlite3.connect(path)
+        history = PriceHistory(connection)
+        last_day = first_day + arguments.days - 1
+
+        lookups = [(f"ingredient {rng.randrange(arguments.ingredients)}",
+                    rng.randint(first_day - 30, last_day + 30)) for _ in range(arguments.queries)]
+
+        # The first lookups read the histories in from the file.
+        start = time.perf_counter()
+        cold = [history.as_of(name, day) for name, day in lookups]
+        cold_seconds = (time.perf_counter() - start) / len(lookups)
+        loaded = len(history.series)
+
+        start = time.perf_counter()
+        warm = [history.as_of(name, day) for name, day in lookups]
+        warm_seconds = (time.perf_counter() - start) / len(lookups)
+
+        ranges = [(name, day, day + RANGE_DAYS) for name, day in lookups]
+        start = time.perf_counter()
+        found = [history.between(name, start_day, end_day) for name, start_day, end_day in ranges]
+        range_seconds = (time.perf_counter() - start) / len(ranges)
+
+        # A recipe's trend over a year needs the days any of its ingredients changed.
+        recipes = [[f"ingredient {rng.randrange(arguments.ingredients)}" for _ in range(10)]
+                   for _ in range(100)]
+        start = time.perf_counter()
+        for names in recipes:
+            history.change_days(names, last_day - 365, last_day)
+        trend_seconds = (time.perf_counter() - start) / len(recipes)
+
+        # The scan is slow, so it only looks up some of the prices.
+        checked = lookups[:max(1, len(lookups) // 20)]
+        start = time.perf_counter()
+        scanned = [scan_as_of(history.load(name), day) for name, day in checked]
+        scan_seconds = (time.perf_counter() - start) / len(checked)
+
+        connection.close()
+
+    same = scanned == cold[:len(checked)] and warm == cold
+    prices = arguments.ingredients * arguments.days
+    print(f"{prices} prices ({arguments.ingredients} ingredients x {arguments.days} days), "
+          f"{size / 1e6:.0f}MB, saved in {build_seconds:.1f}s")
+    print(f"scan the days:         {scan_seconds * 1e6:>8.1f}us per lookup")
+    print(f"bisect, first lookup:  {cold_seconds * 1e6:>8.1f}us per lookup "
+          f"({loaded} histories read in)")
+    print(f"bisect, read in:       {warm_seconds * 1e6:>8.1f}us per lookup  "
+          f"({scan_seconds / warm_seconds:.0f}x faster than the scan)  same prices: {same}")
+    print(f"{RANGE_DAYS} day range:          {range_seconds * 1e6:>8.1f}us per range "
+          f"({sum(map(len, found)) / len(found):.0f} prices each)")
+    print(f"change days of a 10 ingredient recipe over a year: {trend_seconds * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
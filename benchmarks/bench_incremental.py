@@ -0,0 +1,68 @@
+"""Applying a price-change feed to a book of recipes, incrementally and
+by costing every affected recipe again.
+
+    python -m benchmarks.bench_incremental [--recipes 10000] [--changes 100]
+"""
+import argparse
+import random
+import time
+
+import rcc_money
+from benchmarks.corpus import make_recipes, INGREDIENTS
+from rcc_batch import cost_recipe
+from rcc_recipe import RecipeModel, RecipeBook
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=10_000, help="recipes in the book")
+    parser.add_argument("--changes", type=int, default=100, help="price changes in the feed")
+    arguments = parser.parse_args()
+
+    recipes = list(make_recipes(arguments.recipes))
+    book = RecipeBook()
+    for recipe in recipes:
+        book.add(RecipeModel.from_recipe(recipe))
+
+    rng = random.Random(5)
+    feed = [(rng.choice(INGREDIENTS), round(rng.uniform(1, 30), 2)) for _ in range(arguments.changes)]
+
+    # Incremental, only the changed ingredient of each recipe is costed again.
+    start = time.perf_counter()
+    updates = 0
+    for name, price in feed:
+        updates += len(book.uses.get(name.lower(), ()))
+        book.change_price(name, price)
+    incremental = time.perf_counter() - start
+
+    # Full, every recipe using the ingredient is costed from scratch.
+    by_ingredient = {}
+    for recipe in recipes:
+        for ingredient in recipe["Ingredients"]:
+            by_ingredient.setdefault(ingredient["Ingredient Name"], []).append(ingredient)
+    uses = {name: [recipe for recipe in recipes
+                   if any(row["Ingredient Name"] == name for row in recipe["Ingredients"])]
+            for name in INGREDIENTS}
+
+    start = time.perf_counter()
+    for name, price in feed:
+        for ingredient in by_ingredient.get(name, ()):
+            ingredient["Price Paid"] = price
+        for recipe in uses[name]:
+            cost_recipe(recipe)
+    full = time.perf_counter() - start
+
+    # Both ways should end up with the same totals.
+    same = all(rcc_money.to_dollars(book.recipes[recipe["Recipe Name"]].total_cost)
+               == cost_recipe(recipe)["Total Cost to Make"] for recipe in recipes)
+
+    print(f"{arguments.recipes} recipes, {arguments.changes} price changes, "
+          f"{updates} recipe updates")
+    print(f"incremental:  {incremental * 1000:>9.1f}ms "
+          f"({incremental / arguments.changes * 1000:.1f}ms per price change)")
+    print(f"full recost:  {full * 1000:>9.1f}ms ({full / incremental:.0f}x slower)")
+    print(f"same totals:  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Float, Decimal and micro-cent (int64) money compared on bulk costing.
+
+Costs the same rows three ways, adds them up per recipe and prints the
+rows per second of each, and how far the float totals drift from the
+exact ones.
+
+    python -m benchmarks.bench_money [--rows 1000000]
+"""
+import argparse
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy
+
+import rcc_money
+
+RECIPES = 10_000
+
+
+def make_columns(rows, seed=1):
+    """Random prices, amounts used and converted amounts bought"""
+
+    rng = numpy.random.default_rng(seed)
+    prices = numpy.round(rng.uniform(0.5, 30, rows), 2)
+    converted_amt = rng.choice([250.0, 500.0, 1000.0, 2000.0], rows)
+    amount_used = numpy.round(rng.uniform(1, 250, rows), 1)
+    recipe_ids = numpy.sort(rng.integers(0, RECIPES, rows))
+    return prices, amount_used, converted_amt, recipe_ids
+
+
+def float_engine(prices, amount_used, converted_amt, recipe_ids):
+    """Float costs added up with bincount"""
+
+    costs = prices * (amount_used / converted_amt)
+    return numpy.bincount(recipe_ids, weights=costs, minlength=RECIPES)
+
+
+def money_engine(prices, amount_used, converted_amt, recipe_ids):
+    """Micro-cent costs added up exactly"""
+
+    costs = rcc_money.cost_to_make_array(rcc_money.from_dollars_array(prices), amount_used, converted_amt)
+    return rcc_money.group_totals(recipe_ids, costs, RECIPES)
+
+
+def decimal_engine(prices, amount_used, converted_amt, recipe_ids):
+    """Decimal costs, one row at a time"""
+
+    totals = [Decimal(0)] * RECIPES
+    micro = Decimal("0.00000001")
+
+    for price, used, bought, recipe_id in zip(prices.tolist(), amount_used.tolist(),
+                                              converted_amt.tolist(), recipe_ids.tolist()):
+        cost = (Decimal(str(price)) * Decimal(str(used)) / Decimal(str(bought)))
+        totals[recipe_id] += cost.quantize(micro, rounding=ROUND_HALF_UP)
+
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="ingredient rows")
+    arguments = parser.parse_args()
+
+    columns = make_columns(arguments.rows)
+    print(f"{arguments.rows} rows, {RECIPES} recipes")
+
+    timings = {}
+    for name, engine in [("float", float_engine), ("micro-cents", money_engine),
+                         ("Decimal", decimal_engine)]:
+        start = time.perf_counter()
+        totals = engine(*columns)
+        seconds = time.perf_counter() - start
+        timings[name] = totals
+        print(f"{name:<12} {arguments.rows / seconds:>14,.0f} rows/s")
+
+    # Drift of the float totals from the exact (micro-cent) ones, in cents.
+    exact = timings["micro-cents"]
+    float_cents = numpy.round(timings["float"] * 100)
+    exact_cents = numpy.array([rcc_money.to_cents(int(total)) for total in exact])
+    print(f"\nrecipes whose float total is a cent off: "
+          f"{int(numpy.count_nonzero(float_cents != exact_cents))}")
+    print(f"float grand total:       {timings['float'].sum():.10f}")
+    print(f"micro-cent grand total:  {int(exact.sum()) / rcc_money.MICROCENTS:.10f}")
+
+
+if __name__ == "__main__":
+    main()
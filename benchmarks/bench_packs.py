@@ -0,0 +1,119 @@
+"""Cheapest packs for a weekly order.
+
+Picks the cheapest packs for an order of 500 ingredients (by default),
+each with 2 to 6 pack sizes on offer, with rcc_packs, and checks every
+pick costs the same as a plain Python dynamic program over whole grams /
+millilitres. Some of the ingredients sold by weight also have lb / oz
+packs (their sizes share no round gcd with the metric ones, so rcc_packs
+uses a coarser step for them); their picks are checked to cover the
+amount used and compared with the plain program, which rounds the packs
+down to whole grams.
+
+    python -m benchmarks.bench_packs [--ingredients 500] [--imperial 0.3]
+"""
+import argparse
+import random
+import time
+
+import rcc_money
+from rcc_packs import cheapest_packs, to_steps, RESOLUTION
+
+# Pack sizes on offer, in the base unit
+PACK_SIZES = {"g": [100, 250, 500, 1000, 1500, 2000, 5000, 10000],
+              "ml": [250, 300, 500, 1000, 1250, 2000, 3000, 4000]}
+
+# lb / oz packs on offer next to the metric ones
+IMPERIAL_PACKS = [(4, "oz"), (8, "oz"), (16, "oz"), (1, "lb"), (2, "lb"), (5, "lb")]
+
+# Units the amounts used are given in
+USED_UNITS = {"g": ["g", "kg"], "ml": ["ml", "l", "cups", "tbsp"]}
+
+
+def make_order(ingredients, imperial=0.0, seed=1):
+    """Random (amount used, unit used, packs on offer) for every ingredient,
+    with lb / oz packs too for the imperial share of the ones sold by weight"""
+
+    rng = random.Random(seed)
+    order = []
+
+    for _ in range(ingredients):
+        base = rng.choice(list(PACK_SIZES))
+        sizes = [(size, base) for size in rng.sample(PACK_SIZES[base], rng.randint(2, 6))]
+        if base == "g" and rng.random() < imperial:
+            sizes = sizes[:rng.randint(1, 3)] + rng.sample(IMPERIAL_PACKS, rng.randint(1, 3))
+
+        # Bigger packs are a bit cheaper per gram, with some noise.
+        unit_price = rng.uniform(0.002, 0.02)
+        packs = [(size, unit, rcc_money.from_dollars(round(to_steps(size, unit)[1] / RESOLUTION
+                                                           * unit_price * rng.uniform(0.7, 1.1), 2)))
+                 for size, unit in sizes]
+
+        unit = rng.choice(USED_UNITS[base])
+        amount = {"g": rng.randint(50, 20_000), "ml": rng.randint(50, 12_000),
+                  "kg": rng.randint(1, 20), "l": rng.randint(1, 12),
+                  "cups": rng.randint(1, 40), "tbsp": rng.randint(1, 60)}[unit]
+        order.append((amount, unit, packs))
+
+    return order
+
+
+def plain_cheapest(amount_used, unit_used, packs):
+    """The cheapest price of packs covering the amount, one whole base unit at a time"""
+
+    used = -(-to_steps(amount_used, unit_used)[1] // RESOLUTION)
+    sizes = [(to_steps(amount, unit)[1] // RESOLUTION, price) for amount, unit, price in packs]
+
+    cheapest = [0] * (used + 1)
+    for target in range(1, used + 1):
+        cheapest[target] = min(cheapest[max(0, target - size)] + price for size, price in sizes)
+
+    return cheapest[used]
+
+
+def is_imperial(packs):
+    """True if any of the packs is sold in lb / oz"""
+    return any(unit in ("lb", "oz") for amount, unit, price in packs)
+
+
+def covers(pick, amount_used, unit_used):
+    """True if the packs picked hold at least the amount used"""
+    return sum(count * to_steps(amount, unit)[1] for count, amount, unit, price in pick) \
+        >= to_steps(amount_used, unit_used)[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ingredients", type=int, default=500, help="ingredients in the order")
+    parser.add_argument("--imperial", type=float, default=0.3,
+                        help="share of the ingredients sold by weight that also have lb / oz packs")
+    arguments = parser.parse_args()
+
+    order = make_order(arguments.ingredients, arguments.imperial)
+
+    start = time.perf_counter()
+    picks = cheapest_packs(order)
+    seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [plain_cheapest(*need) for need in order]
+    plain_seconds = time.perf_counter() - start
+
+    spent = [sum(count * price for count, amount, unit, price in pick) for pick in picks]
+    imperial = [number for number, (amount, unit, packs) in enumerate(order) if is_imperial(packs)]
+    same = all(spent[number] == expected[number] for number in range(len(order))
+               if number not in set(imperial))
+    covered = all(covers(pick, amount, unit) for pick, (amount, unit, packs) in zip(picks, order))
+    dearer = max((spent[number] / expected[number] - 1 for number in imperial), default=0)
+
+    print(f"{arguments.ingredients} ingredients ({len(imperial)} with lb / oz packs), "
+          f"{sum(len(packs) for amount, unit, packs in order)} packs on offer")
+    print(f"plain Python, 1 g / ml steps: {plain_seconds * 1000:>8.1f}ms")
+    print(f"cheapest_packs:              {seconds * 1000:>8.1f}ms  "
+          f"({plain_seconds / seconds:.1f}x faster)  same prices: {same}")
+    print(f"lb / oz packs: cover the amounts used: {covered}, "
+          f"at most {dearer:.2%} dearer than the plain program")
+    print(f"order total: {rcc_money.currency(sum(spent))}")
+
+
+if __name__ == "__main__":
+    main()
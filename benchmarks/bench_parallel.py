@@ -0,0 +1,52 @@
+"""Batch costing throughput with 1 .. N worker processes.
+
+Costs a synthetic corpus (100k recipes by default) with each number of
+jobs up to the number of cores and prints the speed up over one job.
+
+    python -m benchmarks.bench_parallel [--recipes 100000] [--reports]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.corpus import write_recipe_csv
+from rcc_batch import run_batch
+
+
+def time_batch(corpus, directory, jobs, reports):
+    """Returns the seconds taken to cost the corpus with this many jobs"""
+
+    reports_folder = os.path.join(directory, f"reports_{jobs}") if reports else None
+    output = os.path.join(directory, f"results_{jobs}.csv")
+
+    start = time.perf_counter()
+    run_batch([corpus], output, "csv", reports_folder, "none", jobs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=100_000, help="size of the corpus")
+    parser.add_argument("--max-jobs", type=int, default=os.cpu_count(), help="most jobs to try")
+    parser.add_argument("--reports", action="store_true", help="write a report for every recipe too")
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = os.path.join(directory, "corpus.csv")
+        write_recipe_csv(corpus, arguments.recipes)
+
+        print(f"{arguments.recipes} recipes, {os.cpu_count()} cores")
+        jobs_list = sorted({1, *(2 ** power for power in range(1, 8)
+                                 if 2 ** power <= arguments.max_jobs), arguments.max_jobs})
+        one_job = None
+
+        for jobs in jobs_list:
+            seconds = time_batch(corpus, directory, jobs, arguments.reports)
+            one_job = one_job or seconds
+            print(f"jobs {jobs:>3}: {arguments.recipes / seconds:>9.0f} recipes/s  "
+                  f"speed up {one_job / seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Time taken by each stage of the streaming pipeline, and its peak memory
+for two feed sizes (which should be about the same).
+
+    python -m benchmarks.bench_pipeline [--recipes 20000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+
+import rcc_pipeline
+from benchmarks.corpus import write_recipe_csv
+
+# Each stage added on to the one before it.
+STAGES = [
+    ("read_feed", lambda rows: rows),
+    ("parse_rows", rcc_pipeline.parse_rows),
+    ("validate_rows", rcc_pipeline.validate_rows),
+    ("convert_rows", rcc_pipeline.convert_rows),
+    ("cost_rows", rcc_pipeline.cost_rows),
+    ("total_recipes", rcc_pipeline.total_recipes),
+]
+
+
+def run_stages(corpus, count):
+    """Runs the feed through the first count stages and returns the seconds taken"""
+
+    with open(corpus, encoding="utf-8", newline="") as file:
+        start = time.perf_counter()
+        rows = rcc_pipeline.read_feed(file)
+        for name, stage in STAGES[1:count]:
+            rows = stage(rows)
+
+        # Uses up the rows without keeping them.
+        deque(rows, maxlen=0)
+        return time.perf_counter() - start
+
+
+def peak_memory(corpus):
+    """Returns the peak memory (bytes) of running the whole pipeline"""
+
+    tracemalloc.start()
+    with open(corpus, encoding="utf-8", newline="") as file:
+        deque(rcc_pipeline.cost_feed(file), maxlen=0)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=20_000, help="recipes in the feed")
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = os.path.join(directory, "feed.csv")
+        write_recipe_csv(corpus, arguments.recipes)
+
+        print(f"{arguments.recipes} recipe feed")
+        previous = 0
+        for count, (name, stage) in enumerate(STAGES, start=1):
+            seconds = run_stages(corpus, count)
+            print(f"{name:<15} {seconds - previous:>8.3f}s  (total {seconds:.3f}s)")
+            previous = seconds
+
+        small = os.path.join(directory, "small.csv")
+        write_recipe_csv(small, arguments.recipes // 10)
+        print(f"\npeak memory, {arguments.recipes // 10} recipes: {peak_memory(small) / 1024:.0f} KiB")
+        print(f"peak memory, {arguments.recipes} recipes: {peak_memory(corpus) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
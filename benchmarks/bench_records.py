@@ -0,0 +1,115 @@
+"""Ingredient storage: six lists of formatted strings against IngredientTable.
+
+Stores ingredients (100k by default) the way main() used to, as the
+six table lists with four of them formatted as they are added, and in
+an rcc_records.IngredientTable of raw numbers. Prints the memory each
+one holds (tracemalloc), the time to store them, the time to format the
+table columns at the end, and checks the columns are the same.
+
+    python -m benchmarks.bench_records [--ingredients 100000]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from B02_RCC_Final import calculate_cost, currency
+from rcc_records import IngredientTable
+
+NAMES = ["Flour", "Sugar", "Milk", "Butter", "Eggs", "Honey", "Rice", "Oil"]
+
+# (unit used, unit bought) pairs, with the amounts in the same unit
+UNITS = [("g", "kg"), ("ml", "l"), ("cups", "cups"), ("tbsp", "g"), (None, None)]
+
+
+def make_ingredients(count, seed=1):
+    """Random (name, amount used, unit used, amount bought, unit bought, price, cost) rows"""
+
+    rng = random.Random(seed)
+    rows = []
+
+    for _ in range(count):
+        unit_used, unit_bought = rng.choice(UNITS)
+        if unit_used is None:
+            amount_used, amount_bought = rng.randint(1, 6), 12
+        else:
+            amount_used, amount_bought = round(rng.uniform(1, 500), 1), round(rng.uniform(500, 1000), 1)
+        price = round(rng.uniform(1, 20), 2)
+        rows.append((f"{rng.choice(NAMES)} {rng.randint(1, 99999)}", amount_used, unit_used,
+                     amount_bought, unit_bought, price, calculate_cost(price, amount_used, amount_bought)))
+
+    return rows
+
+
+def store_lists(rows):
+    """Stores the rows the way main() used to (and makes the recipe dictionary)"""
+
+    all_names = []
+    all_amounts = []
+    all_amounts_bought = []
+    all_prices = []
+    all_costs = []
+    all_costs_raw = []
+
+    for name, amount_used, unit_used, amount_bought, unit_bought, price, cost_to_make in rows:
+        all_names.append(name)
+        all_amounts.append(f"{amount_used}{unit_used or ''}")
+        all_amounts_bought.append(f"{amount_bought}{unit_bought or ''}")
+        all_prices.append(currency(price))
+        all_costs.append(currency(cost_to_make))
+        all_costs_raw.append(cost_to_make)
+
+    return {'Ingredient Name': all_names, 'Amount Used': all_amounts, 'Amount Bought': all_amounts_bought,
+            'Price Paid': all_prices, 'Cost to Make': all_costs}, all_costs_raw
+
+
+def store_table(rows):
+    """Stores the rows in an IngredientTable"""
+
+    table = IngredientTable()
+    for row in rows:
+        table.add(*row)
+    return table
+
+
+def measure(store, rows):
+    """Returns (what store made, seconds, bytes it holds, not counting the names)"""
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    stored = store(rows)
+    seconds = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # The time without tracemalloc slowing it down.
+    start = time.perf_counter()
+    store(rows)
+    return stored, time.perf_counter() - start, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ingredients", type=int, default=100_000, help="ingredients stored")
+    arguments = parser.parse_args()
+
+    rows = make_ingredients(arguments.ingredients)
+
+    (recipe_dict, costs_raw), list_seconds, list_bytes = measure(store_lists, rows)
+    table, table_seconds, table_bytes = measure(store_table, rows)
+
+    start = time.perf_counter()
+    columns = table.columns()
+    render_seconds = time.perf_counter() - start
+
+    same = columns == recipe_dict and table.total_cost() == sum(costs_raw)
+    count = arguments.ingredients
+    print(f"{count} ingredients")
+    print(f"six lists:       {list_bytes / count:>6.0f} bytes each  stored in {list_seconds * 1000:>7.1f}ms")
+    print(f"IngredientTable: {table_bytes / count:>6.0f} bytes each  stored in {table_seconds * 1000:>7.1f}ms  "
+          f"({list_bytes / table_bytes:.1f}x smaller, {list_seconds / table_seconds:.1f}x faster)")
+    print(f"formatting the table columns when drawn: {render_seconds * 1000:.1f}ms  same columns: {same}")
+
+
+if __name__ == "__main__":
+    main()
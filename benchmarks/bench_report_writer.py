@@ -0,0 +1,76 @@
+"""Reports written per second by the old per-line fsync loop and by
+ReportWriter under each durability policy.
+
+Writes the same small report (2000 times by default) into a temporary
+folder each way. Each one is run --repeats times and the fastest run
+is shown.
+
+    python -m benchmarks.bench_report_writer [--reports 2000] [--repeats 1]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from rcc_report import ReportWriter, DURABILITY_POLICIES
+from B02_RCC_Final import make_report
+
+REPORTS = 2000
+
+# A typical report with a small ingredient table.
+TABLE = "\n".join(["+" + "-" * 80 + "+"] + [f"| Ingredient {number:<68} |" for number in range(10)]
+                  + ["+" + "-" * 80 + "+"])
+TO_WRITE = make_report("Benchmark Recipe", 4, TABLE, 12.5, 3.125)
+
+
+def write_per_line(directory, reports):
+    """The old file output, flush + fsync after every item of to_write"""
+
+    for number in range(reports):
+        text_file = open(os.path.join(directory, f"report_{number}.txt"), "w+", encoding="utf-8")
+        for item in TO_WRITE:
+            text_file.write(item)
+            text_file.write("\n")
+            text_file.flush()
+            os.fsync(text_file.fileno())
+        text_file.close()
+
+
+def write_with_writer(directory, reports, durability):
+    """ReportWriter, one write per report"""
+
+    with ReportWriter(directory, durability) as writer:
+        for number in range(reports):
+            writer.write(f"report_{number}.txt", TO_WRITE)
+
+
+def time_reports(function, reports, repeats, *arguments):
+    """Returns the reports per second of a writer function (the fastest of repeats runs)"""
+
+    rates = []
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            function(directory, reports, *arguments)
+            rates.append(reports / (time.perf_counter() - start))
+
+    return max(rates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=REPORTS, help="reports written each way")
+    parser.add_argument("--repeats", type=int, default=1, help="timed runs of each way")
+    arguments = parser.parse_args()
+
+    reports, repeats = arguments.reports, arguments.repeats
+    print(f"{reports} reports")
+    print(f"{'per-line fsync (old)':<22} {time_reports(write_per_line, reports, repeats):>10.0f} reports/s")
+
+    for durability in DURABILITY_POLICIES:
+        rate = time_reports(write_with_writer, reports, repeats, durability)
+        print(f"{'writer, ' + durability:<22} {rate:>10.0f} reports/s")
+
+
+if __name__ == "__main__":
+    main()
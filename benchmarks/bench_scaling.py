@@ -0,0 +1,73 @@
+"""Cost curves over 1 .. N servings, in one go and by costing again for every size.
+
+Works out the cost to make of every recipe at every size from 1 to N
+servings (24 by default) with rcc_scaling, and by scaling the amounts
+used and running the columnar batch engine once per size.
+
+    python -m benchmarks.bench_scaling [--recipes 10000] [--servings 24]
+"""
+import argparse
+import time
+
+import numpy
+
+import rcc_money
+from rcc_money import MICROCENTS_PER_CENT
+from rcc_batch import CHUNK_SIZE, parse_columns, cost_columns
+from rcc_scaling import scale_columns
+from benchmarks.corpus import make_recipes
+
+
+def rerun_sizes(columns, max_servings):
+    """Costs the recipes once for every size, with the amounts used scaled"""
+
+    recipe_ids, amount_used, unit_used, amount_bought, unit_bought, prices, servings, densities = columns
+    totals = []
+
+    # Every size is costed separately.
+    for size in range(1, max_servings + 1):
+        scaled = amount_used * size / servings[recipe_ids]
+        costs, size_totals, per_serve, failed = cost_columns(
+            recipe_ids, scaled, unit_used, amount_bought, unit_bought, prices,
+            numpy.full(len(servings), size, dtype=numpy.int64), densities)
+        totals.append(size_totals)
+
+    return numpy.stack(totals, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=10_000, help="recipes costed")
+    parser.add_argument("--servings", type=int, default=24, help="largest size on the curves")
+    arguments = parser.parse_args()
+
+    # Parsed into columns a chunk at a time, like batch mode.
+    recipes = list(make_recipes(arguments.recipes))
+    chunk_size = max(1, CHUNK_SIZE * 10 // max(arguments.servings, 10))
+    chunks = [parse_columns(recipes[first:first + chunk_size])[2]
+              for first in range(0, len(recipes), chunk_size)]
+    print(f"{arguments.recipes} recipes, {sum(len(columns[0]) for columns in chunks)} "
+          f"ingredient rows, 1 .. {arguments.servings} servings")
+
+    start = time.perf_counter()
+    rerun = [rerun_sizes(columns, arguments.servings) for columns in chunks]
+    rerun_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    curves = [scale_columns(*columns, arguments.servings)[0] for columns in chunks]
+    curve_seconds = time.perf_counter() - start
+
+    # The rerun can't cost sizes that use more than the amount bought,
+    # so only the sizes that fit in the packs are compared.
+    same = all(numpy.array_equal(rcc_money.divide_array(slow[slow > 0], MICROCENTS_PER_CENT),
+                                 rcc_money.divide_array(fast[slow > 0], MICROCENTS_PER_CENT))
+               for slow, fast in zip(rerun, curves))
+
+    print(f"rerun per size: {rerun_seconds * 1000:>8.1f}ms")
+    print(f"scale_columns:  {curve_seconds * 1000:>8.1f}ms  "
+          f"({rerun_seconds / curve_seconds:.1f}x faster, with packs and shopping costs too)  "
+          f"same cents: {same}")
+
+
+if __name__ == "__main__":
+    main()
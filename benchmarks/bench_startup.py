@@ -0,0 +1,83 @@
+"""Start up time of the Recipe Cost Calculator.
+
+Imports B02_RCC_Final in a fresh interpreter with `python -X importtime`
+and reports the slowest imports and the time to get to the first prompt.
+Fails (exit code 1) if a heavy module is imported at start up again, or
+if the start up takes longer than --limit milliseconds.
+
+    python -m benchmarks.bench_startup [--runs 5] [--limit 150]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules that should only be loaded when they are actually used.
+LAZY_MODULES = ("pandas", "numpy", "tabulate")
+
+IMPORT = "import B02_RCC_Final"
+
+
+def import_times():
+    """Returns {module: (self us, cumulative us)} from python -X importtime"""
+
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", IMPORT],
+                             capture_output=True, text=True, check=True)
+    times = {}
+
+    # Lines look like "import time:       123 |        456 |   module"
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_time, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = (int(self_time), int(cumulative))
+
+    return times
+
+
+def wall_time():
+    """Returns the seconds taken to start python and import the program"""
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", IMPORT], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="number of timed starts")
+    parser.add_argument("--limit", type=float, help="fail if the median start takes longer (ms)")
+    parser.add_argument("--top", type=int, default=10, help="number of slow imports to list")
+    arguments = parser.parse_args()
+
+    times = import_times()
+    total = sum(self_time for self_time, cumulative in times.values())
+
+    print(f"{len(times)} modules imported, {total / 1000:.1f}ms in imports")
+    print(f"{'self ms':>9} {'cumulative ms':>14}  module")
+    slowest = sorted(times.items(), key=lambda item: item[1][1], reverse=True)
+    for module, (self_time, cumulative) in slowest[:arguments.top]:
+        print(f"{self_time / 1000:>9.1f} {cumulative / 1000:>14.1f}  {module}")
+
+    starts = [wall_time() * 1000 for _ in range(arguments.runs)]
+    median = statistics.median(starts)
+    print(f"\nstart up (median of {arguments.runs}): {median:.1f}ms")
+
+    failed = False
+
+    loaded = [module for module in LAZY_MODULES if module in times]
+    if loaded:
+        print(f"❌ imported at start up: {', '.join(loaded)}")
+        failed = True
+
+    if arguments.limit is not None and median > arguments.limit:
+        print(f"❌ start up is over the {arguments.limit:.0f}ms limit")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Piped answers through the interactive prompts against --stdin.
+
+Makes the answers a person would type for a number of recipes (2000 by
+default, some with a wrong answer that is typed again), pipes them into
+B02_RCC_Final.py with and without --stdin and prints the time taken and
+the size of the output.
+
+    python -m benchmarks.bench_stdin [--recipes 2000]
+"""
+import argparse
+import random
+import subprocess
+import sys
+import time
+
+from benchmarks.corpus import make_recipes
+
+SCRIPT = "B02_RCC_Final.py"
+NEW_LINE = b"\n"
+
+
+def make_answers(recipes, seed=1):
+    """The typed answers for the recipes (no reports are written)"""
+
+    rng = random.Random(seed)
+    lines = ["n"]
+
+    for number, recipe in enumerate(recipes):
+        if number:
+            lines.append("r")
+        lines += [recipe["Recipe Name"], str(recipe["Servings"])]
+
+        for ingredient in recipe["Ingredients"]:
+            lines += [ingredient["Ingredient Name"], ingredient["Amount Used"]]
+
+            # Now and then a price is typed wrong first.
+            if rng.random() < 0.1:
+                lines.append("free")
+            lines += [ingredient["Amount Bought"], ingredient["Price Paid"]]
+
+        lines += ["xxx", "n"]
+
+    lines.append("q")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def time_run(arguments, answers):
+    """Returns the seconds taken and the bytes written to the screen"""
+
+    start = time.perf_counter()
+    finished = subprocess.run([sys.executable, SCRIPT, *arguments], input=answers,
+                              capture_output=True)
+
+    # --stdin exits with 1 for the prices typed wrong on purpose, anything else failed.
+    if finished.returncode not in (0, 1) or (finished.returncode == 1 and "--stdin" not in arguments):
+        raise subprocess.CalledProcessError(finished.returncode, finished.args, finished.stdout,
+                                            finished.stderr)
+    return time.perf_counter() - start, len(finished.stdout) + len(finished.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=2000, help="recipes answered")
+    arguments = parser.parse_args()
+
+    answers = make_answers(make_recipes(arguments.recipes))
+    print(f"{arguments.recipes} recipes, {answers.count(NEW_LINE)} answers")
+
+    prompts_seconds, prompts_bytes = time_run([], answers)
+    stdin_seconds, stdin_bytes = time_run(["--stdin"], answers)
+
+    print(f"input() prompts: {prompts_seconds:>7.2f}s {prompts_bytes / 1e6:>8.2f}MB of output")
+    print(f"--stdin:         {stdin_seconds:>7.2f}s {stdin_bytes / 1e6:>8.2f}MB of output  "
+          f"({prompts_seconds / stdin_seconds:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
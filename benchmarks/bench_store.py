@@ -0,0 +1,61 @@
+"""Batch costing from the CSV files against the memory-mapped recipe store.
+
+Converts a synthetic corpus (100k recipes by default) into a recipe
+store once, then times opening it and costing it against costing the
+CSV file, and checks both give the same results.
+
+    python -m benchmarks.bench_store [--recipes 100000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.corpus import write_recipe_csv
+from rcc_batch import cost_files
+from rcc_store import RecipeStore, make_store
+
+
+def time_costing(filename):
+    """Returns the seconds taken and the result rows"""
+
+    start = time.perf_counter()
+    results = list(cost_files([filename]))
+    return time.perf_counter() - start, results
+
+
+def folder_size(path):
+    """Adds up the sizes of the files in a folder"""
+    return sum(entry.stat().st_size for entry in os.scandir(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=100_000, help="size of the corpus")
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = os.path.join(directory, "corpus.csv")
+        store = os.path.join(directory, "corpus.rccstore")
+        write_recipe_csv(corpus, arguments.recipes)
+
+        start = time.perf_counter()
+        for _ in make_store([corpus], store):
+            pass
+        print(f"{arguments.recipes} recipes, converted in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        RecipeStore(store)
+        print(f"open store:  {(time.perf_counter() - start) * 1000:>8.2f}ms")
+
+        csv_seconds, csv_results = time_costing(corpus)
+        store_seconds, store_results = time_costing(store)
+
+        print(f"csv:         {csv_seconds:>8.2f}s  {os.path.getsize(corpus) / 1e6:>6.1f}MB on disk")
+        print(f"store:       {store_seconds:>8.2f}s  {folder_size(store) / 1e6:>6.1f}MB on disk  "
+              f"({csv_seconds / store_seconds:.1f}x faster)")
+        print(f"same results: {csv_results == store_results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compares the built-in table renderer (rcc_table) with tabulate.
+
+Draws recipe tables of 10 to 1000 ingredients in both formats with each
+of them, prints the time per table and checks the output is the same.
+
+    python -m benchmarks.bench_table [--tables 200]
+"""
+import argparse
+import random
+import time
+
+from tabulate import tabulate
+
+from B02_RCC_Final import currency
+from rcc_table import render_table
+from benchmarks.corpus import INGREDIENTS, UNIT_PAIRS
+
+SIZES = (10, 100, 1000)
+
+
+def make_recipe_dict(rng, ingredients):
+    """A recipe dictionary like the ones the program draws, with unitless amounts too"""
+
+    rows = []
+    for number in range(ingredients):
+        unit_used, unit_bought = rng.choice(UNIT_PAIRS)
+        rows.append((f"{rng.choice(INGREDIENTS)} {number}",
+                     f"{rng.randint(1, 500)}{'' if unit_used is None else '.0' + unit_used}",
+                     f"{rng.randint(1, 5)}{'' if unit_bought is None else '.0' + unit_bought}",
+                     currency(rng.uniform(1, 30)), currency(rng.uniform(0, 5))))
+
+    return {name: [row[column] for row in rows] for column, name in
+            enumerate(['Ingredient Name', 'Amount Used', 'Amount Bought', 'Price Paid',
+                       'Cost to Make'])}
+
+
+def time_tables(draw, tables):
+    """Returns the microseconds per table"""
+
+    start = time.perf_counter()
+    for _ in range(tables):
+        draw()
+    return (time.perf_counter() - start) / tables * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=200, help="tables drawn of each size")
+    arguments = parser.parse_args()
+
+    rng = random.Random(1)
+    print(f"{'ingredients':>11} {'format':>10} {'tabulate':>12} {'rcc_table':>12} {'speed up':>9}  same")
+
+    for size in SIZES:
+        recipe_dict = make_recipe_dict(rng, size)
+        tables = max(1, arguments.tables * 10 // size)
+
+        for tablefmt in ("psql", "fancy_grid"):
+            expected = tabulate(recipe_dict, headers='keys', tablefmt=tablefmt, showindex=False)
+            same = render_table(recipe_dict, tablefmt) == expected
+
+            slow = time_tables(lambda: tabulate(recipe_dict, headers='keys', tablefmt=tablefmt,
+                                                showindex=False), tables)
+            fast = time_tables(lambda: render_table(recipe_dict, tablefmt), tables)
+            print(f"{size:>11} {tablefmt:>10} {slow:>10.0f}us {fast:>10.0f}us "
+                  f"{slow / fast:>8.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Unit conversions with densities: a path search per row against the cached lookups.
+
+Converts rows (200k by default) of amounts bought into the units used,
+a third of them between mass and volume, three ways:
+  - searching the unit graph (units -> base units -> density) for every row
+  - UnitRegistry.convert(), cached per (unit, unit, ingredient)
+  - rcc_vector.check_rows() with a density column
+and checks they give the same amounts.
+
+    python -m benchmarks.bench_units [--rows 200000]
+"""
+import argparse
+import random
+import time
+from collections import deque
+
+import numpy
+
+import rcc_vector
+from rcc_units import unit_registry, units_dict
+
+UNITS = ["g", "kg", "oz", "lb", "ml", "l", "cups", "tbsp", "fl oz", "pinch"]
+INGREDIENTS = ["Flour", "Sugar", "Milk", "Butter", "Honey", "Water", "Oil", "Rice"]
+
+
+def make_rows(rows, seed=1):
+    """Random (quantity, unit bought, unit used, ingredient) rows that can be converted"""
+
+    rng = random.Random(seed)
+    return [(rng.uniform(1, 5000), rng.choice(UNITS), rng.choice(UNITS), rng.choice(INGREDIENTS))
+            for _ in range(rows)]
+
+
+def graph_factor(u1, u2, ingredient):
+    """Searches the unit graph from u1 to u2 (breadth first), the way it would be
+    done with no table: unit -> base unit, base unit -> base unit by density"""
+
+    edges = {}
+    for name, (base, factor) in units_dict.items():
+        edges.setdefault(name, []).append((base, factor))
+        edges.setdefault(base, []).append((name, 1 / factor))
+
+    density = unit_registry.density(ingredient)
+    edges["ml"].append(("g", density))
+    edges["g"].append(("ml", 1 / density))
+
+    factors = {u1: 1.0}
+    queue = deque([u1])
+    while queue:
+        unit = queue.popleft()
+        if unit == u2:
+            return factors[unit]
+        for other, factor in edges[unit]:
+            if other not in factors:
+                factors[other] = factors[unit] * factor
+                queue.append(other)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000, help="rows converted")
+    arguments = parser.parse_args()
+
+    rows = make_rows(arguments.rows)
+
+    start = time.perf_counter()
+    searched = [quantity * graph_factor(u1, u2, ingredient) for quantity, u1, u2, ingredient in rows]
+    search_seconds = time.perf_counter() - start
+
+    unit_registry.conversion.cache_clear()
+    convert = unit_registry.convert
+    start = time.perf_counter()
+    cached = [convert(quantity, u1, u2, ingredient) for quantity, u1, u2, ingredient in rows]
+    cached_seconds = time.perf_counter() - start
+
+    quantity = numpy.array([row[0] for row in rows])
+    unit_bought = rcc_vector.encode_units([row[1] for row in rows])
+    unit_used = rcc_vector.encode_units([row[2] for row in rows])
+    names = [row[3] for row in rows]
+
+    start = time.perf_counter()
+    densities = rcc_vector.row_densities(unit_used, unit_bought, lambda picked: [names[row] for row in picked])
+    columnar, valid = rcc_vector.check_rows(numpy.zeros(len(rows)), unit_used, quantity, unit_bought,
+                                            densities)
+    columnar_seconds = time.perf_counter() - start
+
+    close = numpy.allclose(searched, cached, rtol=1e-12)
+    same = numpy.array_equal(cached, columnar)
+    print(f"{arguments.rows} rows, {numpy.count_nonzero(~numpy.isnan(densities))} between mass and volume")
+    print(f"graph search per row: {search_seconds * 1000:>8.1f}ms")
+    print(f"cached lookups:       {cached_seconds * 1000:>8.1f}ms  ({search_seconds / cached_seconds:.0f}x faster)"
+          f"  same as the search: {close}")
+    print(f"columnar:             {columnar_seconds * 1000:>8.1f}ms  ({search_seconds / columnar_seconds:.0f}x faster)"
+          f"  same as the lookups: {same}")
+    print(f"conversion cache: {unit_registry.conversion.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Fixed-seed synthetic recipes for the benchmarks."""
+import csv
+import random
+
+INGREDIENTS = ["Flour", "Sugar", "Butter", "Milk", "Eggs", "Salt", "Vanilla", "Cocoa",
+               "Rice", "Oil", "Water", "Honey", "Yeast", "Cream", "Cheese", "Tomato"]
+
+# (amount used unit, amount bought unit) pairs
+UNIT_PAIRS = [("g", "g"), ("g", "kg"), ("kg", "kg"), ("ml", "ml"), ("ml", "l"), ("l", "l"),
+              ("tsp", "ml"), ("tbsp", "l"), ("cups", "l"), ("cups", "cups"), ("", "")]
+
+FIELDS = ["Recipe Name", "Servings", "Ingredient Name", "Amount Used", "Amount Bought", "Price Paid"]
+
+
+def make_ingredient(rng, name):
+    """Makes a random (valid) ingredient row"""
+
+    unit_used, unit_bought = rng.choice(UNIT_PAIRS)
+    amount_used = rng.randint(1, 5)
+
+    # Buys plenty so the amount bought is never less than the amount used.
+    if unit_used == unit_bought:
+        amount_bought = amount_used * rng.choice([2, 5, 10])
+    else:
+        amount_bought = rng.choice([500, 1000, 2000]) if unit_bought == "ml" else rng.choice([2, 5])
+
+    return {"Ingredient Name": name,
+            "Amount Used": f"{amount_used}{unit_used}",
+            "Amount Bought": f"{amount_bought}{unit_bought}",
+            "Price Paid": f"${rng.uniform(1, 30):.2f}"}
+
+
+def make_recipes(count, seed=1, ingredients=(3, 12)):
+    """Yields count random recipes as batch mode recipe dictionaries"""
+
+    rng = random.Random(seed)
+
+    for number in range(count):
+        yield {"Recipe Name": f"Recipe {number}", "Servings": rng.randint(1, 12),
+               "Ingredients": [make_ingredient(rng, name)
+                               for name in rng.sample(INGREDIENTS, rng.randint(*ingredients))]}
+
+
+def write_recipe_csv(path, count, seed=1):
+    """Writes count random recipes to a batch mode csv file"""
+
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDS)
+        writer.writeheader()
+
+        for recipe in make_recipes(count, seed):
+            for ingredient in recipe["Ingredients"]:
+                writer.writerow({"Recipe Name": recipe["Recipe Name"],
+                                 "Servings": recipe["Servings"], **ingredient})
@@ -0,0 +1,310 @@
+"""Benchmark suite for the hot functions of B02_RCC_Final.py.
+
+Times each function over fixed-seed synthetic data and saves the results
+as JSON so runs can be compared between commits:
+
+    python -m benchmarks.suite --save results.json
+    python -m benchmarks.suite --compare results.json [--only parse]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+from B02_RCC_Final import (parse_amount_and_unit, are_units_compatible, convert_amount, currency,
+                           valid_filename, make_table, make_report, unit_registry, units_dict)
+from rcc_report import ReportWriter
+
+SEED = 1234
+REPEATS = 5
+
+
+# Synthetic data
+
+def make_amount_strings(rng, count):
+    """Random amount strings like the ones people type ("250ml", "2 cups", "4")"""
+
+    units = [unit for unit in units_dict if unit is not None]
+    strings = []
+
+    for _ in range(count):
+        if rng.random() < 0.2:
+            strings.append(str(rng.randint(1, 24)))
+        else:
+            space = " " if rng.random() < 0.3 else ""
+            strings.append(f"{rng.choice([1, 2, 2.5, 5, 100, 250, 500])}{space}{rng.choice(units)}")
+
+    return strings
+
+
+def make_unit_pairs(rng, count):
+    """Random (unit, unit) pairs, about half of them compatible"""
+
+    units = list(units_dict)
+    return [(rng.choice(units), rng.choice(units)) for _ in range(count)]
+
+
+def make_recipe_dict(rng, ingredients):
+    """A recipe dictionary like the one built by the interactive program"""
+
+    return {
+        'Ingredient Name': [f"Ingredient {number}" for number in range(ingredients)],
+        'Amount Used': [f"{rng.randint(1, 500)}.0g" for _ in range(ingredients)],
+        'Amount Bought': [f"{rng.randint(1, 5)}.0kg" for _ in range(ingredients)],
+        'Price Paid': [currency(rng.uniform(1, 30)) for _ in range(ingredients)],
+        'Cost to Make': [currency(rng.uniform(0, 5)) for _ in range(ingredients)],
+    }
+
+
+# Benchmarks, each one returns (function to time, number of operations it does)
+
+def bench_parse_cached(rng):
+    """Amount strings parsed with the parse cache warm"""
+
+    strings = make_amount_strings(rng, 10_000)
+
+    def run():
+        for string in strings:
+            parse_amount_and_unit(string)
+
+    return run, len(strings)
+
+
+def bench_parse_uncached(rng):
+    """Amount strings parsed with the parse cache cleared first"""
+
+    strings = make_amount_strings(rng, 10_000)
+
+    def run():
+        unit_registry.parse_cached.cache_clear()
+        for string in strings:
+            parse_amount_and_unit(string)
+
+    return run, len(strings)
+
+
+def bench_are_units_compatible(rng):
+    """Unit compatibility checks"""
+
+    pairs = make_unit_pairs(rng, 10_000)
+
+    def run():
+        for u1, u2 in pairs:
+            are_units_compatible(u1, u2)
+
+    return run, len(pairs)
+
+
+def bench_convert_amount(rng):
+    """Conversions between compatible units"""
+
+    pairs = [(rng.uniform(1, 1000), u1, u2) for u1, u2 in make_unit_pairs(rng, 20_000)
+             if are_units_compatible(u1, u2)]
+
+    def run():
+        for quantity, u1, u2 in pairs:
+            convert_amount(quantity, u1, u2)
+
+    return run, len(pairs)
+
+
+def bench_currency(rng):
+    """Currency formatting"""
+
+    numbers = [rng.uniform(0, 100) for _ in range(10_000)]
+
+    def run():
+        for number in numbers:
+            currency(number)
+
+    return run, len(numbers)
+
+
+def bench_valid_filename(rng):
+    """Report filename checks"""
+
+    names = [rng.choice(["Pancakes", "Mum's Lasagne", "Chocolate Chip Cookies", "Soup #2"])
+             + str(number) for number in range(2_000)]
+
+    def run():
+        for name in names:
+            valid_filename(name)
+
+    return run, len(names)
+
+
+def bench_table_psql(rng):
+    """psql table of a 20 ingredient recipe"""
+
+    recipe_dict = make_recipe_dict(rng, 20)
+    make_table(recipe_dict, 'psql')
+
+    def run():
+        for _ in range(100):
+            make_table(recipe_dict, 'psql')
+
+    return run, 100
+
+
+def bench_table_fancy_grid(rng):
+    """fancy_grid table of a 20 ingredient recipe"""
+
+    recipe_dict = make_recipe_dict(rng, 20)
+    make_table(recipe_dict, 'fancy_grid')
+
+    def run():
+        for _ in range(100):
+            make_table(recipe_dict, 'fancy_grid')
+
+    return run, 100
+
+
+def bench_table_tabulate(rng):
+    """The same psql table drawn by tabulate"""
+
+    from tabulate import tabulate
+
+    recipe_dict = make_recipe_dict(rng, 20)
+    tabulate(recipe_dict, headers='keys', tablefmt='psql', showindex=False)
+
+    def run():
+        for _ in range(100):
+            tabulate(recipe_dict, headers='keys', tablefmt='psql', showindex=False)
+
+    return run, 100
+
+
+def bench_table_dataframe(rng):
+    """The old DataFrame + tabulate table build (skipped without pandas)"""
+
+    try:
+        import pandas
+        from tabulate import tabulate
+    except ImportError:
+        return None
+
+    recipe_dict = make_recipe_dict(rng, 20)
+    tabulate(pandas.DataFrame(recipe_dict), headers='keys', tablefmt='psql', showindex=False)
+
+    def run():
+        for _ in range(100):
+            tabulate(pandas.DataFrame(recipe_dict), headers='keys', tablefmt='psql', showindex=False)
+
+    return run, 100
+
+
+def bench_report_write(rng):
+    """Report files written (no fsync)"""
+
+    # Removed when the benchmark is garbage collected.
+    directory = tempfile.TemporaryDirectory()
+    table = make_table(make_recipe_dict(rng, 20), 'psql')
+    to_write = make_report("Benchmark Recipe", 4, table, 12.5, 3.125)
+
+    def run():
+        with ReportWriter(directory.name, "none") as writer:
+            for number in range(200):
+                writer.write(f"report_{number}.txt", to_write)
+
+    return run, 200
+
+
+BENCHMARKS = {
+    "parse_amount_and_unit (cached)": bench_parse_cached,
+    "parse_amount_and_unit (uncached)": bench_parse_uncached,
+    "are_units_compatible": bench_are_units_compatible,
+    "convert_amount": bench_convert_amount,
+    "currency": bench_currency,
+    "valid_filename": bench_valid_filename,
+    "table psql": bench_table_psql,
+    "table fancy_grid": bench_table_fancy_grid,
+    "table tabulate psql": bench_table_tabulate,
+    "table DataFrame + tabulate": bench_table_dataframe,
+    "report write": bench_report_write,
+}
+
+
+# Running
+
+def time_benchmark(make_benchmark, repeats):
+    """Returns the best and median nanoseconds per operation"""
+
+    benchmark = make_benchmark(random.Random(SEED))
+    if benchmark is None:
+        return None
+
+    run, operations = benchmark
+    run()  # warm up
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        run()
+        times.append((time.perf_counter_ns() - start) / operations)
+
+    return {"operations": operations, "best_ns": min(times), "median_ns": statistics.median(times)}
+
+
+def git_commit():
+    """Returns the current git commit, or None outside a git checkout"""
+
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--save", metavar="FILE", help="save the results to this JSON file")
+    parser.add_argument("--compare", metavar="FILE", help="compare with the results in this JSON file")
+    parser.add_argument("--only", metavar="TEXT", help="only run benchmarks with this in their name")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="timed runs of each benchmark")
+    arguments = parser.parse_args()
+
+    baseline = {}
+    if arguments.compare:
+        with open(arguments.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+
+    results = {}
+    print(f"{'benchmark':<34} {'best':>12} {'median':>12}")
+
+    for name, make_benchmark in BENCHMARKS.items():
+        if arguments.only and arguments.only not in name:
+            continue
+
+        result = time_benchmark(make_benchmark, arguments.repeats)
+        if result is None:
+            print(f"{name:<34} {'skipped':>12}")
+            continue
+
+        results[name] = result
+        line = f"{name:<34} {result['best_ns']:>10.0f}ns {result['median_ns']:>10.0f}ns"
+
+        if name in baseline:
+            line += f"  {baseline[name]['best_ns'] / result['best_ns']:>6.2f}x vs baseline"
+
+        print(line)
+
+    if arguments.save:
+        data = {
+            "meta": {"commit": git_commit(), "date": datetime.now().isoformat(timespec="seconds"),
+                     "python": platform.python_version(), "platform": platform.platform(),
+                     "cpus": os.cpu_count(), "seed": SEED, "repeats": arguments.repeats},
+            "results": results,
+        }
+        with open(arguments.save, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2)
+        print(f"\nsaved to {arguments.save}")
+
+
+if __name__ == "__main__":
+    main()
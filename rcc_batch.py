@@ -0,0 +1,531 @@
+"""Headless batch mode for the Recipe Cost Calculator.
+
+Costs recipes read from CSV / JSON files with the same checks as the
+interactive program (B02_RCC_Final.py), but without any input() prompts.
+Recipes are read and written one at a time so big files are never
+loaded into memory all at once.
+
+CSV files have one ingredient per row:
+    Recipe Name, Servings, Ingredient Name, Amount Used, Amount Bought, Price Paid
+(a blank Recipe Name carries on the recipe from the row above).
+
+JSON files hold a recipe or a list of recipes, JSON Lines (.jsonl)
+files hold one recipe per line:
+    {"Recipe Name": ..., "Servings": ..., "Ingredients": [{"Ingredient Name": ...,
+     "Amount Used": ..., "Amount Bought": ..., "Price Paid": ...}, ...]}
+"""
+import csv
+import json
+import sys
+from itertools import islice
+
+import numpy
+
+import rcc_metrics
+import rcc_money
+import rcc_packs
+import rcc_vector
+from rcc_report import ReportWriter
+from rcc_catalogue import PriceCatalogue
+from rcc_currency import currency_table
+from B02_RCC_Final import (parse_number, parse_price, parse_amount_and_unit, check_amount_bought,
+                           currency, valid_filename, make_report,
+                           make_table)
+
+# Number of recipes costed together by the columnar engine
+CHUNK_SIZE = 1000
+
+# Columns of the batch results
+RESULT_FIELDS = ["Recipe Name", "Servings", "Ingredients",
+                 "Total Cost to Make", "Cost Per Serve", "Error"]
+
+
+# Functions
+
+def read_csv_recipes(file):
+    """Yields the recipes from a csv file, one ingredient per row.
+    The rows of a recipe have to be next to each other."""
+
+    recipe = None
+
+    for row in csv.DictReader(file):
+        name = (row.get("Recipe Name") or "").strip()
+
+        # A new Recipe Name starts a new recipe.
+        if recipe is None or (name != "" and name != recipe["Recipe Name"]):
+            if recipe is not None:
+                yield recipe
+
+            recipe = {"Recipe Name": name, "Servings": row.get("Servings"),
+                      "Ingredients": []}
+
+        recipe["Ingredients"].append(row)
+
+    if recipe is not None:
+        yield recipe
+
+
+def read_json_recipes(file):
+    """Yields the recipes from a json file (one recipe or a list of recipes)"""
+
+    data = json.load(file)
+
+    if isinstance(data, dict):
+        data = [data]
+
+    yield from data
+
+
+def read_jsonl_recipes(file):
+    """Yields the recipes from a json lines file, one recipe per line"""
+
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_recipes(filename):
+    """Yields the recipes in a recipe file, chosen by the file extension"""
+
+    if filename.endswith(".csv"):
+        reader = read_csv_recipes
+    elif filename.endswith(".jsonl"):
+        reader = read_jsonl_recipes
+    elif filename.endswith(".json"):
+        reader = read_json_recipes
+    else:
+        raise ValueError(f"❌ {filename} is not a .csv, .json or .jsonl file.")
+
+    with open(filename, encoding="utf-8", newline="") as file:
+        yield from reader(file)
+
+
+def parse_ingredient(ingredient):
+    """Checks one ingredient row and returns its name, amounts, units, price and
+    the currency id of the price (converted into the reporting currency later,
+    a column at a time). Raises a ValueError if any of the details are not valid."""
+
+    if not isinstance(ingredient, dict):
+        raise ValueError("❌ Sorry, each ingredient has to be an object with an Ingredient Name, "
+                         "Amount Used, Amount Bought and Price Paid.")
+
+    name = str(ingredient.get("Ingredient Name") or "").strip()
+    if name == "":
+        raise ValueError("❌ Sorry, the Ingredient Name can't be blank.")
+
+    # No pack on the pack list (--packs) could be picked for it.
+    if ingredient.get(rcc_packs.PACK_ERROR):
+        raise ValueError(f"{name}: {ingredient[rcc_packs.PACK_ERROR]}")
+
+    try:
+        amount_used, unit_used = parse_amount_and_unit(str(ingredient.get("Amount Used", "")))
+        amount_bought, unit_bought = parse_amount_and_unit(str(ingredient.get("Amount Bought", "")))
+        price, currency_id = parse_price(str(ingredient.get("Price Paid", "")))
+        rcc_money.check_dollars(currency_table.to_report(price, currency_id))
+
+    # Adds the ingredient name to the error so it can be found in the file.
+    except ValueError as error:
+        raise ValueError(f"{name}: {error}") from None
+
+    return name, amount_used, unit_used, amount_bought, unit_bought, price, currency_id
+
+
+def check_ingredient(name, amount_used, unit_used, amount_bought, unit_bought):
+    """Checks the amounts of an ingredient and returns the converted amount bought.
+    Raises a ValueError (with the ingredient name) if they are not valid."""
+
+    try:
+        return check_amount_bought(amount_used, unit_used, amount_bought, unit_bought, name)
+    except ValueError as error:
+        raise ValueError(f"{name}: {error}") from None
+
+
+def parse_recipe(recipe):
+    """Checks the recipe details and returns the servings and parsed ingredients.
+    Raises a ValueError if any of the details are not valid."""
+
+    if not isinstance(recipe, dict):
+        raise ValueError("❌ Sorry, each recipe has to be an object with a Recipe Name, "
+                         "Servings and Ingredients.")
+
+    if str(recipe.get("Recipe Name") or "").strip() == "":
+        raise ValueError("❌ Sorry, the Recipe Name can't be blank.")
+
+    servings = parse_number(str(recipe.get("Servings", "")), "integer")
+
+    ingredients = recipe.get("Ingredients") or []
+    if not isinstance(ingredients, list):
+        raise ValueError("❌ Sorry, the Ingredients have to be a list of ingredients.")
+    if len(ingredients) == 0:
+        raise ValueError("❌ You must enter at least one ingredient!")
+
+    return servings, [parse_ingredient(ingredient) for ingredient in ingredients]
+
+
+def new_result(recipe):
+    """Makes an empty result row for a recipe"""
+
+    result = dict.fromkeys(RESULT_FIELDS, "")
+    if isinstance(recipe, dict):
+        result["Recipe Name"] = str(recipe.get("Recipe Name") or "").strip()
+    return result
+
+
+def recipe_ingredients(recipe):
+    """Returns the ingredients of a recipe for the passes that fill them in before
+    costing. Recipes and ingredients that aren't objects are skipped, the costing
+    reports them (parse_recipe())."""
+
+    ingredients = recipe.get("Ingredients") if isinstance(recipe, dict) else None
+    if not isinstance(ingredients, list):
+        return []
+
+    return [ingredient for ingredient in ingredients if isinstance(ingredient, dict)]
+
+
+def cost_recipe(recipe):
+    """Costs a recipe one ingredient at a time and returns its result row.
+    Errors are recorded in the row instead of stopping the batch."""
+
+    result = new_result(recipe)
+
+    try:
+        servings, rows = parse_recipe(recipe)
+        result["Servings"] = servings
+
+        # Money is added up in micro-cents, so the totals are exact.
+        total_cost = 0
+        for name, amount_used, unit_used, amount_bought, unit_bought, price, currency_id in rows:
+            converted_amt = check_ingredient(name, amount_used, unit_used, amount_bought, unit_bought)
+            price = currency_table.to_report(price, currency_id)
+            total_cost += rcc_money.cost_to_make(rcc_money.from_dollars(price),
+                                                 amount_used, converted_amt)
+
+    except ValueError as error:
+        result["Error"] = str(error)
+        return result
+
+    result["Ingredients"] = len(rows)
+    result["Total Cost to Make"] = rcc_money.to_dollars(total_cost)
+    result["Cost Per Serve"] = rcc_money.to_dollars(rcc_money.divide(total_cost, servings))
+    return result
+
+
+def write_recipe_report(report_writer, recipe_name, servings, rows, costs,
+                        total_cost, total_cost_per_serving):
+    """Writes the report file of a costed recipe, the same as the interactive program.
+    The costs and totals are in micro-cents."""
+
+    # Recipe Dictionary for the table.
+    with rcc_metrics.timer("table"):
+        recipe_dict = {
+            'Ingredient Name': [row[0] for row in rows],
+            'Amount Used': [f"{row[1]}{row[2] or ''}" for row in rows],
+            'Amount Bought': [f"{row[3]}{row[4] or ''}" for row in rows],
+            'Price Paid': [currency(currency_table.to_report(row[5], row[6])) for row in rows],
+            'Cost to Make': [rcc_money.currency(cost, currency_table.symbol) for cost in costs]
+        }
+
+    recipe_table_string = make_table(recipe_dict, 'psql')
+
+    to_write = make_report(recipe_name, servings, recipe_table_string,
+                           rcc_money.to_dollars(total_cost),
+                           rcc_money.to_dollars(total_cost_per_serving))
+    report_writer.write_report(valid_filename(recipe_name), to_write)
+
+
+def cost_columns(recipe_ids, amount_used, unit_used_ids, amount_bought, unit_bought_ids,
+                 prices, servings, densities=None):
+    """Costs columns of ingredients (prices in micro-cents) with the columnar engine.
+
+    recipe_ids gives the recipe (0 .. len(servings) - 1) of every row, in order.
+    densities (from rcc_vector.row_densities()) bridges mass and volume rows.
+    Returns the cost to make of every row, the total and cost per serve of
+    every recipe (micro-cents) and a mask of the recipes with a row that
+    failed the unit and amount checks."""
+
+    with rcc_metrics.timer("convert"):
+        converted_amt, valid = rcc_vector.check_rows(amount_used, unit_used_ids,
+                                                     amount_bought, unit_bought_ids, densities)
+
+        # Money is worked out in micro-cents, so the totals are exact.
+        costs = rcc_money.cost_to_make_array(prices, amount_used, converted_amt)
+        totals = rcc_money.group_totals(recipe_ids, costs, len(servings))
+        per_serve = rcc_money.divide_array(totals, servings)
+
+        # Recipes with any row that failed the checks.
+        failed = numpy.bincount(recipe_ids, weights=~valid, minlength=len(servings)) > 0
+
+    if rcc_metrics.enabled:
+        incompatible = numpy.isnan(rcc_vector.MULTIPLY_BY[unit_bought_ids, unit_used_ids])
+        if densities is not None:
+            incompatible &= numpy.isnan(densities)
+        rcc_metrics.count("incompatible_units", int(numpy.count_nonzero(incompatible)))
+
+    return costs, totals, per_serve, failed
+
+
+def parse_columns(recipes):
+    """Parses a chunk of recipes into columns, one row per ingredient.
+
+    Returns the result rows of all the recipes (with the parsing errors filled
+    in), (result, rows, first row) of the recipes that passed the parsing checks,
+    and the columns for cost_columns(): recipe ids, amount used, unit used ids,
+    amount bought, unit bought ids, prices (micro-cents), servings and densities."""
+
+    results = []
+    costed = []  # (result, rows, first row) of the recipes that passed the parsing checks
+    servings_list = []
+    recipe_ids = []
+    names = []
+    columns = ([], [], [], [], [], [])  # amount used, unit used, amount bought, unit bought, price, currency
+
+    with rcc_metrics.timer("parse"):
+        for recipe in recipes:
+            result = new_result(recipe)
+            results.append(result)
+
+            rcc_metrics.count("rows_parsed", len(recipe_ingredients(recipe)))
+
+            try:
+                servings, rows = parse_recipe(recipe)
+            except ValueError as error:
+                result["Error"] = str(error)
+                rcc_metrics.count("parse_failures")
+                continue
+
+            result["Servings"] = servings
+            costed.append((result, rows, len(recipe_ids)))
+            recipe_ids.extend([len(costed) - 1] * len(rows))
+            servings_list.append(servings)
+
+            for row in rows:
+                names.append(row[0])
+                for column, value in zip(columns, row[1:]):
+                    column.append(value)
+
+        amount_used, unit_used, amount_bought, unit_bought, price, currency_ids = columns
+        unit_used_ids = rcc_vector.encode_units(unit_used)
+        unit_bought_ids = rcc_vector.encode_units(unit_bought)
+        densities = rcc_vector.row_densities(unit_used_ids, unit_bought_ids,
+                                             lambda rows: [names[row] for row in rows])
+
+    return results, costed, (
+        numpy.array(recipe_ids, dtype=numpy.intp),
+        numpy.array(amount_used, dtype=float), unit_used_ids,
+        numpy.array(amount_bought, dtype=float), unit_bought_ids,
+        rcc_money.from_dollars_array(currency_table.to_report_array(price, currency_ids)),
+        numpy.array(servings_list, dtype=numpy.int64),
+        densities)
+
+
+def find_error(result, rows):
+    """Records the error of the first ingredient row that fails the unit and amount
+    checks, the same error message the scalar check gives"""
+
+    try:
+        for name, amount_used, unit_used, amount_bought, unit_bought, price, currency_id in rows:
+            check_ingredient(name, amount_used, unit_used, amount_bought, unit_bought)
+    except ValueError as error:
+        result["Error"] = str(error)
+
+
+def cost_recipes(recipes, report_writer=None, exporter=None):
+    """Costs a chunk of recipes with the columnar engine and returns their result rows.
+    Gives the same results as calling cost_recipe() on each one.
+    If a report writer is given, a report file is written for every costed recipe.
+    If an exporter is given, every recipe and its ingredient rows are added to it."""
+
+    results, costed, columns = parse_columns(recipes)
+
+    if len(costed) == 0:
+        export_recipes(exporter, results, {})
+        return results
+
+    costs, totals, per_serve, failed = cost_columns(*columns)
+
+    exported = {}  # id(result) -> (rows, costs) of the costed recipes
+
+    for recipe_id, (result, rows, first_row) in enumerate(costed):
+
+        # One of the ingredients failed the unit checks,
+        # the scalar check finds it and gives the same error message.
+        if failed[recipe_id]:
+            find_error(result, rows)
+            continue
+
+        result["Ingredients"] = len(rows)
+        result["Total Cost to Make"] = rcc_money.to_dollars(int(totals[recipe_id]))
+        result["Cost Per Serve"] = rcc_money.to_dollars(int(per_serve[recipe_id]))
+
+        if report_writer is not None or exporter is not None:
+            recipe_costs = costs[first_row:first_row + len(rows)].tolist()
+            exported[id(result)] = (rows, recipe_costs)
+
+        if report_writer is not None:
+            write_recipe_report(report_writer, result["Recipe Name"], result["Servings"], rows,
+                                recipe_costs, int(totals[recipe_id]), int(per_serve[recipe_id]))
+
+    export_recipes(exporter, results, exported)
+    return results
+
+
+def export_recipes(exporter, results, exported):
+    """Adds the recipes of a chunk to the exporter (if any), in order.
+    exported holds the (rows, costs) of the costed recipes by id(result)."""
+
+    if exporter is None:
+        return
+
+    for result in results:
+        exporter.add(result, *exported.get(id(result), ()))
+
+
+def write_csv_results(results, file, fields=RESULT_FIELDS):
+    """Writes the result rows to a csv file as they come in"""
+
+    writer = csv.DictWriter(file, fieldnames=fields)
+    writer.writeheader()
+
+    for result in results:
+        writer.writerow(result)
+
+
+def write_jsonl_results(results, file):
+    """Writes the result rows to a json lines file as they come in"""
+
+    for result in results:
+        file.write(json.dumps(result, ensure_ascii=False))
+        file.write("\n")
+
+
+def fill_from_catalogue(recipes, catalogue):
+    """Fills in the ingredients with no Amount Bought and Price Paid from the
+    price catalogue, and saves the ones that have both to the catalogue"""
+
+    for recipe in recipes:
+        for ingredient in recipe_ingredients(recipe):
+            name = str(ingredient.get("Ingredient Name") or "")
+            bought = str(ingredient.get("Amount Bought") or "").strip()
+            price = str(ingredient.get("Price Paid") or "").strip()
+
+            if bought == "" and price == "":
+                entry = catalogue.lookup(name)
+
+                if entry is not None:
+                    fill_ingredient(ingredient, entry)
+
+            elif bought != "" and price != "" and name.strip() != "":
+
+                # Rows that don't parse are left for the costing to report.
+                try:
+                    pack_size, pack_unit = parse_amount_and_unit(bought)
+                    catalogue.save(name, pack_size, pack_unit, parse_number(price))
+                except ValueError:
+                    pass
+
+        yield recipe
+
+
+def fill_ingredient(ingredient, entry):
+    """Fills in the Amount Bought and Price Paid of an ingredient from a catalogue entry"""
+
+    pack_size, pack_unit, pack_price = entry
+    ingredient["Amount Bought"] = f"{pack_size}{pack_unit or ''}"
+    ingredient["Price Paid"] = pack_price
+
+
+def read_chunks(filenames, catalogue=None, size=CHUNK_SIZE, packs=None):
+    """Yields the recipes in the recipe files in chunks of size recipes,
+    so the files are still streamed.
+    If a pack list is given, the cheapest packs are picked for each chunk."""
+
+    for filename in filenames:
+        recipes = read_recipes(filename)
+
+        if catalogue is not None:
+            recipes = fill_from_catalogue(recipes, catalogue)
+
+        while True:
+            chunk = list(islice(recipes, size))
+            if len(chunk) == 0:
+                break
+
+            if packs is not None:
+                rcc_packs.fill_from_packs(
+                    [ingredient for recipe in chunk for ingredient in recipe_ingredients(recipe)],
+                    packs)
+
+            yield chunk
+
+
+def cost_files(filenames, report_writer=None, catalogue=None, exporter=None, packs=None):
+    """Yields the result row for every recipe in the recipe files (or recipe stores)"""
+
+    # Imported here since rcc_store imports this module.
+    import rcc_store
+
+    for filename in filenames:
+        if rcc_store.is_store(filename):
+            yield from rcc_store.RecipeStore(filename).cost(report_writer, exporter)
+            continue
+
+        for chunk in read_chunks([filename], catalogue, packs=packs):
+            yield from cost_recipes(chunk, report_writer, exporter)
+
+
+def run_batch(filenames, output=None, output_format="csv", reports=None, durability="batch",
+              jobs=1, ordered=True, catalogue=None, stream=False, rows_output=None,
+              export=None, shards=0, packs=None, fuzzy=False, as_of=None):
+    """Costs every recipe in the recipe files and writes the results
+    to the output file (or the screen).
+    If a reports folder is given, a report file is written there for every recipe
+    (spread over that many sub-folders if shards is given).
+    With more than one job the chunks of recipes are costed by a pool of processes.
+    If a price catalogue file is given, it fills in missing Amounts Bought and Prices Paid
+    (with fuzzy, misspelt ingredient names are matched to the closest catalogue names,
+    and with as_of, a day number, the prices are the ones it had on that day).
+    With stream, csv feeds are costed a row at a time by the streaming pipeline
+    (and every costed ingredient row can be written to rows_output).
+    If an export file is given, every recipe and ingredient row is written to it
+    as CSV, JSON Lines or Parquet (chosen by the file extension).
+    If a pack list file is given, the cheapest packs are picked for the
+    ingredients with no Amount Bought and Price Paid."""
+
+    writer = write_jsonl_results if output_format == "jsonl" else write_csv_results
+    report_writer = None
+    price_catalogue = None if catalogue is None else PriceCatalogue(catalogue, fuzzy, as_of)
+    exporter = None
+    pack_list = None if packs is None else rcc_packs.PackList(packs)
+
+    if export is not None:
+        import rcc_export
+        exporter = rcc_export.Exporter(export)
+
+    if stream:
+        import rcc_pipeline
+        results = rcc_pipeline.cost_feeds(filenames, rows_output)
+    elif jobs > 1:
+        import rcc_parallel
+        results = rcc_parallel.cost_files_parallel(filenames, jobs, reports, durability,
+                                                   ordered, price_catalogue, exporter, shards,
+                                                   pack_list)
+    else:
+        report_writer = None if reports is None else ReportWriter(reports, durability, shards)
+        results = cost_files(filenames, report_writer, price_catalogue, exporter, pack_list)
+
+    try:
+        if output is None:
+            writer(results, sys.stdout)
+            return
+
+        with open(output, "w", encoding="utf-8", newline="") as file:
+            writer(results, file)
+
+    finally:
+        if report_writer is not None:
+            report_writer.close()
+        if price_catalogue is not None:
+            price_catalogue.close()
+        if exporter is not None:
+            exporter.close()
@@ -0,0 +1,216 @@
+"""Ingredient price catalogue for the Recipe Cost Calculator.
+
+Remembers the pack size, pack unit (a units_dict key) and price of every
+ingredient that has been costed, in a local SQLite file, so they don't
+have to be typed in again. Ingredients are looked up by their normalized
+name ("  Plain  Flour" and "plain flour" are the same ingredient).
+
+The whole catalogue is read into memory when it is opened. Lookups only
+use the in-memory copy, and saves are written through to both.
+
+With fuzzy matching on, a name that isn't in the catalogue is matched to
+the closest name that is (by a trigram index, rcc_fuzzy), so "plain flor"
+and "buter" find "plain flour" and "butter" and are saved under them
+instead of becoming new entries. Names that are less close are only
+offered as suggestions ("did you mean flour?").
+
+Every price saved is also added to the ingredient's price history
+(rcc_history), dated the day it was saved. A catalogue opened as of a
+day looks prices up as they were on that day, and is only read.
+
+Prices are kept in NZD (REPORT_CURRENCY, the program's own currency)
+whatever --currency they were saved with, and are converted into the
+reporting currency when they are looked up, so a catalogue can be
+reopened with another --currency.
+"""
+import sqlite3
+from datetime import date
+
+from rcc_currency import REPORT_CURRENCY, currency_table
+from rcc_history import PriceHistory
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingredients (
+    name TEXT PRIMARY KEY,
+    pack_size REAL NOT NULL,
+    pack_unit TEXT,
+    price REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+# Least similarity for a name to be matched to a catalogue name
+MATCH_CUTOFF = 0.75
+
+# Least similarity for a catalogue name to be suggested
+SUGGEST_CUTOFF = 0.5
+
+
+def normalize_name(name):
+    """Makes the catalogue key of an ingredient name (lower case, single spaces)"""
+    return " ".join(name.lower().split())
+
+
+def to_report(entry):
+    """A catalogue entry with its price converted from NZD into the reporting currency"""
+
+    if entry is None:
+        return None
+
+    pack_size, pack_unit, price = entry
+    return pack_size, pack_unit, currency_table.to_report(price, currency_table.ids[REPORT_CURRENCY])
+
+
+def from_report(price):
+    """Converts a price in the reporting currency into NZD, to be kept in the catalogue"""
+    return currency_table.from_report(price, currency_table.ids[REPORT_CURRENCY])
+
+
+class PriceCatalogue:
+    """SQLite backed ingredient catalogue with an in-memory cache"""
+
+    def __init__(self, path, fuzzy=False, as_of=None):
+        self.path = path
+        self.fuzzy = fuzzy
+        self.as_of = as_of  # day number the prices are looked up on, None for the latest
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(SCHEMA)
+
+        # name -> (pack size, pack unit, price)
+        self.cache = {}
+        for name, pack_size, pack_unit, price in self.connection.execute(
+                "SELECT name, pack_size, pack_unit, price FROM ingredients"):
+            self.cache[name] = (self.read_size(pack_size, pack_unit), pack_unit, price)
+
+        # Trigram index of the names, made the first time it is needed.
+        self.name_index = None
+
+        # Catalogues from before the price history start it with the prices they have
+        # (not when opened as of a day, those are only read).
+        self.history = PriceHistory(self.connection)
+        if self.as_of is None and self.cache and self.history.is_empty():
+            today = date.today().toordinal()
+            for name, entry in self.cache.items():
+                self.history.record(name, today, *entry)
+            self.commit()
+
+    @staticmethod
+    def read_size(pack_size, pack_unit):
+        """Amounts with no unit are whole numbers (like 12 eggs)"""
+        return int(pack_size) if pack_unit is None else pack_size
+
+    def suggest(self, name, limit=3, cutoff=SUGGEST_CUTOFF):
+        """Returns up to limit catalogue names close to a name, closest first"""
+
+        if self.name_index is None:
+            from rcc_fuzzy import NameIndex
+            self.name_index = NameIndex(self.cache)
+
+        return [match for match, similarity in self.name_index.suggest(normalize_name(name), limit, cutoff)]
+
+    def canonical(self, name):
+        """The catalogue name of an ingredient: its normalized name, or with
+        fuzzy matching on, the closest catalogue name if there is one"""
+
+        key = normalize_name(name)
+        if key in self.cache or not self.fuzzy:
+            return key
+
+        matches = self.suggest(key, 1, MATCH_CUTOFF)
+        return matches[0] if matches else key
+
+    def lookup(self, name):
+        """Returns (pack size, pack unit, price) of an ingredient (as of the
+        catalogue's day if it has one), or None"""
+
+        if self.as_of is not None:
+            return self.price_on(self.canonical(name), self.as_of)
+
+        return to_report(self.cache.get(self.canonical(name)))
+
+    def price_on(self, key, day):
+        """Returns (pack size, pack unit, price) of a catalogue name on a day, or None"""
+        return to_report(self.history.as_of(key, day))
+
+    def match(self, name):
+        """Returns (catalogue name, entry) for an ingredient, with fuzzy matching on
+        also the closest suggestion, for asking "did you mean". (None, None) if there isn't one."""
+
+        key = self.canonical(name)
+        if key not in self.cache and self.fuzzy:
+            key = next(iter(self.suggest(key, 1)), key)
+
+        entry = self.cache.get(key)
+        return (None, None) if entry is None else (key, to_report(entry))
+
+    def save(self, name, pack_size, pack_unit, price, exact=False):
+        """Saves the pack size, pack unit and price (in the reporting currency) of an
+        ingredient (under its catalogue name, or as typed if exact) and adds it to
+        its price history. Call commit() to make the saves permanent."""
+
+        # The prices of a catalogue opened as of a day are only looked at.
+        if self.as_of is not None:
+            return
+
+        key = normalize_name(name) if exact else self.canonical(name)
+        entry = (pack_size, pack_unit, from_report(price))
+
+        # Nothing to write if the catalogue already has this price.
+        if self.cache.get(key) == entry:
+            return
+
+        self.set_entry(key, entry)
+        self.history.record(key, date.today().toordinal(), *entry)
+
+    def set_entry(self, key, entry):
+        """Makes an entry the latest price of a catalogue name"""
+
+        if self.name_index is not None and key not in self.cache:
+            self.name_index.add(key)
+
+        self.cache[key] = entry
+        self.connection.execute(
+            "INSERT OR REPLACE INTO ingredients (name, pack_size, pack_unit, price) "
+            "VALUES (?, ?, ?, ?)", (key, *entry))
+
+    def import_history(self, rows):
+        """Adds dated prices, (name, day, pack size, pack unit, price in the reporting
+        currency) rows, to the price history. The latest price up to today becomes
+        the catalogue price of each ingredient. Returns the number of ingredients."""
+
+        keys = {}  # name as written -> catalogue name
+        today = date.today().toordinal()
+
+        for name, day, pack_size, pack_unit, price in rows:
+            key = keys.get(name)
+            if key is None:
+                key = keys[name] = self.canonical(name)
+
+            self.history.record(key, day, pack_size, pack_unit, from_report(price))
+
+        for key in set(keys.values()):
+            entry = self.history.as_of(key, today)
+            if entry is not None and self.cache.get(key) != entry:
+                self.set_entry(key, entry)
+
+        return len(set(keys.values()))
+
+    def commit(self):
+        """Makes the saves so far permanent"""
+
+        self.history.write()
+        self.connection.commit()
+
+    def close(self):
+        """Commits and closes the catalogue file"""
+
+        self.commit()
+        self.connection.close()
+
+    def __len__(self):
+        return len(self.cache)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
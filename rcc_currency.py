@@ -0,0 +1,167 @@
+"""Exchange rates for the Recipe Cost Calculator.
+
+A Price Paid can be written with a currency code or symbol:
+    3.50, $3.50, NZD 3.50, 3.50 USD, US$3.50, A$4, AU$4, NZ$4
+and is converted into the reporting currency (NZD unless --currency
+says otherwise). "$" and a plain number are the reporting currency.
+
+The rates come from a local JSON file, read once and held in memory:
+    {"base": "NZD", "rates": {"AUD": 1.09, "USD": 1.68}}
+(what one of each currency is worth in the base currency). Every
+currency gets an integer id like the units do, so a whole column of
+prices is converted by indexing the array of rates with the column of
+currency ids. Price strings are parsed into the number and the currency
+id with a bounded LRU cache, so repeated strings skip the parsing.
+"""
+import json
+import math
+from functools import lru_cache
+
+# Currency the costs are worked out in, unless another one is chosen
+REPORT_CURRENCY = "NZD"
+
+# Symbols written in front of a price (longest first) and their currency,
+# None is the reporting currency.
+SYMBOLS = {"nz$": "NZD", "au$": "AUD", "us$": "USD", "a$": "AUD", "€": "EUR", "£": "GBP", "$": None}
+
+# How money in each reporting currency is shown (others get their code)
+DISPLAY_SYMBOLS = {"NZD": "$", "AUD": "A$", "USD": "US$", "EUR": "€", "GBP": "£"}
+
+# Number of different price strings remembered by the parse cache
+PARSE_CACHE_SIZE = 8192
+
+
+class CurrencyTable:
+    """Currency codes interned to ids, with their rates into the reporting currency"""
+
+    def __init__(self, report=REPORT_CURRENCY, values=None):
+
+        # Code -> what one of it is worth in the base currency.
+        self.values = {report: 1.0}
+        self.values.update(values or {})
+        self.report = report
+
+        self.parse_cached = lru_cache(maxsize=PARSE_CACHE_SIZE)(self.parse_uncached)
+        self.build_tables()
+
+    def build_tables(self):
+        """Works out the currency ids and the rates into the reporting currency"""
+
+        self.codes = list(self.values)
+        self.ids = {code: currency_id for currency_id, code in enumerate(self.codes)}
+        self.rates = [self.values[code] / self.values[self.report] for code in self.codes]
+        self.rate_array = None  # NumPy copy of the rates, made when a column is converted
+        self.symbol = DISPLAY_SYMBOLS.get(self.report, f"{self.report} ")
+
+        self.parse_cached.cache_clear()
+
+    def set_report(self, code):
+        """Chooses the reporting currency (a code that has a rate)"""
+
+        code = str(code).upper()
+        if code not in self.values:
+            raise ValueError(f"❌ There is no exchange rate for {code}.")
+
+        self.report = code
+        self.build_tables()
+
+    def load(self, filename):
+        """Adds the rates in a rates file:
+            {"base": "NZD", "rates": {"AUD": 1.09, "USD": 1.68, ...}}"""
+
+        with open(filename, encoding="utf-8") as file:
+            data = json.load(file)
+
+        base = str(data.get("base") or REPORT_CURRENCY).upper()
+        values = {base: 1.0}
+
+        for code, rate in (data.get("rates") or {}).items():
+            code = str(code).upper()
+            if len(code) != 3 or not code.isalpha():
+                raise ValueError(f"❌ {code} is not a currency code (3 letters, e.g. USD).")
+            if not isinstance(rate, (int, float)) or not rate > 0:
+                raise ValueError(f"❌ The rate of {code} has to be a number more than 0.")
+            values[code] = float(rate)
+
+        # The rates already held are moved onto the file's base currency.
+        if base in self.values:
+            scale = 1 / self.values[base]
+            values = {**{code: value * scale for code, value in self.values.items()}, **values}
+        elif self.report not in values:
+            raise ValueError(f"❌ {filename} has no rate for {self.report}.")
+
+        self.values = values
+        self.build_tables()
+
+    def parse_uncached(self, response):
+        """Parses a stripped price into (number, currency id, error message)"""
+
+        number, code = self.split(response)
+
+        if code not in self.ids:
+            return None, None, f"❌ There is no exchange rate for {code} (add it to the rates file)."
+
+        # The same checks as parse_number()
+        try:
+            number = float(number)
+        except ValueError:
+            return None, None, "❌ Please enter a number more than 0."
+        if not 0 < number < math.inf:
+            return None, None, "❌ Please enter a number more than 0."
+
+        return number, self.ids[code], None
+
+    def split(self, response):
+        """Splits a price into the number (still text) and its currency code"""
+
+        # Most prices are just a number.
+        if response[:1].isdigit() and not response[-1:].isalpha():
+            return response, self.report
+
+        # Symbol in front (US$3.50, $3.50)
+        lower = response.lower()
+        for symbol, code in SYMBOLS.items():
+            if lower.startswith(symbol):
+                return response[len(symbol):].strip(), code or self.report
+
+        # Code in front or after (USD 3.50, 3.50 USD), nan and inf are left as they are
+        if len(response) > 3 and response[:3].isalpha() and not response[3].isalpha():
+            return response[3:].strip().lstrip("$"), response[:3].upper()
+        if len(response) > 3 and response[-3:].isalpha() and not response[-4].isalpha():
+            return response[:-3].strip(), response[-3:].upper()
+
+        return response, self.report
+
+    def parse_price(self, response):
+        """Splits a price into the number and the currency id, e.g. US$3.50.
+        Raises a ValueError with the error message if it is not valid."""
+
+        number, currency_id, error = self.parse_cached(response.strip())
+
+        if error is not None:
+            raise ValueError(error)
+
+        return number, currency_id
+
+    def to_report(self, price, currency_id):
+        """Converts a price into the reporting currency"""
+        return price * self.rates[currency_id]
+
+    def from_report(self, price, currency_id):
+        """Converts a price in the reporting currency into another currency"""
+        return price / self.rates[currency_id]
+
+    def to_report_array(self, prices, currency_ids):
+        """Converts a column of prices into the reporting currency in one go"""
+
+        import numpy
+
+        if self.rate_array is None:
+            self.rate_array = numpy.array(self.rates, dtype=float)
+
+        return numpy.asarray(prices, dtype=float) * self.rate_array[numpy.asarray(currency_ids, dtype=numpy.intp)]
+
+
+# Currencies that prices can be paid in and their rates into the reporting
+# currency (only NZD until a rates file is loaded with --rates).
+currency_table = CurrencyTable()
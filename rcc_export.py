@@ -0,0 +1,163 @@
+"""Bulk export of costed recipes for the Recipe Cost Calculator.
+
+Writes one row for every ingredient of every costed recipe (and one row
+for every recipe that failed, with its error) to a single CSV, JSON
+Lines or Parquet file for the whole batch run. Amounts and money are
+written as plain numbers (money in the reporting currency) and units as
+their own columns, so the file can be loaded straight into a spreadsheet
+or an analytics tool. The Cost to Make of each ingredient is not rounded
+to the cent (to the micro-cent it was worked out in), so the rows of a
+recipe add up to its Total Cost to Make; only the totals are rounded,
+like the reports.
+
+Rows are kept in a buffer and written EXPORT_CHUNK rows at a time
+(one Parquet row group per chunk). Parquet needs the optional pyarrow
+package, which is only imported when a .parquet file is written.
+"""
+import csv
+import json
+
+import rcc_metrics
+import rcc_money
+from rcc_currency import currency_table
+
+EXPORT_FORMATS = (".csv", ".jsonl", ".parquet")
+
+# Rows written at a time
+EXPORT_CHUNK = 65_536
+
+# Size of the file buffers (bytes)
+BUFFER_SIZE = 1 << 20
+
+# Columns of the export, a row per ingredient
+EXPORT_FIELDS = ["Recipe Name", "Servings", "Ingredient Name", "Amount Used", "Unit Used",
+                 "Amount Bought", "Unit Bought", "Price Paid", "Cost to Make",
+                 "Total Cost to Make", "Cost Per Serve", "Error"]
+
+# Parquet column types
+PARQUET_TYPES = {"Recipe Name": "string", "Servings": "int64", "Ingredient Name": "string",
+                 "Amount Used": "float64", "Unit Used": "string", "Amount Bought": "float64",
+                 "Unit Bought": "string", "Price Paid": "float64", "Cost to Make": "float64",
+                 "Total Cost to Make": "float64", "Cost Per Serve": "float64", "Error": "string"}
+
+
+class Exporter:
+    """Writes the costed recipes of a batch run to one export file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.format = export_format(path)
+        self.buffer = []  # rows (lists in the order of EXPORT_FIELDS) not written yet
+        self.rows_written = 0
+        self.parquet_writer = None
+
+        if self.format == ".parquet":
+            self.pyarrow, self.parquet = import_pyarrow()
+            self.schema = self.pyarrow.schema([(name, getattr(self.pyarrow, kind)())
+                                               for name, kind in PARQUET_TYPES.items()])
+            self.file = None
+            self.parquet_writer = self.parquet.ParquetWriter(path, self.schema)
+        else:
+            self.file = open(path, "w", encoding="utf-8", newline="", buffering=BUFFER_SIZE)
+
+        if self.format == ".csv":
+            self.csv_writer = csv.writer(self.file)
+            self.csv_writer.writerow(EXPORT_FIELDS)
+
+    def add(self, result, rows=(), costs=()):
+        """Adds a recipe: its batch result row, its parsed ingredient rows
+        (name, amount used, unit used, amount bought, unit bought, price, currency id)
+        and their costs to make in micro-cents. Failed recipes have no rows."""
+
+        recipe = [result["Recipe Name"], blank_to_none(result["Servings"])]
+        totals = [blank_to_none(result["Total Cost to Make"]), blank_to_none(result["Cost Per Serve"]),
+                  result["Error"] or None]
+
+        if not rows or result["Error"]:
+            self.buffer.append(recipe + [None] * 7 + totals)
+        else:
+            for (name, amount_used, unit_used, amount_bought, unit_bought, price, currency_id), cost \
+                    in zip(rows, costs):
+                self.buffer.append(recipe + [name, amount_used, unit_used, amount_bought, unit_bought,
+                                             currency_table.to_report(price, currency_id),
+                                             cost / rcc_money.MICROCENTS]
+                                   + totals)
+
+        if len(self.buffer) >= EXPORT_CHUNK:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered rows in one go"""
+
+        if not self.buffer:
+            return
+
+        with rcc_metrics.timer("write"):
+            if self.format == ".csv":
+                self.csv_writer.writerows(self.buffer)
+            elif self.format == ".jsonl":
+                self.file.write("".join(json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False)
+                                        + "\n" for row in self.buffer))
+            else:
+                columns = {name: [row[number] for row in self.buffer]
+                           for number, name in enumerate(EXPORT_FIELDS)}
+                self.parquet_writer.write_table(self.pyarrow.Table.from_pydict(columns, self.schema))
+
+        rcc_metrics.count("export_rows", len(self.buffer))
+        self.rows_written += len(self.buffer)
+        self.buffer = []
+
+    def close(self):
+        """Writes the last rows and closes the file"""
+
+        self.flush()
+
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+            self.parquet_writer = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ExportRecords(list):
+    """Collects the recipes to export in a worker process, to be
+    handed back and added to the Exporter by the main process"""
+
+    def add(self, result, rows=(), costs=()):
+        self.append((result, rows, costs))
+
+
+# Functions
+
+def export_format(path):
+    """Works out the export format from the file extension"""
+
+    for extension in EXPORT_FORMATS:
+        if path.endswith(extension):
+            return extension
+
+    raise ValueError(f"❌ {path} is not a .csv, .jsonl or .parquet file.")
+
+
+def import_pyarrow():
+    """Imports pyarrow (and its parquet module) for Parquet exports"""
+
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("❌ Parquet exports need the pyarrow package (pip install pyarrow).") from None
+
+    return pyarrow, pyarrow.parquet
+
+
+def blank_to_none(value):
+    """Turns the blank fields of a result row into None (an empty cell / null)"""
+    return None if value == "" else value
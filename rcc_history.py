@@ -0,0 +1,178 @@
+"""Price history for the Recipe Cost Calculator.
+
+The price catalogue only remembers the latest price of each ingredient.
+The price history keeps every price it has had, with the day it was
+saved (or the Date in an imported price list), so recipes can be costed
+as they were on any day (--as-of) and followed over a date range
+(--trend).
+
+The history of an ingredient is one row of the catalogue's SQLite file:
+its days (date.toordinal() numbers), pack sizes, pack unit ids and
+prices as typed arrays sorted by day. The price on a day is a binary
+search (bisect) of the days and a date range is two of them, so a query
+takes microseconds however many years of prices there are. Histories
+are only read in the first time they are asked for, so 5 years of daily
+prices for 10k ingredients aren't all loaded to cost a recipe with ten
+of them.
+
+Dated prices are added from a csv file by rcc_import (--import-history).
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS price_history (
+    name TEXT PRIMARY KEY,
+    days BLOB NOT NULL,
+    pack_sizes BLOB NOT NULL,
+    unit_ids BLOB NOT NULL,
+    units TEXT NOT NULL,
+    prices BLOB NOT NULL
+)
+"""
+
+
+class PriceSeries:
+    """The prices of one ingredient, one typed array per column, sorted by day"""
+
+    __slots__ = ("days", "pack_sizes", "unit_ids", "units", "prices")
+
+    def __init__(self, days=b"", pack_sizes=b"", unit_ids=b"", units="", prices=b""):
+        self.days = array("i", days)
+        self.pack_sizes = array("d", pack_sizes)
+        self.unit_ids = array("H", unit_ids)  # index of each pack unit in units
+        self.units = [unit or None for unit in units.split("\n")] if days else []
+        self.prices = array("d", prices)
+
+    def __len__(self):
+        return len(self.days)
+
+    def add(self, day, pack_size, pack_unit, price):
+        """Adds the price on a day (replacing the one already saved on that day)"""
+
+        # The pack units of an ingredient hardly ever change, so each one is kept once.
+        if pack_unit not in self.units:
+            self.units.append(pack_unit)
+        unit_id = self.units.index(pack_unit)
+
+        index = bisect_left(self.days, day)
+
+        if index < len(self.days) and self.days[index] == day:
+            self.pack_sizes[index] = pack_size
+            self.unit_ids[index] = unit_id
+            self.prices[index] = price
+            return
+
+        self.days.insert(index, day)
+        self.pack_sizes.insert(index, pack_size)
+        self.unit_ids.insert(index, unit_id)
+        self.prices.insert(index, price)
+
+    def find(self, day):
+        """Index of the price in force on a day (the last one on or before it), -1 if there wasn't one yet"""
+        return bisect_right(self.days, day) - 1
+
+    def span(self, start, end):
+        """Indexes (first, stop) of the prices in force from start to end,
+        the first one is the price in force on start"""
+        return max(self.find(start), 0), bisect_right(self.days, end)
+
+    def entry(self, index):
+        """(pack size, pack unit, price) of the price at an index"""
+
+        pack_size, pack_unit = self.pack_sizes[index], self.units[self.unit_ids[index]]
+
+        # Amounts with no unit are whole numbers (like 12 eggs)
+        return int(pack_size) if pack_unit is None else pack_size, pack_unit, self.prices[index]
+
+    def to_row(self):
+        """The columns as they are saved in the catalogue file"""
+        return (self.days.tobytes(), self.pack_sizes.tobytes(), self.unit_ids.tobytes(),
+                "\n".join(unit or "" for unit in self.units), self.prices.tobytes())
+
+
+class PriceHistory:
+    """The price history of every ingredient in a catalogue file, read in by ingredient"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.connection.execute(SCHEMA)
+
+        self.series = {}       # name -> PriceSeries, None if the ingredient has no history
+        self.changed = set()   # names with prices that haven't been written yet
+
+    def is_empty(self):
+        """True if no prices have been written to the history"""
+        return self.connection.execute("SELECT 1 FROM price_history LIMIT 1").fetchone() is None
+
+    def load(self, name):
+        """The price series of an ingredient (a catalogue name), None if it has no prices"""
+
+        if name not in self.series:
+            row = self.connection.execute(
+                "SELECT days, pack_sizes, unit_ids, units, prices FROM price_history WHERE name = ?",
+                (name,)).fetchone()
+            self.series[name] = None if row is None else PriceSeries(*row)
+
+        return self.series[name]
+
+    def record(self, name, day, pack_size, pack_unit, price):
+        """Adds the price of an ingredient on a day. Call write() to save it to the file."""
+
+        series = self.load(name)
+        if series is None:
+            series = self.series[name] = PriceSeries()
+
+        series.add(day, pack_size, pack_unit, price)
+        self.changed.add(name)
+
+    def write(self):
+        """Writes the histories that have changed to the catalogue file (it still needs a commit)"""
+
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO price_history (name, days, pack_sizes, unit_ids, units, prices) "
+            "VALUES (?, ?, ?, ?, ?, ?)", ((name, *self.series[name].to_row()) for name in self.changed))
+        self.changed.clear()
+
+    def as_of(self, name, day):
+        """Returns (pack size, pack unit, price) of an ingredient on a day, or None"""
+
+        series = self.load(name)
+        index = -1 if series is None else series.find(day)
+        return None if index < 0 else series.entry(index)
+
+    def between(self, name, start, end):
+        """The prices of an ingredient in force from start to end, as (day, pack size,
+        pack unit, price). The first one is in force on start (it can be from before it)."""
+
+        series = self.load(name)
+        if series is None:
+            return []
+
+        first, stop = series.span(start, end)
+        return [(series.days[index], *series.entry(index)) for index in range(first, stop)]
+
+    def change_days(self, names, start, end):
+        """The days from start to end that the price of any of the ingredients
+        changed on, sorted and starting with start"""
+
+        days = {start}
+
+        for name in names:
+            series = self.load(name)
+            if series is not None:
+                days.update(series.days[bisect_right(series.days, start):bisect_right(series.days, end)])
+
+        return sorted(days)
+
+
+# Functions
+
+def parse_date(text):
+    """Turns a YYYY-MM-DD date into its day number. Raises a ValueError if it isn't a date."""
+
+    try:
+        return date.fromisoformat(text.strip()).toordinal()
+    except ValueError:
+        raise ValueError(f"❌ {text} is not a date (YYYY-MM-DD).") from None
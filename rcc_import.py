@@ -0,0 +1,53 @@
+"""Price history import for the Recipe Cost Calculator (--import-history).
+
+Adds dated prices from a csv file to the price history (rcc_history) of a
+price catalogue file. The file has the columns of a pack list and a Date
+(YYYY-MM-DD):
+    Date, Ingredient Name, Amount Bought, Price Paid
+
+    python B02_RCC_Final.py --catalogue prices.db --import-history prices.csv
+"""
+import csv
+
+from rcc_catalogue import PriceCatalogue
+from rcc_history import parse_date
+from B02_RCC_Final import parse_amount_and_unit, parse_number
+
+
+# Functions
+
+def read_history(filename):
+    """Reads a csv file of dated prices into (name, day, pack size, pack unit, price) rows.
+    Raises a ValueError with the line number if a row is not valid."""
+
+    rows = []
+
+    with open(filename, encoding="utf-8", newline="") as file:
+        for line_number, row in enumerate(csv.DictReader(file), start=2):
+            name = str(row.get("Ingredient Name") or "").strip()
+            if name == "":
+                raise ValueError(f"❌ {filename} line {line_number}: "
+                                 f"the Ingredient Name can't be blank.")
+            try:
+                day = parse_date(str(row.get("Date") or ""))
+                pack_size, pack_unit = parse_amount_and_unit(str(row.get("Amount Bought") or ""))
+                price = parse_number(str(row.get("Price Paid") or ""))
+            except ValueError as error:
+                # The error's own ❌ isn't repeated.
+                raise ValueError(f"❌ {filename} line {line_number}: {name}: "
+                                 f"{str(error).removeprefix('❌ ')}") from None
+
+            rows.append((name, day, pack_size, pack_unit, price))
+
+    return rows
+
+
+def run_import_history(filename, catalogue, fuzzy=False):
+    """Adds the dated prices in a csv file to the price history of a catalogue file"""
+
+    rows = read_history(filename)
+
+    with PriceCatalogue(catalogue, fuzzy) as price_catalogue:
+        ingredients = price_catalogue.import_history(rows)
+
+    print(f"Added {len(rows)} prices of {ingredients} ingredients to the price history in {catalogue}")
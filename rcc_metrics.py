@@ -0,0 +1,146 @@
+"""Stage timings and counters for the Recipe Cost Calculator.
+
+Turned off by default. When it is off, timer() hands back a shared
+do-nothing timer and count() returns straight away, so the instrumented
+code costs next to nothing. When it is on (--metrics FILE), the time
+spent in each stage and the counters are added up with monotonic
+nanosecond timers and saved to FILE when the program exits, as JSON or
+(for a .prom file) as Prometheus text.
+
+Stages:   parse, convert, packs, table, render, write
+Counters: rows_parsed, parse_failures, incompatible_units,
+          files_written, bytes_written, export_rows, curve_points,
+          packs_picked, trend_points
+"""
+import atexit
+import json
+from time import perf_counter_ns
+
+enabled = False
+
+# stage -> [calls, nanoseconds]
+stage_times = {}
+
+# counter -> value
+counters = {}
+
+
+class Timer:
+    """Adds the time spent in a with block to a stage"""
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.start = 0
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        add_time(self.stage, perf_counter_ns() - self.start)
+
+
+class NoTimer:
+    """Timer used when the metrics are turned off"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return None
+
+
+NO_TIMER = NoTimer()
+
+
+# Functions
+
+def enable(path=None):
+    """Turns the metrics on, and saves them to path when the program exits"""
+
+    global enabled
+    enabled = True
+
+    if path is not None:
+        atexit.register(save, path)
+
+
+def timer(stage):
+    """Returns a timer for a with block around a stage"""
+    return Timer(stage) if enabled else NO_TIMER
+
+
+def add_time(stage, nanoseconds, calls=1):
+    """Adds time to a stage"""
+
+    totals = stage_times.setdefault(stage, [0, 0])
+    totals[0] += calls
+    totals[1] += nanoseconds
+
+
+def count(counter, amount=1):
+    """Adds to a counter"""
+
+    if enabled:
+        counters[counter] = counters.get(counter, 0) + amount
+
+
+def snapshot():
+    """Returns the timings and counters so far"""
+
+    return {
+        "stages": {stage: {"calls": calls, "seconds": nanoseconds / 1e9}
+                   for stage, (calls, nanoseconds) in stage_times.items()},
+        "counters": dict(counters),
+    }
+
+
+def merge(other):
+    """Adds a snapshot (e.g. from a worker process) to the metrics"""
+
+    for stage, totals in other["stages"].items():
+        add_time(stage, round(totals["seconds"] * 1e9), totals["calls"])
+
+    for counter, amount in other["counters"].items():
+        counters[counter] = counters.get(counter, 0) + amount
+
+
+def reset():
+    """Clears the timings and counters"""
+
+    stage_times.clear()
+    counters.clear()
+
+
+def to_prometheus(data):
+    """Formats a snapshot as Prometheus text"""
+
+    lines = ["# TYPE rcc_stage_seconds_total counter"]
+    lines += [f'rcc_stage_seconds_total{{stage="{stage}"}} {totals["seconds"]:.9f}'
+              for stage, totals in data["stages"].items()]
+
+    lines.append("# TYPE rcc_stage_calls_total counter")
+    lines += [f'rcc_stage_calls_total{{stage="{stage}"}} {totals["calls"]}'
+              for stage, totals in data["stages"].items()]
+
+    for counter, amount in data["counters"].items():
+        lines.append(f"# TYPE rcc_{counter}_total counter")
+        lines.append(f"rcc_{counter}_total {amount}")
+
+    return "\n".join(lines) + "\n"
+
+
+def save(path):
+    """Saves the metrics to a JSON file, or a Prometheus text file if it ends with .prom"""
+
+    data = snapshot()
+
+    with open(path, "w", encoding="utf-8") as file:
+        if path.endswith(".prom"):
+            file.write(to_prometheus(data))
+        else:
+            json.dump(data, file, indent=2)
@@ -0,0 +1,156 @@
+"""Fixed-point money for the Recipe Cost Calculator.
+
+Money is kept as a whole number of micro-cents (1 dollar = 100,000,000
+micro-cents), as Python ints for single values and int64 NumPy arrays
+for columns. Adding up money is exact, so totals don't drift however
+many ingredients or recipes are added together.
+
+Rounding happens in two places only:
+  - each cost to make is rounded (half up) to a whole micro-cent when it
+    is worked out, since it is a share of a price
+  - money is rounded (half up) to whole cents once, when it is shown or
+    saved by currency() / to_dollars()
+
+Dollars that aren't finite, or are too big for int64 micro-cents, are
+rejected with a ValueError when they are turned into micro-cents.
+NumPy is only imported by the column functions, so the interactive
+program starts without it.
+"""
+MICROCENTS = 100_000_000  # micro-cents in a dollar
+MICROCENTS_PER_CENT = 1_000_000
+
+# Most dollars a single amount can be, so one amount fits in int64
+# micro-cents (up to about 92 billion dollars). Adding up more than about
+# 90 of the biggest amounts would not, so sum_runs() checks for that.
+MAX_DOLLARS = 1_000_000_000
+
+# Biggest sum the int64 columns are trusted with, leaving room for the
+# doubling in divide_array().
+MAX_INT64_SUM = 1 << 61
+
+MONEY_ERROR = "❌ Please enter an amount of money less than $1,000,000,000."
+
+
+# Single values
+
+def check_dollars(dollars):
+    """Raises a ValueError if dollars can't be turned into micro-cents (nan, inf or too big)"""
+
+    # nan fails every comparison, so it fails this one too.
+    if not -MAX_DOLLARS <= dollars <= MAX_DOLLARS:
+        raise ValueError(MONEY_ERROR)
+
+
+def from_dollars(dollars):
+    """Turns a price in dollars (as typed, e.g. 3.5 or 8.99) into micro-cents"""
+
+    check_dollars(dollars)
+    return round(dollars * MICROCENTS)
+
+
+def divide(amount, divisor):
+    """Divides money by a whole number, rounding half up"""
+    return (2 * amount + divisor) // (2 * divisor)
+
+
+def cost_to_make(price, amount_used, converted_amt):
+    """Works out the cost to make (micro-cents) from a price in micro-cents"""
+
+    # The share used is a float, it is rounded off to a whole micro-cent once.
+    return int(price * (amount_used / converted_amt) + 0.5)
+
+
+def to_cents(amount):
+    """Rounds micro-cents to whole cents (half up)"""
+    return divide(amount, MICROCENTS_PER_CENT)
+
+
+def to_dollars(amount):
+    """Rounds micro-cents to a dollar amount with two decimal places"""
+    return to_cents(amount) / 100
+
+
+def currency(amount, symbol="$"):
+    """Formats micro-cents as currency ($#.##, or with another currency symbol)"""
+
+    cents = to_cents(amount)
+    return f"{symbol}{cents // 100}.{cents % 100:02d}"
+
+
+# Columns
+
+def from_dollars_array(dollars):
+    """Turns an array of prices in dollars into micro-cents.
+    Raises a ValueError if any of them can't be (nan, inf or too big)."""
+
+    import numpy
+
+    dollars = numpy.asarray(dollars, dtype=float)
+    if not numpy.all(numpy.abs(dollars) <= MAX_DOLLARS):
+        raise ValueError(MONEY_ERROR)
+
+    return numpy.rint(dollars * MICROCENTS).astype(numpy.int64)
+
+
+def cost_to_make_array(prices, amount_used, converted_amt):
+    """Works out the costs to make (micro-cents) of whole columns at once.
+    Rows with a NaN converted amount cost 0 (they are marked invalid by the caller)."""
+
+    import numpy
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        costs = numpy.floor(prices * (amount_used / converted_amt) + 0.5)
+
+    return whole_array(numpy.where(numpy.isfinite(costs), costs, 0))
+
+
+def whole_array(amounts):
+    """Turns an array of whole (already rounded) float micro-cents into int64,
+    or into an object array of Python ints if any are too big for int64 sums"""
+
+    import numpy
+
+    if amounts.size > 0 and numpy.abs(amounts).max() > MAX_INT64_SUM:
+        return numpy.array([int(amount) for amount in amounts.flat],
+                           dtype=object).reshape(amounts.shape)
+    return amounts.astype(numpy.int64)
+
+
+def group_totals(group_ids, amounts, groups):
+    """Adds up the money of each group (group_ids has to be in order)"""
+
+    import numpy
+
+    totals = numpy.zeros(groups, dtype=numpy.int64)
+    if len(amounts) == 0:
+        return totals
+
+    # Where each group starts, for the groups that have any rows.
+    starts = numpy.flatnonzero(numpy.r_[True, group_ids[1:] != group_ids[:-1]])
+    sums = sum_runs(amounts, starts)
+    if sums.dtype == object:
+        totals = totals.astype(object)
+    totals[group_ids[starts]] = sums
+    return totals
+
+
+def sum_runs(amounts, starts, axis=0):
+    """Adds up the runs of amounts that begin at starts (numpy.add.reduceat).
+    If the sums could overflow int64 they are added up as Python ints instead,
+    so the result is an object array (slower, but still exact)."""
+
+    import numpy
+
+    amounts = numpy.asarray(amounts)
+    if amounts.size > 0:
+        # No sum can be bigger than every row at the biggest amount.
+        biggest = int(numpy.abs(amounts).max()) * amounts.shape[axis]
+        if biggest > MAX_INT64_SUM:
+            amounts = amounts.astype(object)
+
+    return numpy.add.reduceat(amounts, starts, axis=axis)
+
+
+def divide_array(amounts, divisors):
+    """Divides money by whole numbers, rounding half up"""
+    return (2 * amounts + divisors) // (2 * divisors)
@@ -0,0 +1,337 @@
+"""Cheapest-pack optimizer for the Recipe Cost Calculator.
+
+Suppliers sell most ingredients in more than one pack size. A pack list
+file gives every pack on offer, one per row, with the same columns as
+the recipe files:
+    Ingredient Name, Amount Bought, Price Paid
+(e.g. Flour, 500g, $2.20 / Flour, 1kg, $3.80 / Flour, 5kg, $15.50).
+
+For every ingredient that has no Amount Bought and Price Paid, the
+cheapest mix of packs that covers the Amount Used is picked, and the
+mix (its total amount in the base unit and its total price) is filled
+in as the Amount Bought and Price Paid, so the cost to make is worked
+out from what was really bought.
+An Amount Used by volume is matched to packs sold by weight (and the
+other way) with the ingredient's density. An ingredient that none of its
+packs fit is left with an error for the costing to report.
+
+The pick is a dynamic program over the base units (g / ml / no unit):
+cheapest[t] is the cheapest price of packs that hold at least t steps.
+The step is the greatest common divisor of the pack sizes (to 1/1000 of
+a base unit), so 500g / 1kg / 5kg packs only need steps of 500g. The
+ingredients of a chunk are solved together, one NumPy step at a time
+for all of them.
+
+Packs that don't share a round size (1 lb next to 500g) have a tiny
+gcd, so an ingredient never needs more than MAX_STEPS steps: past that
+the step is made coarser and the pack sizes are rounded down to it.
+Rounded down, a mix can cover the Amount Used in fewer steps than the
+target, so the cheaper mixes up to MAX_SLACK steps under it are checked
+against the real pack sizes too (1kg of 1kg packs is still one pack).
+"""
+import csv
+from math import ceil, gcd
+
+import numpy
+
+import rcc_metrics
+import rcc_money
+from rcc_catalogue import normalize_name
+from rcc_units import unit_registry
+from B02_RCC_Final import parse_amount_and_unit, parse_number
+
+# Steps per base unit that pack sizes and amounts are rounded to
+RESOLUTION = 1000
+
+# Most steps one ingredient is solved in (a coarser step is used past it)
+MAX_STEPS = 4096
+
+# Steps under the target tried for a coarser step (mixes that cover the amount anyway)
+MAX_SLACK = 64
+
+# Most steps (ingredients x steps) solved together, keeps memory use flat
+MAX_CELLS = 1 << 22
+
+# Price of a pack that isn't there (more than any real order)
+NO_PACK = 1 << 60
+
+# Key of the message left on an ingredient that no pack could be picked for,
+# reported by the costing (rcc_batch.parse_ingredient())
+PACK_ERROR = "Pack Error"
+
+
+class PackList:
+    """The packs on offer for each ingredient, read from a pack list file"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.packs = {}  # normalized name -> list of (amount, unit, price in micro-cents)
+
+        with open(filename, encoding="utf-8", newline="") as file:
+            for line_number, row in enumerate(csv.DictReader(file), start=2):
+                name = normalize_name(str(row.get("Ingredient Name") or ""))
+                if name == "":
+                    raise ValueError(f"❌ {filename} line {line_number}: "
+                                     f"the Ingredient Name can't be blank.")
+                try:
+                    amount, unit = parse_amount_and_unit(str(row.get("Amount Bought") or ""))
+                    price = rcc_money.from_dollars(parse_number(str(row.get("Price Paid") or "")))
+                except ValueError as error:
+                    # The error's own ❌ isn't repeated.
+                    raise ValueError(f"❌ {filename} line {line_number}: {name}: "
+                                     f"{str(error).removeprefix('❌ ')}") from None
+
+                self.packs.setdefault(name, []).append((amount, unit, price))
+
+    def lookup(self, name):
+        """Returns the packs on offer for an ingredient (an empty list if there are none)"""
+        return self.packs.get(normalize_name(name), [])
+
+
+# Functions
+
+def to_steps(amount, unit):
+    """Turns an amount into (base unit id, whole steps of 1/RESOLUTION base units)"""
+
+    unit_id = unit_registry.ids[unit]
+    return unit_registry.bases[unit_id], round(amount * unit_registry.factors[unit_id] * RESOLUTION)
+
+
+def bridge_steps(amount_used, unit_used, packs, ingredient):
+    """Turns the amount used into (base unit id, steps) of the packs' base unit with
+    the ingredient's density (2 cups of milk against packs in g), or None if no pack
+    can be bridged to"""
+
+    for amount, unit, price in packs:
+        if unit_registry.are_compatible(unit_used, unit, ingredient):
+            base = unit_registry.base_names[unit_registry.bases[unit_registry.ids[unit]]]
+            converted = unit_registry.convert(amount_used, unit_used, base, ingredient)
+
+            # Rounded up, so the packs still cover the amount used once it is
+            # converted back by the costing.
+            return unit_registry.ids[base], ceil(converted * RESOLUTION)
+
+    return None
+
+
+def make_problem(amount_used, unit_used, packs, ingredient=None):
+    """Sets up the pick for one ingredient. Returns (packs that fit, pack sizes
+    in steps, steps needed, and with a coarser step (real pack sizes, amount used)
+    to check mixes under the target with) or None if no pack has a compatible unit.
+    If no pack has the base unit of the amount used, the ingredient's density
+    bridges mass and volume."""
+
+    base, used = to_steps(amount_used, unit_used)
+    pack_steps = [to_steps(amount, unit) for amount, unit, price in packs]
+
+    if all(pack_base != base for pack_base, size in pack_steps):
+        bridged = bridge_steps(amount_used, unit_used, packs, ingredient)
+        if bridged is None:
+            return None
+        base, used = bridged
+
+    usable = []
+    sizes = []
+
+    for (amount, unit, price), (pack_base, size) in zip(packs, pack_steps):
+        if pack_base == base and size > 0:
+            usable.append((amount, unit, price))
+            sizes.append(size)
+
+    if not usable:
+        return None
+
+    step = 0
+    for size in sizes:
+        step = gcd(step, size)
+
+    # Rounded up, the packs have to hold all of the amount used.
+    if -(-used // step) <= MAX_STEPS:
+        return usable, [size // step for size in sizes], max(1, -(-used // step)), None
+
+    # Too many steps, they are made coarser. Packs smaller than a coarse step
+    # are left out and the others are rounded down, so the packs still hold
+    # all of the amount used.
+    step = coarse_step(sizes, -(-used // MAX_STEPS))
+    fits = [number for number, size in enumerate(sizes) if size >= step]
+    return ([usable[number] for number in fits], [sizes[number] // step for number in fits],
+            max(1, -(-used // step)), ([sizes[number] for number in fits], used))
+
+
+def coarse_step(sizes, smallest):
+    """A step of smallest to twice smallest steps (no bigger than the biggest pack)
+    that loses the least when the pack sizes are rounded down to it. Each pack size
+    offers its smallest divisor that is big enough, so 100g / 500g packs next to
+    1 lb ones can stay exact and only the lb packs are rounded down."""
+
+    candidates = {min(smallest, max(sizes))}
+    for size in sizes:
+        if size >= smallest:
+            divisors = [number for number in range(1, int(size ** 0.5) + 1) if size % number == 0]
+            step = min(divisor for number in divisors for divisor in (number, size // number)
+                       if divisor >= smallest)
+            if step <= 2 * smallest:
+                candidates.add(step)
+
+    # Share of each pack lost to the rounding, smaller steps first if they lose the same.
+    return min(candidates, key=lambda step: (sum(size % step / size for size in sizes), step))
+
+
+def solve_block(sizes, prices, targets):
+    """Finds the cheapest packs for a block of ingredients at once.
+
+    sizes and prices are ingredients x packs arrays (missing packs cost NO_PACK),
+    targets the steps needed by each ingredient. Returns the cheapest price of
+    every number of steps and the pack picked for it (ingredients x steps)."""
+
+    ingredients, pack_count = sizes.shape
+    rows = numpy.arange(ingredients)[:, None]
+    cheapest = numpy.zeros((ingredients, targets.max() + 1), dtype=numpy.int64)
+    choice = numpy.zeros(cheapest.shape, dtype=numpy.intp)
+
+    # cheapest[t] = the cheapest of (a pack + the cheapest way to get the rest).
+    for target in range(1, cheapest.shape[1]):
+        options = cheapest[rows, numpy.maximum(target - sizes, 0)] + prices
+        best = options.argmin(axis=1)
+        choice[:, target] = best
+        cheapest[:, target] = options[rows[:, 0], best]
+
+    return cheapest, choice
+
+
+def walk_back(choice, pack_sizes, target):
+    """The number of each pack in the mix picked for target steps"""
+
+    counts = [0] * len(pack_sizes)
+    while target > 0:
+        counts[choice[target]] += 1
+        target -= pack_sizes[choice[target]]
+
+    return counts
+
+
+def pick_counts(cheapest, choice, pack_sizes, target, check):
+    """The number of each pack to buy for one ingredient, from its row of solve_block()"""
+
+    choice = choice.tolist()
+    counts = walk_back(choice, pack_sizes, target)
+    if check is None:
+        return counts
+
+    # The cheapest mix under the target that still covers the amount with the
+    # real pack sizes (cheapest only goes up with the steps, so the first one found).
+    real_sizes, used = check
+    for below in range(max(1, target - MAX_SLACK), target):
+        if cheapest[below] >= cheapest[target]:
+            break
+
+        below_counts = walk_back(choice, pack_sizes, below)
+        if sum(map(int.__mul__, below_counts, real_sizes)) >= used:
+            return below_counts
+
+    return counts
+
+
+def cheapest_packs(needs):
+    """Picks the cheapest packs for many ingredients.
+
+    needs is a list of (amount used, unit used, packs on offer, and optionally
+    the ingredient name for its density). Returns, for
+    each one, a list of (number bought, amount, unit, price) for the packs
+    that were picked, or None if none of the packs has a compatible unit."""
+
+    problems = [make_problem(*need) for need in needs]
+    picks = [None] * len(needs)
+
+    # Solved in blocks of ingredients that need about as many steps.
+    order = sorted((problem[2], number) for number, problem in enumerate(problems)
+                   if problem is not None)
+    block = []
+
+    with rcc_metrics.timer("packs"):
+        for target, number in order:
+            if block and (len(block) + 1) * (target + 1) > MAX_CELLS:
+                solve_problems(problems, block, picks)
+                block = []
+            block.append(number)
+
+        if block:
+            solve_problems(problems, block, picks)
+
+    rcc_metrics.count("packs_picked", len(needs))
+    return picks
+
+
+def solve_problems(problems, block, picks):
+    """Solves a block of the problems together and puts their picks into picks"""
+
+    pack_count = max(len(problems[number][0]) for number in block)
+    sizes = numpy.ones((len(block), pack_count), dtype=numpy.int64)
+    prices = numpy.full((len(block), pack_count), NO_PACK, dtype=numpy.int64)
+
+    for row, number in enumerate(block):
+        usable, pack_sizes, target, check = problems[number]
+        sizes[row, :len(usable)] = pack_sizes
+        prices[row, :len(usable)] = [price for amount, unit, price in usable]
+
+    cheapest, choice = solve_block(sizes, prices, numpy.array([problems[number][2] for number in block]))
+
+    for row, number in enumerate(block):
+        usable, pack_sizes, target, check = problems[number]
+        counts = pick_counts(cheapest[row].tolist() if check else None, choice[row], pack_sizes,
+                             target, check)
+        picks[number] = [(count, *pack) for count, pack in zip(counts, usable) if count > 0]
+
+
+def combine_packs(pick):
+    """Adds up the packs that were picked into one (amount bought, price paid)
+    written like the recipe files, in the base unit"""
+
+    base = steps = price = 0
+    for count, amount, unit, pack_price in pick:
+        base, pack_steps = to_steps(amount, unit)
+        steps += count * pack_steps
+        price += count * pack_price
+
+    # Amounts with no unit are whole numbers.
+    unit = unit_registry.base_names[base]
+    if unit == "none":
+        amount_bought = str(steps // RESOLUTION)
+    else:
+        amount_bought = f"{steps / RESOLUTION}{unit}"
+
+    return amount_bought, price / rcc_money.MICROCENTS
+
+
+def fill_from_packs(ingredients, pack_list):
+    """Fills in the Amount Bought and Price Paid of the ingredients (of a chunk
+    of recipes) that have neither, from the cheapest packs that cover the
+    Amount Used. Ingredients that can't be filled are left for the costing to report."""
+
+    needs = []
+    filled = []
+
+    for ingredient in ingredients:
+        if str(ingredient.get("Amount Bought") or "").strip() != "" or \
+                str(ingredient.get("Price Paid") or "").strip() != "":
+            continue
+
+        packs = pack_list.lookup(str(ingredient.get("Ingredient Name") or ""))
+        if not packs:
+            continue
+
+        try:
+            amount_used, unit_used = parse_amount_and_unit(str(ingredient.get("Amount Used", "")))
+        except ValueError:
+            continue
+
+        needs.append((amount_used, unit_used, packs, str(ingredient.get("Ingredient Name") or "")))
+        filled.append(ingredient)
+
+    for ingredient, pick, (amount_used, unit_used, packs, name) in zip(
+            filled, cheapest_packs(needs), needs):
+        if pick is not None:
+            ingredient["Amount Bought"], ingredient["Price Paid"] = combine_packs(pick)
+        else:
+            ingredient[PACK_ERROR] = (f"❌ None of the packs on offer have a unit that is "
+                                      f"compatible with {unit_used or 'no unit'}.")
@@ -0,0 +1,177 @@
+"""Parallel batch costing for the Recipe Cost Calculator.
+
+Spreads the chunks of recipes read from the recipe files over a pool of
+worker processes. Each worker costs its chunks with the same functions
+as the single process batch mode (and writes their reports), and the
+result rows are collected either in the order of the files or as soon
+as they are ready.
+Recipe stores are not sent to the workers, each worker memory maps the
+store itself and is only sent the range of recipes to cost.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import rcc_metrics
+import rcc_vector
+from rcc_currency import currency_table
+from rcc_units import unit_registry
+from rcc_batch import read_chunks, cost_recipes
+from rcc_report import ReportWriter
+from rcc_export import ExportRecords
+from rcc_store import RecipeStore, is_store
+
+# Chunks waiting in the pool for each worker, keeps memory use flat
+# while making sure the workers are never left without work.
+CHUNKS_PER_JOB = 2
+
+# Report writer of this worker process (None if no reports are written)
+worker_report_writer = None
+
+# Recipe stores opened by this worker process (path -> RecipeStore)
+worker_stores = {}
+
+# Export records of this worker process (None if there is no export)
+worker_exports = None
+
+
+# Functions
+
+def start_worker(reports, durability, metrics, export=False, shards=0, units=None, densities=None,
+                 currencies=None):
+    """Sets up a worker process"""
+
+    global worker_report_writer, worker_exports
+
+    # The units and densities added in the main process (a forked worker already has them).
+    if units and unit_registry.user_units != units:
+        unit_registry.define_units(units)
+    if densities and unit_registry.user_densities != densities:
+        unit_registry.define_densities(densities)
+    rcc_vector.build_tables()
+
+    # The exchange rates and reporting currency of the main process.
+    if currencies is not None:
+        currency_table.values, currency_table.report = currencies
+        currency_table.build_tables()
+
+    if metrics:
+        rcc_metrics.enable()
+
+    if reports is not None:
+        worker_report_writer = ReportWriter(reports, durability, shards, shared=True)
+
+    if export:
+        worker_exports = ExportRecords()
+
+
+def read_tasks(filenames, catalogue=None, packs=None):
+    """Yields the chunks of recipes to cost, as lists of recipes or
+    (recipe store, first recipe, last recipe) ranges"""
+
+    for filename in filenames:
+        if is_store(filename):
+            for first, last in RecipeStore(filename).ranges():
+                yield filename, first, last
+        else:
+            yield from read_chunks([filename], catalogue, packs=packs)
+
+
+def cost_chunk(chunk):
+    """Costs a chunk of recipes in a worker process.
+    Returns the result rows, the export records and the metrics of the chunk (or None)."""
+
+    if isinstance(chunk, tuple):
+        path, first, last = chunk
+        if path not in worker_stores:
+            worker_stores[path] = RecipeStore(path)
+        results = worker_stores[path].cost_range(first, last, worker_report_writer, worker_exports)
+    else:
+        results = cost_recipes(chunk, worker_report_writer, worker_exports)
+
+    # The export records of the chunk are handed back to be written by the main process.
+    records = None
+    if worker_exports is not None:
+        records = list(worker_exports)
+        worker_exports.clear()
+
+    # Batch fsyncs are done per chunk, before the results are handed back.
+    if worker_report_writer is not None:
+        worker_report_writer.sync()
+
+    if not rcc_metrics.enabled:
+        return results, records, None
+
+    # Hands the metrics of this chunk back to be added up by the main process.
+    metrics = rcc_metrics.snapshot()
+    rcc_metrics.reset()
+    return results, records, metrics
+
+
+def chunk_results(future, exporter=None):
+    """Returns the result rows of a finished chunk, adds up its metrics
+    and adds its export records to the exporter"""
+
+    results, records, metrics = future.result()
+
+    if metrics is not None:
+        rcc_metrics.merge(metrics)
+
+    if exporter is not None:
+        for record in records:
+            exporter.add(*record)
+
+    return results
+
+
+def cost_files_parallel(filenames, jobs, reports=None, durability="batch", ordered=True,
+                        catalogue=None, exporter=None, shards=0, packs=None):
+    """Yields the result row for every recipe in the recipe files,
+    costed by a pool of processes.
+    The price catalogue and pack list (if any) are used while reading, and
+    the export (if any) is written, in this process."""
+
+    chunks = read_tasks(filenames, catalogue, packs)
+
+    with ProcessPoolExecutor(jobs, initializer=start_worker,
+                             initargs=(reports, durability, rcc_metrics.enabled,
+                                       exporter is not None, shards,
+                                       unit_registry.user_units, unit_registry.user_densities,
+                                       (currency_table.values, currency_table.report))) as pool:
+        if ordered:
+            yield from collect_ordered(pool, chunks, jobs * CHUNKS_PER_JOB, exporter)
+        else:
+            yield from collect_unordered(pool, chunks, jobs * CHUNKS_PER_JOB, exporter)
+
+
+def collect_ordered(pool, chunks, limit, exporter=None):
+    """Yields the results of the chunks in the order they were read"""
+
+    pending = deque()
+
+    for chunk in chunks:
+        pending.append(pool.submit(cost_chunk, chunk))
+
+        # Waits for the oldest chunk once enough are queued up.
+        if len(pending) >= limit:
+            yield from chunk_results(pending.popleft(), exporter)
+
+    while pending:
+        yield from chunk_results(pending.popleft(), exporter)
+
+
+def collect_unordered(pool, chunks, limit, exporter=None):
+    """Yields the results of the chunks as soon as each one is finished"""
+
+    pending = set()
+
+    for chunk in chunks:
+        pending.add(pool.submit(cost_chunk, chunk))
+
+        # Waits for any chunk to finish once enough are queued up.
+        if len(pending) >= limit:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from chunk_results(future, exporter)
+
+    for future in pending:
+        yield from chunk_results(future, exporter)
@@ -0,0 +1,233 @@
+"""Streaming costing pipeline for the Recipe Cost Calculator.
+
+Costs an ingredient feed (batch mode csv files, one ingredient per row)
+one row at a time with a chain of generator stages:
+
+    read_feed -> parse_rows -> validate_rows -> convert_rows -> cost_rows
+              -> [export_rows] -> total_recipes -> results
+
+Each stage takes an iterable of row dictionaries and yields them with
+its own fields added, so the stages can be used (and timed) on their own.
+Rows that fail a stage get an "Error" and are passed through untouched by
+the later stages. Nothing is kept except the running totals of the
+current recipe, so the memory used does not grow with the size of the feed.
+"""
+import csv
+
+import rcc_metrics
+import rcc_money
+from rcc_currency import currency_table
+from rcc_units import units_dict
+from B02_RCC_Final import (parse_number, parse_amount_and_unit, are_units_compatible,
+                           convert_amount, currency)
+
+# Columns of the costed ingredient rows written by export_rows()
+ROW_FIELDS = ["Recipe Name", "Ingredient Name", "Amount Used", "Amount Bought",
+              "Price Paid", "Cost to Make", "Error"]
+
+
+# Stages
+
+def read_feed(file):
+    """Yields the rows of a csv ingredient feed. A blank Recipe Name
+    (and Servings) carries on the recipe from the row above."""
+
+    recipe_name = ""
+    servings = ""
+
+    for row in csv.DictReader(file):
+        name = (row.get("Recipe Name") or "").strip()
+
+        if name != "":
+            recipe_name = name
+            servings = row.get("Servings") or ""
+
+        row["Recipe Name"] = recipe_name
+        row["Servings"] = servings
+        row["Error"] = ""
+        yield row
+
+
+def parse_rows(rows):
+    """Parses the amounts and the price of each row"""
+
+    for row in rows:
+        rcc_metrics.count("rows_parsed")
+
+        if row["Error"] == "":
+            name = (row.get("Ingredient Name") or "").strip()
+            row["Ingredient Name"] = name
+
+            try:
+                if name == "":
+                    raise ValueError("❌ Sorry, the Ingredient Name can't be blank.")
+
+                row["amount_used"], row["unit_used"] = parse_amount_and_unit(row.get("Amount Used") or "")
+                row["amount_bought"], row["unit_bought"] = parse_amount_and_unit(row.get("Amount Bought") or "")
+                row["price"] = parse_number(str(row.get("Price Paid") or ""))
+
+            except ValueError as error:
+                row["Error"] = f"{name}: {error}" if name else str(error)
+                row["parse_failed"] = True
+                rcc_metrics.count("parse_failures")
+
+        yield row
+
+
+def validate_rows(rows):
+    """Checks the units of the amount used and bought are compatible"""
+
+    for row in rows:
+        if row["Error"] == "" and not are_units_compatible(row["unit_used"], row["unit_bought"],
+                                                           row["Ingredient Name"]):
+            row["Error"] = (f"{row['Ingredient Name']}: ❌ The Units are not compatible"
+                            f", please use units with the base unit [ {units_dict[row['unit_used']][0]} ]")
+            rcc_metrics.count("incompatible_units")
+        yield row
+
+
+def convert_rows(rows):
+    """Converts the amount bought into the unit of the amount used,
+    and checks it is not less than the amount used"""
+
+    for row in rows:
+        if row["Error"] == "":
+            row["converted_amt"] = convert_amount(row["amount_bought"], row["unit_bought"], row["unit_used"],
+                                                  row["Ingredient Name"])
+
+            if row["converted_amt"] < row["amount_used"]:
+                row["Error"] = (f"{row['Ingredient Name']}: "
+                                f"❌ The Amount bought can not be less than the Amount Used!")
+        yield row
+
+
+def cost_rows(rows):
+    """Works out the cost to make of each row (in micro-cents)"""
+
+    for row in rows:
+        if row["Error"] == "":
+            row["cost"] = rcc_money.cost_to_make(rcc_money.from_dollars(row["price"]),
+                                                 row["amount_used"], row["converted_amt"])
+        yield row
+
+
+def export_rows(rows, writer):
+    """Writes every costed row to a csv DictWriter (with ROW_FIELDS) as it passes through"""
+
+    for row in rows:
+        ok = row["Error"] == ""
+        writer.writerow({
+            **row,
+            "Amount Used": f"{row['amount_used']}{row['unit_used'] or ''}" if ok else row.get("Amount Used"),
+            "Amount Bought": f"{row['amount_bought']}{row['unit_bought'] or ''}" if ok else row.get("Amount Bought"),
+            "Price Paid": currency(row["price"]) if ok else row.get("Price Paid"),
+            "Cost to Make": rcc_money.currency(row["cost"], currency_table.symbol) if ok else "",
+        })
+        yield row
+
+
+def total_recipes(rows):
+    """Adds up the rows of each recipe and yields a batch mode result row
+    for every recipe. Like batch mode, the first row that can't be parsed
+    gives the recipe's error, and only then the first row that fails the checks."""
+
+    result = None
+    total_cost = 0
+    check_error = ""
+
+    for row in rows:
+
+        # A new recipe, finishes off the last one.
+        if result is None or row["Recipe Name"] != result["Recipe Name"]:
+            if result is not None:
+                yield finish_recipe(result, total_cost, check_error)
+
+            result = {"Recipe Name": row["Recipe Name"], "Servings": "", "Ingredients": 0,
+                      "Total Cost to Make": "", "Cost Per Serve": "", "Error": ""}
+            total_cost = 0
+            check_error = ""
+
+            try:
+                if row["Recipe Name"] == "":
+                    raise ValueError("❌ Sorry, the Recipe Name can't be blank.")
+                result["Servings"] = parse_number(str(row["Servings"]), "integer")
+            except ValueError as error:
+                result["Error"] = str(error)
+
+        if result["Error"] != "":
+            continue
+
+        if row.get("parse_failed"):
+            result["Error"] = row["Error"]
+            continue
+
+        # The later rows are still parsed, a parsing error comes first.
+        if row["Error"] != "":
+            check_error = check_error or row["Error"]
+            continue
+
+        result["Ingredients"] += 1
+        total_cost += row["cost"]
+
+    if result is not None:
+        yield finish_recipe(result, total_cost, check_error)
+
+
+def finish_recipe(result, total_cost, check_error=""):
+    """Fills in the totals of a recipe result row, the same as batch mode:
+    a recipe that couldn't be parsed has no Servings, one that failed the
+    checks keeps them"""
+
+    if result["Error"] != "":
+        result["Servings"] = ""
+        result["Ingredients"] = ""
+        return result
+
+    if check_error != "":
+        result["Error"] = check_error
+        result["Ingredients"] = ""
+        return result
+
+    result["Total Cost to Make"] = rcc_money.to_dollars(total_cost)
+    result["Cost Per Serve"] = rcc_money.to_dollars(rcc_money.divide(total_cost, result["Servings"]))
+    return result
+
+
+# Whole pipeline
+
+def cost_feed(file, rows_writer=None):
+    """Yields the result row of every recipe in a csv ingredient feed.
+    If a rows writer is given, every costed ingredient row is written to it."""
+
+    rows = cost_rows(convert_rows(validate_rows(parse_rows(read_feed(file)))))
+
+    if rows_writer is not None:
+        rows = export_rows(rows, rows_writer)
+
+    yield from total_recipes(rows)
+
+
+def cost_feeds(filenames, rows_output=None):
+    """Yields the result row of every recipe in the csv ingredient feeds.
+    If rows_output is given, every costed ingredient row is written to that csv file."""
+
+    for filename in filenames:
+        if not filename.endswith(".csv"):
+            raise ValueError(f"❌ {filename} is not a .csv file, only csv feeds can be streamed.")
+
+    rows_file = None
+    rows_writer = None
+
+    try:
+        if rows_output is not None:
+            rows_file = open(rows_output, "w", encoding="utf-8", newline="")
+            rows_writer = csv.DictWriter(rows_file, fieldnames=ROW_FIELDS, extrasaction="ignore")
+            rows_writer.writeheader()
+
+        for filename in filenames:
+            with open(filename, encoding="utf-8", newline="") as file:
+                yield from cost_feed(file, rows_writer)
+
+    finally:
+        if rows_file is not None:
+            rows_file.close()
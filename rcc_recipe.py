@@ -0,0 +1,311 @@
+"""Incrementally costed recipes for the Recipe Cost Calculator.
+
+A RecipeModel keeps the cost to make of each of its ingredients and a
+running total. Changing an ingredient's price, amount bought or amount
+used (or adding / removing an ingredient) only re-costs that ingredient
+and adds the difference to the total, instead of costing the whole
+recipe again. Money is kept in micro-cents (rcc_money), so the running
+totals never drift however many changes are made.
+
+A RecipeBook holds many recipes with an index of which recipes use each
+ingredient, so a price change for an ingredient goes straight to the
+recipes that use it.
+
+A price-change feed is a csv file with a row per change, applied in order
+(a blank Amount Bought keeps the pack size):
+    Ingredient Name, Price Paid, Amount Bought
+
+    python B02_RCC_Final.py --batch recipes.csv --prices changes.csv
+costs the recipes, applies the feed and writes the results after it.
+"""
+import csv
+import sys
+
+import rcc_money
+from rcc_batch import (cost_recipe, new_result, parse_recipe, read_chunks, write_csv_results,
+                       write_jsonl_results)
+from rcc_catalogue import normalize_name, PriceCatalogue
+from rcc_packs import PackList
+from rcc_currency import currency_table
+from B02_RCC_Final import check_amount_bought, parse_amount_and_unit, parse_price
+
+
+# Unit argument that wasn't given (None is an amount with no unit, like 12 eggs)
+KEEP_UNIT = object()
+
+
+class Ingredient:
+    """One ingredient of a recipe and its cost to make (micro-cents)"""
+
+    __slots__ = ("name", "amount_used", "unit_used", "amount_bought", "unit_bought",
+                 "price", "share", "cost")
+
+    def __init__(self, name, amount_used, unit_used, amount_bought, unit_bought, price):
+        self.name = name
+        self.amount_used = amount_used
+        self.unit_used = unit_used
+        self.amount_bought = amount_bought
+        self.unit_bought = unit_bought
+        self.price = price
+        self.share = work_out_share(name, amount_used, unit_used, amount_bought, unit_bought)
+        self.cost = rcc_money.cost_to_make(price, self.share, 1)
+
+
+class RecipeModel:
+    """A recipe that keeps its total cost up to date as its ingredients change"""
+
+    def __init__(self, name, servings):
+        if servings <= 0:
+            raise ValueError("❌ Please enter an integer more than 0.")
+
+        self.name = name
+        self.servings = servings
+        self.ingredients = {}  # normalized name -> list of Ingredient (a recipe can list one twice)
+        self.total_cost = 0    # micro-cents
+
+    @classmethod
+    def from_recipe(cls, recipe):
+        """Makes a model from a batch mode recipe dictionary.
+        Raises a ValueError if any of the details are not valid."""
+
+        servings, rows = parse_recipe(recipe)
+        model = cls(str(recipe["Recipe Name"]).strip(), servings)
+
+        for name, amount_used, unit_used, amount_bought, unit_bought, price, currency_id in rows:
+            model.add_ingredient(name, amount_used, unit_used, amount_bought, unit_bought,
+                                 currency_table.to_report(price, currency_id))
+
+        return model
+
+    @property
+    def cost_per_serve(self):
+        """Cost per serve in micro-cents"""
+        return rcc_money.divide(self.total_cost, self.servings)
+
+    @property
+    def ingredient_count(self):
+        """Number of ingredient rows (a name listed twice counts twice, like batch mode)"""
+        return sum(map(len, self.ingredients.values()))
+
+    def add_ingredient(self, name, amount_used, unit_used, amount_bought, unit_bought, price):
+        """Adds an ingredient row (price in dollars) and its cost to the total.
+        A name that is already in the recipe is costed as another row, like batch mode."""
+
+        ingredient = Ingredient(name, amount_used, unit_used, amount_bought, unit_bought,
+                                rcc_money.from_dollars(price))
+        self.ingredients.setdefault(normalize_name(name), []).append(ingredient)
+        self.total_cost += ingredient.cost
+        return ingredient
+
+    def remove_ingredient(self, name):
+        """Removes every row of an ingredient and takes their cost off the total"""
+
+        for ingredient in self.ingredients.pop(normalize_name(name)):
+            self.total_cost -= ingredient.cost
+
+    def update_ingredient(self, name, price=None, amount_used=None, unit_used=KEEP_UNIT,
+                          amount_bought=None, unit_bought=KEEP_UNIT):
+        """Changes the price (dollars) and / or amounts of every row of an ingredient
+        and re-costs only those rows. Units are only changed if given (None for no unit).
+        Raises a ValueError (and changes nothing) if the new amounts are not valid."""
+
+        ingredients = self.ingredients[normalize_name(name)]
+        if price is not None:
+            price = rcc_money.from_dollars(price)
+
+        # The amounts only need checking again if they changed. Every row is
+        # checked before any of them is changed, so a bad change changes nothing.
+        changes = []
+        for ingredient in ingredients:
+            amounts = (ingredient.amount_used, ingredient.unit_used,
+                       ingredient.amount_bought, ingredient.unit_bought)
+
+            if amount_used is not None:
+                amounts = (amount_used, amounts[1] if unit_used is KEEP_UNIT else unit_used, *amounts[2:])
+            if amount_bought is not None:
+                amounts = (*amounts[:2], amount_bought,
+                           amounts[3] if unit_bought is KEEP_UNIT else unit_bought)
+
+            share = ingredient.share
+            if amount_used is not None or amount_bought is not None:
+                share = work_out_share(ingredient.name, *amounts)
+            changes.append((amounts, share))
+
+        for ingredient, (amounts, share) in zip(ingredients, changes):
+            (ingredient.amount_used, ingredient.unit_used,
+             ingredient.amount_bought, ingredient.unit_bought) = amounts
+            ingredient.share = share
+            if price is not None:
+                ingredient.price = price
+
+            cost = rcc_money.cost_to_make(ingredient.price, ingredient.share, 1)
+            self.total_cost += cost - ingredient.cost
+            ingredient.cost = cost
+
+    def set_servings(self, servings):
+        """Changes the servings (the total doesn't change, only the cost per serve)"""
+
+        if servings <= 0:
+            raise ValueError("❌ Please enter an integer more than 0.")
+        self.servings = servings
+
+
+class RecipeBook:
+    """Many recipes, with an index of the recipes that use each ingredient"""
+
+    def __init__(self):
+        self.recipes = {}  # recipe name -> RecipeModel
+        self.uses = {}     # normalized ingredient name -> set of recipe names
+
+    def add(self, model):
+        """Adds a recipe model to the book"""
+
+        if model.name in self.recipes:
+            self.remove(model.name)
+
+        self.recipes[model.name] = model
+        for key in model.ingredients:
+            self.uses.setdefault(key, set()).add(model.name)
+
+    def remove(self, recipe_name):
+        """Takes a recipe out of the book"""
+
+        model = self.recipes.pop(recipe_name)
+        for key in model.ingredients:
+            self.uses[key].discard(recipe_name)
+
+    def add_ingredient(self, recipe_name, *details):
+        """Adds an ingredient to one of the recipes (same details as RecipeModel)"""
+
+        ingredient = self.recipes[recipe_name].add_ingredient(*details)
+        self.uses.setdefault(normalize_name(ingredient.name), set()).add(recipe_name)
+
+    def remove_ingredient(self, recipe_name, name):
+        """Removes an ingredient from one of the recipes"""
+
+        self.recipes[recipe_name].remove_ingredient(name)
+        self.uses[normalize_name(name)].discard(recipe_name)
+
+    def change_price(self, name, price, amount_bought=None, unit_bought=KEEP_UNIT):
+        """Applies a new price (and pack size) of an ingredient to every recipe using it.
+        Returns the names of the recipes that could not take the change
+        (e.g. the new pack is smaller than what they use); they are left as they were."""
+
+        failed = []
+
+        for recipe_name in self.uses.get(normalize_name(name), ()):
+            try:
+                self.recipes[recipe_name].update_ingredient(name, price, amount_bought=amount_bought,
+                                                            unit_bought=unit_bought)
+            except ValueError:
+                failed.append(recipe_name)
+
+        return failed
+
+
+# Functions
+
+def work_out_share(name, amount_used, unit_used, amount_bought, unit_bought):
+    """Checks the amounts and works out the share of the amount bought that is used.
+    Raises a ValueError if the amounts are not valid."""
+
+    converted_amt = check_amount_bought(amount_used, unit_used, amount_bought, unit_bought, name)
+    return amount_used / converted_amt
+
+
+def read_price_changes(filename):
+    """Reads a price-change feed into (name, price in dollars, amount bought, unit bought)
+    rows (no amount and KEEP_UNIT if the Amount Bought is blank).
+    Raises a ValueError with the line number if a row is not valid."""
+
+    changes = []
+
+    with open(filename, encoding="utf-8", newline="") as file:
+        for line_number, row in enumerate(csv.DictReader(file), start=2):
+            name = str(row.get("Ingredient Name") or "").strip()
+            if name == "":
+                raise ValueError(f"❌ {filename} line {line_number}: "
+                                 f"the Ingredient Name can't be blank.")
+            try:
+                price, currency_id = parse_price(str(row.get("Price Paid") or ""))
+                price = currency_table.to_report(price, currency_id)
+                rcc_money.check_dollars(price)
+
+                amount_bought, unit_bought = None, KEEP_UNIT
+                bought = str(row.get("Amount Bought") or "").strip()
+                if bought != "":
+                    amount_bought, unit_bought = parse_amount_and_unit(bought)
+            except ValueError as error:
+                # The error's own ❌ isn't repeated.
+                raise ValueError(f"❌ {filename} line {line_number}: {name}: "
+                                 f"{str(error).removeprefix('❌ ')}") from None
+
+            changes.append((name, price, amount_bought, unit_bought))
+
+    return changes
+
+
+def model_result(model):
+    """The batch mode result row of a recipe model"""
+
+    result = new_result({"Recipe Name": model.name})
+    result["Servings"] = model.servings
+    result["Ingredients"] = model.ingredient_count
+    result["Total Cost to Make"] = rcc_money.to_dollars(model.total_cost)
+    result["Cost Per Serve"] = rcc_money.to_dollars(model.cost_per_serve)
+    return result
+
+
+def run_prices(filenames, feed, output=None, output_format="csv", catalogue=None, packs=None,
+               fuzzy=False, as_of=None):
+    """Costs the recipes in the recipe files, applies the price changes in the
+    feed file to them one at a time and writes the results after the changes
+    to the output file (or the screen). The catalogue and pack list fill in
+    ingredients the way batch mode does. Recipes that couldn't take a change
+    (e.g. the new pack is smaller than they use) keep the old price and are
+    listed on stderr."""
+
+    changes = read_price_changes(feed)
+    price_catalogue = None if catalogue is None else PriceCatalogue(catalogue, fuzzy, as_of)
+    pack_list = None if packs is None else PackList(packs)
+
+    # Rows in the order of the files, a model or the error row of the recipe.
+    book = RecipeBook()
+    entries = []
+
+    try:
+        for chunk in read_chunks(filenames, price_catalogue, packs=pack_list):
+            for recipe in chunk:
+                try:
+                    model = RecipeModel.from_recipe(recipe)
+                except ValueError:
+                    # Costed again for the same error row as batch mode.
+                    entries.append(cost_recipe(recipe))
+                    continue
+
+                if model.name in book.recipes:
+                    result = new_result(recipe)
+                    result["Error"] = f"❌ There is already a recipe called {model.name}."
+                    entries.append(result)
+                    continue
+
+                book.add(model)
+                entries.append(model)
+    finally:
+        if price_catalogue is not None:
+            price_catalogue.close()
+
+    for name, price, amount_bought, unit_bought in changes:
+        for recipe_name in book.change_price(name, price, amount_bought, unit_bought):
+            print(f"❌ {recipe_name}: the new {name} pack can't be used, "
+                  f"it keeps the old price.", file=sys.stderr)
+
+    results = (entry if isinstance(entry, dict) else model_result(entry) for entry in entries)
+    writer = write_jsonl_results if output_format == "jsonl" else write_csv_results
+
+    if output is None:
+        writer(results, sys.stdout)
+        return
+
+    with open(output, "w", encoding="utf-8", newline="") as file:
+        writer(results, file)
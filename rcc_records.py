@@ -0,0 +1,74 @@
+"""Compact ingredient records for the Recipe Cost Calculator.
+
+The ingredients of a recipe are kept as columns of raw numbers (typed
+arrays of amounts, prices and costs, and the unit ids of the unit
+registry) instead of one list of formatted strings per table column.
+An ingredient takes about 45 bytes instead of about 270, and nothing is
+formatted until the table is drawn or written to a report.
+"""
+from array import array
+
+import rcc_money
+from rcc_currency import currency_table
+from rcc_units import unit_registry
+
+
+class IngredientTable:
+    """The ingredients of a recipe, one typed array per column"""
+
+    __slots__ = ("names", "amount_used", "unit_used", "amount_bought", "unit_bought",
+                 "prices", "costs")
+
+    def __init__(self):
+        self.names = []
+        self.amount_used = array("d")
+        self.unit_used = array("H")      # unit registry ids
+        self.amount_bought = array("d")
+        self.unit_bought = array("H")
+        self.prices = array("d")
+        self.costs = array("d")          # cost to make of each ingredient
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, amount_used, unit_used, amount_bought, unit_bought, price, cost):
+        """Adds an ingredient (units are units_dict keys, None for no unit)"""
+
+        self.names.append(name)
+        self.amount_used.append(amount_used)
+        self.unit_used.append(unit_registry.ids[unit_used])
+        self.amount_bought.append(amount_bought)
+        self.unit_bought.append(unit_registry.ids[unit_bought])
+        self.prices.append(price)
+        self.costs.append(cost)
+
+    def total_cost(self):
+        """The total cost to make of the ingredients"""
+        return sum(self.costs)
+
+    def columns(self):
+        """The recipe dictionary for the table, formatted the same as it was typed in"""
+
+        return {
+            'Ingredient Name': self.names,
+            'Amount Used': list(map(format_amount, self.amount_used, self.unit_used)),
+            'Amount Bought': list(map(format_amount, self.amount_bought, self.unit_bought)),
+            'Price Paid': list(map(format_money, self.prices)),
+            'Cost to Make': list(map(format_money, self.costs))
+        }
+
+
+# Functions
+
+def format_money(dollars):
+    """Formats dollars as currency, the same as currency() in B02_RCC_Final.py"""
+    return rcc_money.currency(rcc_money.from_dollars(dollars), currency_table.symbol)
+
+
+def format_amount(amount, unit_id):
+    """Writes an amount and its unit like 250.0ml (amounts with no unit are whole numbers)"""
+
+    unit = unit_registry.names[unit_id]
+    if unit is None:
+        return str(int(amount))
+    return f"{amount}{unit}"
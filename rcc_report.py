@@ -0,0 +1,195 @@
+"""Report writer for the Recipe Cost Calculator.
+
+Builds each report in memory and writes it to its file in one call,
+instead of flushing and fsyncing after every line. How hard it tries to
+get the reports onto the disk is set by the durability policy:
+
+    "none"  - leaves it to the operating system (fastest)
+    "file"  - fsyncs every report as soon as it is written
+    "batch" - fsyncs all the reports written so far in one go, when
+              sync() is called or the writer is closed
+
+Report filenames come from a FilenameAllocator. It reads the names of
+the reports already in the folder once (one scandir, not a stat() per
+name) and remembers every name it hands out, so reports never overwrite
+each other. When several processes write into the same folder (shared),
+files are also created exclusively and the next number is used if
+another process got there first. With shards, the reports are spread
+over sub-folders (00, 01, ...) so a single folder doesn't end up with
+100k files in it.
+"""
+import os
+import zlib
+
+import rcc_metrics
+
+DURABILITY_POLICIES = ("none", "file", "batch")
+
+# Most sub-folders the reports can be spread over
+MAX_SHARDS = 256
+
+
+class FilenameAllocator:
+    """Hands out report filenames that have not been used before"""
+
+    def __init__(self, directory=".", shards=0):
+        if not 0 <= shards <= MAX_SHARDS:
+            raise ValueError(f"❌ Please use between 0 and {MAX_SHARDS} shards.")
+
+        self.directory = directory
+        self.shards = shards
+        self.issued = set()      # filenames in use (relative to the directory)
+        self.next_number = {}    # name -> next number to try for it
+        self.shard_folders = set()  # shard folders made (and read) so far
+
+        if shards == 0:
+            self.read_folder("")
+
+    def read_folder(self, folder):
+        """Adds the reports already in a folder to the filenames in use"""
+
+        with os.scandir(os.path.join(self.directory, folder)) as entries:
+            for entry in entries:
+                if entry.name.endswith(".txt"):
+                    self.issued.add(os.path.join(folder, entry.name))
+
+    def shard(self, name):
+        """Picks the sub-folder of a name (always the same one for the same name)"""
+
+        folder = f"{zlib.crc32(name.encode('utf-8')) % self.shards:02x}"
+
+        if folder not in self.shard_folders:
+            os.makedirs(os.path.join(self.directory, folder), exist_ok=True)
+            self.read_folder(folder)
+            self.shard_folders.add(folder)
+
+        return folder
+
+    def allocate(self, name):
+        """Returns a new filename for a (valid) name: name.txt, then name_2.txt, name_3.txt, ...
+        The filename includes the shard folder if there are shards."""
+
+        folder = self.shard(name) if self.shards else ""
+        number = self.next_number.get(name, 1)
+
+        while True:
+            filename = os.path.join(folder, f"{name}.txt" if number == 1 else f"{name}_{number}.txt")
+            number += 1
+
+            # A name like Soup_RRC_2 can take the filename of the second Soup_RRC.
+            if filename not in self.issued:
+                break
+
+        self.next_number[name] = number
+        self.issued.add(filename)
+        return filename
+
+
+class ReportWriter:
+    """Writes report files with a selectable durability policy"""
+
+    def __init__(self, directory=".", durability="file", shards=0, shared=False):
+        if durability not in DURABILITY_POLICIES:
+            raise ValueError(f"❌ Unknown durability policy {durability!r}, "
+                             f"please use one of {', '.join(DURABILITY_POLICIES)}")
+
+        self.directory = directory
+        self.durability = durability
+        self.shared = shared  # other processes write reports into the directory too
+        self.pending = []  # reports waiting for a batch fsync
+        self.files_written = 0
+        self.bytes_written = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.filenames = FilenameAllocator(directory, shards)
+
+    def write_report(self, name, lines):
+        """Writes the lines to a new report file named after name (a valid filename
+        without .txt) and returns its filename, relative to the directory"""
+
+        while True:
+            filename = self.filenames.allocate(name)
+
+            # Another process wrote a report with this filename, tries the next number.
+            try:
+                self.write(filename, lines, exclusive=self.shared)
+            except FileExistsError:
+                continue
+
+            return filename
+
+    def write(self, filename, lines, exclusive=False):
+        """Writes the lines (one per item, like to_write) to a report file
+        and returns the path of the file.
+        If exclusive, a FileExistsError is raised instead of overwriting a file."""
+
+        path = os.path.join(self.directory, filename)
+        text = "".join(f"{line}\n" for line in lines)
+        size = len(text.encode("utf-8"))
+
+        with rcc_metrics.timer("write"):
+            with open(path, "x" if exclusive else "w", encoding="utf-8") as report_file:
+                report_file.write(text)
+
+                # Makes sure the report is saved to disk before moving on.
+                if self.durability == "file":
+                    report_file.flush()
+                    os.fsync(report_file.fileno())
+
+        if self.durability == "batch":
+            self.pending.append(path)
+
+        self.files_written += 1
+        self.bytes_written += size
+        rcc_metrics.count("files_written")
+        rcc_metrics.count("bytes_written", size)
+        return path
+
+    def sync(self):
+        """Saves the reports waiting for a batch fsync to disk"""
+
+        if len(self.pending) == 0:
+            return
+
+        with rcc_metrics.timer("write"):
+            self.fsync_pending()
+
+        self.pending = []
+
+    def fsync_pending(self):
+        """Fsyncs every pending report and their directory"""
+
+        for path in self.pending:
+            file_descriptor = os.open(path, os.O_RDONLY)
+            try:
+                os.fsync(file_descriptor)
+            finally:
+                os.close(file_descriptor)
+
+        # Saves the new directory entries as well (and the shard folders).
+        for directory in {os.path.dirname(path) for path in self.pending}:
+            sync_directory(directory)
+
+    def close(self):
+        """Finishes writing, any batch fsync is done now"""
+        self.sync()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def sync_directory(directory):
+    """Fsyncs a directory so the files created in it are saved"""
+
+    # Directories can't be opened for fsync on Windows.
+    if os.name == "nt":
+        return
+
+    file_descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(file_descriptor)
+    finally:
+        os.close(file_descriptor)
@@ -0,0 +1,199 @@
+"""Servings scaling and cost curves for the Recipe Cost Calculator.
+
+A recipe is written for its Servings. Scaling it to s servings scales
+every Amount Used by s / Servings, so the cost to make goes up in a
+straight line. The shopping cost doesn't: once the scaled amount used is
+more than the Amount Bought, more packs have to be bought, so it goes up
+in steps (packs = amount used / amount bought, rounded up).
+
+The curves over 1 .. N servings are worked out for a whole chunk of
+recipes at once, as an ingredient rows x servings array, instead of
+costing every recipe N times.
+
+    python B02_RCC_Final.py --batch recipes.csv --scale 24 --output curves.csv
+"""
+import sys
+
+import numpy
+
+import rcc_metrics
+import rcc_money
+import rcc_vector
+from rcc_catalogue import PriceCatalogue
+from rcc_packs import PackList
+from rcc_batch import (CHUNK_SIZE, parse_columns, find_error, read_chunks,
+                       write_csv_results, write_jsonl_results)
+
+# Most servings a curve can go up to
+MAX_SCALE = 1000
+
+# Amounts this close above a whole number of packs still fit in those packs
+# (so 3 x 1/3 of a pack is 1 pack, not 2).
+PACK_TOLERANCE = 1e-9
+
+# Columns of the curves, a row per recipe per servings
+CURVE_FIELDS = ["Recipe Name", "Servings", "Packs Bought", "Total Cost to Make",
+                "Cost Per Serve", "Shopping Cost", "Shopping Cost Per Serve", "Error"]
+
+
+# Functions
+
+def scale_columns(recipe_ids, amount_used, unit_used_ids, amount_bought, unit_bought_ids,
+                  prices, servings, densities, max_servings):
+    """Works out the cost curves of columns of ingredients (prices in micro-cents)
+    over 1 .. max_servings servings, the same columns as cost_columns().
+
+    Every recipe needs at least one row. Returns recipes x servings arrays of the total cost to make, cost per serve,
+    packs bought, shopping cost and shopping cost per serve (money in
+    micro-cents), and a mask of the recipes with a row that failed the unit
+    and amount checks."""
+
+    sizes = numpy.arange(1, max_servings + 1, dtype=numpy.int64)
+    row_servings = servings[recipe_ids]
+
+    with rcc_metrics.timer("convert"):
+        converted_amt, valid = rcc_vector.check_rows(amount_used, unit_used_ids,
+                                                     amount_bought, unit_bought_ids, densities)
+
+        # Share of a pack used by each row at its own servings (0 for the rows
+        # that failed the checks).
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            share = numpy.where(valid, amount_used / converted_amt, 0)
+
+        # The share scaled to every size, sizes x rows so each size is one
+        # contiguous run of rows. The arrays are worked on in place.
+        scaled = numpy.multiply.outer(sizes, share)
+        scaled /= row_servings
+
+        # At the recipe's own servings the share is used as it is,
+        # so that point of the curve is exactly what batch mode gives.
+        own = numpy.flatnonzero(row_servings <= max_servings)
+        scaled[row_servings[own] - 1, own] = share[own]
+
+        # Same rounding as cost_to_make_array()
+        costs = scaled * prices
+        costs += 0.5
+        numpy.floor(costs, out=costs)
+        costs = rcc_money.whole_array(costs)
+
+        # Whole packs to buy, at least one of each ingredient.
+        packs = scaled
+        packs -= PACK_TOLERANCE
+        numpy.ceil(packs, out=packs)
+        numpy.maximum(packs, 1, out=packs)
+        packs = packs.astype(numpy.int64)
+        packs *= valid
+
+        # What the packs cost, as Python ints if that could overflow int64.
+        shopping = packs
+        if packs.size > 0 and int(packs.max()) * int(numpy.abs(prices).max()) > rcc_money.MAX_INT64_SUM:
+            shopping = packs.astype(object)
+        shopping = shopping * prices
+
+        # Adds up the rows of each recipe (recipe_ids is in order).
+        starts = numpy.flatnonzero(numpy.r_[True, recipe_ids[1:] != recipe_ids[:-1]])
+        totals, shopping, packs_bought = (
+            rcc_money.sum_runs(column, starts, axis=1).T
+            for column in (costs, shopping, packs))
+
+        per_serve = rcc_money.divide_array(totals, sizes)
+        shopping_per_serve = rcc_money.divide_array(shopping, sizes)
+
+        failed = numpy.bincount(recipe_ids, weights=~valid, minlength=len(servings)) > 0
+
+    rcc_metrics.count("curve_points", len(servings) * max_servings)
+    return totals, per_serve, packs_bought, shopping, shopping_per_serve, failed
+
+
+def to_dollars_array(amounts):
+    """Rounds micro-cents to dollars with two decimal places, like rcc_money.to_dollars()"""
+    return rcc_money.divide_array(amounts, rcc_money.MICROCENTS_PER_CENT) / 100
+
+
+def scale_recipes(recipes, max_servings):
+    """Works out the cost curve of a chunk of recipes over 1 .. max_servings
+    servings and returns the curve rows, max_servings rows per recipe.
+    A recipe that fails a check gets one row with its error."""
+
+    results, costed, columns = parse_columns(recipes)
+    curves = {}  # id(result) -> curve rows of the recipes that passed the checks
+
+    if len(costed) > 0:
+        totals, per_serve, packs, shopping, shopping_per_serve, failed = scale_columns(
+            *columns, max_servings)
+
+        # Turned into Python numbers in one go for all the recipes.
+        totals, per_serve, shopping, shopping_per_serve = (
+            to_dollars_array(money).tolist()
+            for money in (totals, per_serve, shopping, shopping_per_serve))
+        packs = packs.tolist()
+
+        for recipe_id, (result, rows, first_row) in enumerate(costed):
+            if failed[recipe_id]:
+                find_error(result, rows)
+                continue
+
+            curves[id(result)] = [
+                {"Recipe Name": result["Recipe Name"], "Servings": size,
+                 "Packs Bought": packs_bought, "Total Cost to Make": total,
+                 "Cost Per Serve": serve, "Shopping Cost": spent,
+                 "Shopping Cost Per Serve": spent_serve, "Error": ""}
+                for size, packs_bought, total, serve, spent, spent_serve in zip(
+                    range(1, max_servings + 1), packs[recipe_id], totals[recipe_id],
+                    per_serve[recipe_id], shopping[recipe_id], shopping_per_serve[recipe_id])]
+
+    rows = []
+    for result in results:
+        if id(result) in curves:
+            rows.extend(curves[id(result)])
+        else:
+            rows.append({**dict.fromkeys(CURVE_FIELDS, ""), "Recipe Name": result["Recipe Name"],
+                         "Servings": result["Servings"], "Error": result["Error"]})
+
+    return rows
+
+
+def scale_files(filenames, max_servings, catalogue=None, chunk_size=CHUNK_SIZE, packs=None):
+    """Yields the curve rows of every recipe in the recipe files"""
+
+    # Fewer recipes at a time for long curves, so a chunk's arrays stay small.
+    chunk_size = max(1, chunk_size * 10 // max(max_servings, 10))
+
+    for filename in filenames:
+        for chunk in read_chunks([filename], catalogue, chunk_size, packs):
+            yield from scale_recipes(chunk, max_servings)
+
+
+def run_scale(filenames, max_servings, output=None, output_format="csv", catalogue=None,
+              packs=None, fuzzy=False, as_of=None):
+    """Writes the cost curve of every recipe in the recipe files over
+    1 .. max_servings servings to the output file (or the screen).
+    If a price catalogue file is given, it fills in missing Amounts Bought and Prices Paid,
+    and if a pack list file is given, the cheapest packs are picked for the rest.
+    With fuzzy, misspelt ingredient names are matched to the closest catalogue names,
+    and with as_of (a day number) the catalogue prices are the ones it had on that day."""
+
+    price_catalogue = None if catalogue is None else PriceCatalogue(catalogue, fuzzy, as_of)
+    pack_list = None if packs is None else PackList(packs)
+    curves = scale_files(filenames, max_servings, price_catalogue, packs=pack_list)
+
+    try:
+        if output is None:
+            write_curves(curves, sys.stdout, output_format)
+            return
+
+        with open(output, "w", encoding="utf-8", newline="") as file:
+            write_curves(curves, file, output_format)
+
+    finally:
+        if price_catalogue is not None:
+            price_catalogue.close()
+
+
+def write_curves(curves, file, output_format):
+    """Writes the curve rows as csv or json lines as they come in"""
+
+    if output_format == "jsonl":
+        write_jsonl_results(curves, file)
+    else:
+        write_csv_results(curves, file, CURVE_FIELDS)
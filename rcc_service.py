@@ -0,0 +1,284 @@
+"""Local costing service for the Recipe Cost Calculator.
+
+A small asyncio HTTP/JSON server so other tools can cost recipes without
+starting a new Python process each time. It only listens on localhost.
+
+    POST /cost    body: a recipe or a list of recipes (the batch mode JSON format)
+                  reply: the batch mode result row(s)
+    GET /health   reply: {"status": "ok", "queued": ...}
+
+Recipes from requests that arrive close together are put into one
+micro-batch and costed with the columnar engine in a single call.
+Limits keep it from being overloaded: requests over MAX_BODY bytes get
+413, and once MAX_QUEUED recipes are waiting new requests get 503 until
+the queue has room again. A recipe that can't be costed only fails its
+own request (400 if it isn't in the batch mode format, 500 if the
+costing itself failed), never the batch task.
+"""
+import asyncio
+import json
+
+from rcc_batch import cost_recipes
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+MAX_BATCH = 1000         # most recipes costed in one call
+BATCH_WINDOW = 0.002     # seconds to wait for more requests to join a batch
+MAX_QUEUED = 10_000      # most recipes waiting to be costed
+MAX_BODY = 1_000_000     # biggest request body (bytes)
+MAX_CONNECTIONS = 256    # most connections handled at once
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    """An error reply with a status code"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class CostingService:
+    """Micro-batches the recipes of concurrent requests into one costing call"""
+
+    def __init__(self, max_batch=MAX_BATCH, batch_window=BATCH_WINDOW, max_queued=MAX_QUEUED):
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_queued = max_queued
+
+        # (recipe, future for its result row)
+        self.queue = asyncio.Queue()
+        self.queued = 0
+        self.connections = asyncio.Semaphore(MAX_CONNECTIONS)
+        self.batcher = None
+
+    def start(self):
+        """Starts the task that costs the batches"""
+        self.batcher = asyncio.create_task(self.run_batches())
+
+    async def stop(self):
+        """Stops the batch task"""
+
+        if self.batcher is not None:
+            self.batcher.cancel()
+            try:
+                await self.batcher
+            except asyncio.CancelledError:
+                pass
+
+    async def cost(self, recipes):
+        """Queues recipes to be costed and waits for their result rows"""
+
+        if self.queued + len(recipes) > self.max_queued:
+            raise HTTPError(503, "❌ Too many recipes waiting, please try again soon.")
+
+        loop = asyncio.get_running_loop()
+        futures = []
+
+        for recipe in recipes:
+            future = loop.create_future()
+            futures.append(future)
+            self.queue.put_nowait((recipe, future))
+
+        self.queued += len(recipes)
+        return await asyncio.gather(*futures)
+
+    async def run_batches(self):
+        """Collects the queued recipes into batches and costs them"""
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self.queue.get()]
+
+            # Gives other requests a moment to join the batch.
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self.queued -= len(batch)
+
+            # Nothing a batch does can stop the task, or every later request would hang.
+            try:
+                self.cost_batch(batch)
+            except Exception:
+                for recipe, future in batch:
+                    if not future.done():
+                        future.set_exception(HTTPError(500, "❌ The recipes could not be costed."))
+
+    def cost_batch(self, batch):
+        """Costs a batch of (recipe, future) and sets the futures"""
+
+        try:
+            results = cost_recipes([recipe for recipe, future in batch])
+        except Exception:
+            # A recipe the checks let through but the costing can't handle, costs
+            # them one at a time so it doesn't fail the other requests in the batch.
+            results = [cost_one(recipe) for recipe, future in batch]
+
+        for (recipe, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, HTTPError):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def handle_request(self, method, path, body):
+        """Works out the reply (status, data) of a request"""
+
+        if path == "/health":
+            if method != "GET":
+                raise HTTPError(405, "❌ Please use GET.")
+            return 200, {"status": "ok", "queued": self.queued}
+
+        if path != "/cost":
+            raise HTTPError(404, "❌ Not found, please use /cost or /health.")
+
+        if method != "POST":
+            raise HTTPError(405, "❌ Please use POST.")
+
+        try:
+            data = json.loads(body or b"null")
+        except ValueError:
+            raise HTTPError(400, "❌ The body is not valid JSON.") from None
+
+        if isinstance(data, dict):
+            return 200, (await self.cost([data]))[0]
+
+        if isinstance(data, list) and all(isinstance(recipe, dict) for recipe in data):
+            return 200, await self.cost(data)
+
+        raise HTTPError(400, "❌ Please send a recipe or a list of recipes.")
+
+    async def handle_connection(self, reader, writer):
+        """Answers the requests on one connection (keep-alive is supported)"""
+
+        async with self.connections:
+            try:
+                while True:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+
+                    method, path, body, keep_alive = request
+                    try:
+                        status, data = await self.handle_request(method, path, body)
+                    except HTTPError as error:
+                        status, data = error.status, {"Error": str(error)}
+
+                    writer.write(make_response(status, data, keep_alive))
+                    await writer.drain()
+
+                    if not keep_alive:
+                        break
+
+            except HTTPError as error:
+                writer.write(make_response(error.status, {"Error": str(error)}, False))
+                await writer.drain()
+
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass
+
+            finally:
+                writer.close()
+
+
+# Functions
+
+def cost_one(recipe):
+    """Costs a single recipe, returns its result row or an HTTPError
+    (400 for a recipe that isn't in the batch mode format, 500 for anything else)"""
+
+    try:
+        return cost_recipes([recipe])[0]
+    except (ValueError, TypeError, AttributeError):
+        return HTTPError(400, "❌ The recipe is not in the batch mode JSON format.")
+    except Exception:
+        return HTTPError(500, "❌ The recipe could not be costed.")
+
+
+async def read_request(reader):
+    """Reads one HTTP request, returns (method, path, body, keep alive) or None at the end"""
+
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+
+    try:
+        method, path, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "❌ Bad request line.") from None
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+        if length < 0:
+            raise ValueError(length)
+    except ValueError:
+        raise HTTPError(400, "❌ Bad Content-Length.") from None
+
+    if length > MAX_BODY:
+        raise HTTPError(413, f"❌ The body can't be more than {MAX_BODY} bytes.")
+
+    body = await reader.readexactly(length) if length else b""
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+    return method.upper(), path.split("?")[0], body, keep_alive
+
+
+def make_response(status, data, keep_alive):
+    """Makes the bytes of an HTTP response with a JSON body"""
+
+    body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+async def serve(port=PORT, host=HOST):
+    """Runs the costing service until it is stopped"""
+
+    service = CostingService()
+    service.start()
+
+    server = await asyncio.start_server(service.handle_connection, host, port)
+
+    # Port 0 is any free port, the one that was picked is shown.
+    port = server.sockets[0].getsockname()[1]
+    print(f"Recipe Cost Calculator service on http://{host}:{port} (POST /cost)")
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def run_service(port=PORT):
+    """Starts the costing service (stop it with Ctrl+C)"""
+
+    try:
+        asyncio.run(serve(port))
+    except KeyboardInterrupt:
+        pass
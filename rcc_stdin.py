@@ -0,0 +1,264 @@
+"""Bulk stdin mode for the Recipe Cost Calculator (--stdin).
+
+Takes the same answers a person would type into the interactive program
+(one per line, in the same order) but reads them from stdin in large
+blocks instead of one input() call per answer, and prints no prompts,
+instructions or retry messages. An answer that is not valid is skipped
+and the next line is used for the same question, just like typing it
+again, and all of these errors are reported together at the end
+(and the exit status is 1).
+
+Every recipe gets a result row (the batch mode columns) on the screen
+or in the output file, and a report file if the answer to
+"Do you want to record this information in a file" was yes.
+"""
+import sys
+
+import rcc_batch
+import rcc_money
+from rcc_catalogue import PriceCatalogue
+from rcc_records import IngredientTable
+from rcc_report import ReportWriter
+from B02_RCC_Final import (parse_number, parse_amount_and_unit, check_amount_bought,
+                           calculate_cost, valid_filename, make_table, make_report)
+
+# Bytes read from stdin at a time
+BLOCK_SIZE = 1 << 20
+
+
+class EndOfInput(Exception):
+    """The answers ran out before the question was answered"""
+
+
+class StdinSession:
+    """Answers the questions of the interactive program from a stream of answers"""
+
+    def __init__(self, answers, catalogue=None):
+        self.answers = answers   # iterator of (line number, answer)
+        self.catalogue = catalogue
+        self.errors = []         # (line number, question, error message)
+
+    def ask(self, question, check):
+        """Takes answers until one passes the check and returns what the check returns.
+        Answers that don't pass are recorded in the errors."""
+
+        for line_number, answer in self.answers:
+            try:
+                return check(answer)
+            except ValueError as error:
+                self.errors.append((line_number, question, str(error)))
+
+        raise EndOfInput(question)
+
+    def get_recipe(self):
+        """Reads one recipe, the same questions as main() asks.
+        Returns (recipe name, servings, IngredientTable, total cost in micro-cents,
+        write a report)."""
+
+        recipe_name = self.ask("Recipe Name", check_not_blank)
+        servings = self.ask("Servings", lambda answer: parse_number(answer, "integer"))
+        rows = IngredientTable()
+
+        # Added up in micro-cents like batch mode, so the totals are the same.
+        total_cost = 0
+
+        while True:
+            name = self.ask("Ingredient Name", lambda answer: check_ingredient_name(answer, rows))
+            if name.lower() == "xxx":
+                break
+
+            amount_used, unit_used = self.ask("Amount Used", parse_amount_and_unit)
+            bought = self.use_catalogue(name, amount_used, unit_used)
+
+            if bought is None:
+                amount_bought, unit_bought, converted_amt = self.ask(
+                    "Amount Bought", lambda answer: check_bought(answer, name, amount_used, unit_used))
+                price = self.ask("Price Paid", parse_number)
+                bought = amount_bought, unit_bought, converted_amt, price
+
+                if self.catalogue is not None:
+                    self.catalogue.save(name, amount_bought, unit_bought, price, exact=True)
+
+            amount_bought, unit_bought, converted_amt, price = bought
+            rows.add(name, amount_used, unit_used, amount_bought, unit_bought, price,
+                     calculate_cost(price, amount_used, converted_amt))
+            total_cost += rcc_money.cost_to_make(rcc_money.from_dollars(price), amount_used,
+                                                 converted_amt)
+
+        want_file = self.ask("Record in a file", check_yes_no)
+        return recipe_name, servings, rows, total_cost, want_file == "yes"
+
+    def use_catalogue(self, name, amount_used, unit_used):
+        """Takes the yes / no answer for a catalogue entry, the same as use_catalogue().
+        Returns (amount bought, unit bought, converted amount, price) or None."""
+
+        entry = None if self.catalogue is None else self.catalogue.match(name)[1]
+        if entry is None:
+            return None
+
+        amount_bought, unit_bought, price = entry
+        try:
+            converted_amt = check_amount_bought(amount_used, unit_used, amount_bought, unit_bought, name)
+        except ValueError:
+            return None
+
+        if self.ask("Use the catalogue", check_yes_no) == "no":
+            return None
+
+        return amount_bought, unit_bought, converted_amt, price
+
+    def recipes(self):
+        """Yields every recipe in the answers. A recipe cut off by the
+        end of the answers is recorded in the errors."""
+
+        # The first answer is whether to show the instructions.
+        try:
+            self.ask("Instructions", check_yes_no)
+
+            while True:
+                yield self.get_recipe()
+
+                restart = self.ask("Return to the start", check_not_blank)
+                if restart.lower() != "r":
+                    return
+
+        except EndOfInput as end:
+            if str(end) != "Return to the start":
+                self.errors.append((None, str(end), "❌ The answers ended before this question."))
+
+
+# Functions
+
+def check_not_blank(answer):
+    """Checks an answer is not blank, the same as not_blank()"""
+
+    answer = answer.strip()
+    if answer == "":
+        raise ValueError("❌ Sorry, this can't be blank.")
+    return answer
+
+
+def check_yes_no(answer):
+    """Checks an answer is yes / no / y / n, the same as yes_no_check()"""
+
+    answer = answer.lower()
+    if answer == "y" or answer == "yes":
+        return "yes"
+    if answer == "n" or answer == "no":
+        return "no"
+    raise ValueError("Please answer yes / no (y / n)")
+
+
+def check_ingredient_name(answer, rows):
+    """Checks an ingredient name ('xxx' finishes the recipe once it has an ingredient)"""
+
+    name = check_not_blank(answer)
+    if name.lower() == "xxx" and len(rows) == 0:
+        raise ValueError("❌ You must enter at least one ingredient!")
+    return name
+
+
+def check_bought(answer, name, amount_used, unit_used):
+    """Checks an Amount Bought answer against the Amount Used.
+    Returns the amount bought, unit bought and converted amount bought."""
+
+    amount_bought, unit_bought = parse_amount_and_unit(answer)
+    return amount_bought, unit_bought, check_amount_bought(amount_used, unit_used,
+                                                           amount_bought, unit_bought, name)
+
+
+def read_answers(stream, block_size=BLOCK_SIZE):
+    """Yields (line number, answer) for every line of a binary stream,
+    reading it in large blocks"""
+
+    line_number = 0
+    leftover = b""
+
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+
+        lines = (leftover + block).split(b"\n")
+        leftover = lines.pop()
+
+        for line in lines:
+            line_number += 1
+            yield line_number, line.decode("utf-8", "replace").rstrip("\r")
+
+    # The last line doesn't need a new line at the end.
+    if leftover:
+        yield line_number + 1, leftover.decode("utf-8", "replace").rstrip("\r")
+
+
+def cost_recipe(recipe_name, servings, rows, total_cost, report_writer=None):
+    """Returns the result row of a recipe (its IngredientTable and total cost in
+    micro-cents), rounded the same way as batch mode.
+    If a report writer is given, the report is written too."""
+
+    total_cost_per_serving = rcc_money.to_dollars(rcc_money.divide(total_cost, servings))
+    total_cost = rcc_money.to_dollars(total_cost)
+
+    if report_writer is not None:
+        to_write = make_report(recipe_name, servings, make_table(rows.columns(), 'psql'),
+                               total_cost, total_cost_per_serving)
+        report_writer.write_report(valid_filename(recipe_name), to_write)
+
+    return {"Recipe Name": recipe_name, "Servings": servings, "Ingredients": len(rows),
+            "Total Cost to Make": total_cost, "Cost Per Serve": total_cost_per_serving, "Error": ""}
+
+
+def cost_answers(session, report_writer):
+    """Yields the result row of every recipe in the answers"""
+
+    for recipe_name, servings, rows, total_cost, want_file in session.recipes():
+        yield cost_recipe(recipe_name, servings, rows, total_cost,
+                          report_writer if want_file else None)
+
+
+def print_errors(errors, file=sys.stderr):
+    """Prints all the answers that were not valid in one go"""
+
+    if len(errors) == 0:
+        return
+
+    were = "1 answer was" if len(errors) == 1 else f"{len(errors)} answers were"
+    lines = [f"❌ {were} not valid (the next line was used instead):"]
+    for line_number, question, error in errors:
+        where = "end of input" if line_number is None else f"line {line_number}"
+        lines.append(f"{where} ({question}): {error}")
+
+    file.write("\n".join(lines) + "\n")
+
+
+def run_stdin(output=None, output_format="csv", reports=None, durability="batch", shards=0,
+              catalogue=None, stream=None, fuzzy=False):
+    """Costs the recipes answered on stdin (or stream) and writes the result rows
+    to the output file (or the screen). Reports go into the reports folder
+    (default: the current folder, like the interactive program).
+    With fuzzy, misspelt ingredient names are offered the closest catalogue entry.
+    Returns the exit status: 1 if any answers were not valid, otherwise 0."""
+
+    writer = rcc_batch.write_jsonl_results if output_format == "jsonl" else rcc_batch.write_csv_results
+    stream = sys.stdin.buffer if stream is None else stream
+
+    price_catalogue = None if catalogue is None else PriceCatalogue(catalogue, fuzzy)
+    session = StdinSession(read_answers(stream), price_catalogue)
+
+    try:
+        with ReportWriter(reports or ".", durability, shards) as report_writer:
+            results = cost_answers(session, report_writer)
+
+            if output is None:
+                writer(results, sys.stdout)
+            else:
+                with open(output, "w", encoding="utf-8", newline="") as file:
+                    writer(results, file)
+
+    finally:
+        if price_catalogue is not None:
+            price_catalogue.commit()
+            price_catalogue.close()
+
+    print_errors(session.errors)
+    return 1 if session.errors else 0
@@ -0,0 +1,338 @@
+"""Memory-mapped columnar recipe store for the Recipe Cost Calculator.
+
+A big recipe catalogue is converted once from its CSV / JSON files into
+a folder of binary columns, and batch mode then costs it straight from
+the disk with numpy.memmap: opening a store only reads the small
+store.json file, and costing only pages in the columns (and the parts of
+them) that it needs. Ingredient names are only read for the recipes that
+fail a check or get a report written.
+
+    store.json                 column types, counts, the unit names and the currency
+    recipe_offsets.bin         int64, first ingredient row of every recipe (+ the end)
+    servings.bin               int64, servings of every recipe
+    recipe_names.bin           utf-8 recipe names, one after the other
+    recipe_name_offsets.bin    int64, where each recipe name starts (+ the end)
+    amount_used.bin            float64, one per ingredient row
+    unit_used.bin              int16, unit id (position in units_dict)
+    amount_bought.bin          float64
+    unit_bought.bin            int16
+    price.bin                  int64, price paid in micro-cents (rcc_money) of the
+                               reporting currency the store was made with
+    ingredient_names.bin       utf-8 ingredient names
+    ingredient_name_offsets.bin  int64
+
+Only recipes that pass the parsing checks are stored, the converter
+reports the others. The unit and amount checks are done when the store
+is costed, with the same error messages as batch mode.
+
+    python B02_RCC_Final.py --batch recipes.csv --make-store recipes.rccstore
+    python B02_RCC_Final.py --batch recipes.rccstore --output results.csv
+"""
+import json
+import os
+
+import numpy
+
+import rcc_metrics
+import rcc_money
+import rcc_vector
+from rcc_currency import REPORT_CURRENCY, currency_table
+from rcc_units import unit_registry
+from rcc_catalogue import PriceCatalogue
+from rcc_packs import PackList
+from rcc_batch import (CHUNK_SIZE, new_result, parse_recipe, find_error, cost_columns,
+                       write_recipe_report, export_recipes, read_chunks)
+
+STORE_VERSION = 1
+STORE_SUFFIX = ".rccstore"
+
+# Column name -> NumPy type (little endian)
+RECIPE_COLUMNS = {"recipe_offsets": "<i8", "servings": "<i8",
+                  "recipe_names": "u1", "recipe_name_offsets": "<i8"}
+ROW_COLUMNS = {"amount_used": "<f8", "unit_used": "<i2", "amount_bought": "<f8",
+               "unit_bought": "<i2", "price": "<i8",
+               "ingredient_names": "u1", "ingredient_name_offsets": "<i8"}
+COLUMNS = {**RECIPE_COLUMNS, **ROW_COLUMNS}
+
+
+class RecipeStore:
+    """A recipe store opened read-only with memory-mapped columns"""
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(os.path.join(path, "store.json"), encoding="utf-8") as file:
+            meta = json.load(file)
+
+        if meta.get("version") != STORE_VERSION:
+            raise ValueError(f"❌ {path} is not a version {STORE_VERSION} recipe store.")
+
+        self.recipes = meta["recipes"]
+        self.rows = meta["rows"]
+
+        # Unit ids of the store -> unit ids of this program (in case units_dict changed).
+        self.unit_names = meta["units"]
+        missing = [name for name in self.unit_names if name not in unit_registry.ids]
+        if missing:
+            raise ValueError(f"❌ {path} uses units that are not defined: {', '.join(missing)} "
+                             f"(use the same --units file it was made with).")
+        self.unit_map = numpy.array([unit_registry.ids[name] for name in self.unit_names],
+                                    dtype=numpy.intp)
+
+        # Prices are converted if the store was made with another reporting currency.
+        self.currency = meta.get("currency", REPORT_CURRENCY)
+        if self.currency not in currency_table.ids:
+            raise ValueError(f"❌ {path} has prices in {self.currency}, there is no exchange rate "
+                             f"for it (use --rates or --currency {self.currency}).")
+        self.currency_id = currency_table.ids[self.currency]
+        self.price_rate = currency_table.rates[self.currency_id]
+
+        self.columns = {name: self.map_column(name, meta["lengths"][name]) for name in COLUMNS}
+
+    def map_column(self, name, length):
+        """Memory maps one column (memmap can't map an empty file)"""
+
+        if length == 0:
+            return numpy.zeros(0, dtype=COLUMNS[name])
+
+        return numpy.memmap(os.path.join(self.path, f"{name}.bin"), dtype=COLUMNS[name],
+                            mode="r", shape=(length,))
+
+    def __len__(self):
+        return self.recipes
+
+    def recipe_name(self, recipe_id):
+        """Reads the name of a recipe"""
+        return self.read_text("recipe_names", "recipe_name_offsets", recipe_id)
+
+    def read_text(self, blob, offsets, position):
+        """Reads one string out of a names column"""
+
+        start, end = self.columns[offsets][position:position + 2]
+        return bytes(self.columns[blob][start:end]).decode("utf-8")
+
+    def row_names(self, rows):
+        """Reads the ingredient names of some rows (in order)"""
+
+        offsets = self.columns["ingredient_name_offsets"]
+        blob = self.columns["ingredient_names"]
+        return [bytes(blob[offsets[row]:offsets[row + 1]]).decode("utf-8") for row in rows.tolist()]
+
+    def recipe_rows(self, recipe_id):
+        """Reads the ingredient rows of a recipe as (name, amount used, unit used,
+        amount bought, unit bought, price in dollars, currency id of the price)"""
+
+        columns = self.columns
+        start, end = columns["recipe_offsets"][recipe_id:recipe_id + 2].tolist()
+
+        # Each column is sliced once, then read as Python values.
+        name_offsets = columns["ingredient_name_offsets"][start:end + 1].tolist()
+        names = bytes(columns["ingredient_names"][name_offsets[0]:name_offsets[-1]])
+        units_used = [self.unit_names[unit] for unit in columns["unit_used"][start:end].tolist()]
+        units_bought = [self.unit_names[unit] for unit in columns["unit_bought"][start:end].tolist()]
+
+        return [(names[name_offsets[row] - name_offsets[0]:
+                       name_offsets[row + 1] - name_offsets[0]].decode("utf-8"),
+                 read_amount(amount_used, unit_used), unit_used,
+                 read_amount(amount_bought, unit_bought), unit_bought,
+                 price / rcc_money.MICROCENTS, self.currency_id)
+                for row, amount_used, unit_used, amount_bought, unit_bought, price in zip(
+                    range(end - start), columns["amount_used"][start:end].tolist(), units_used,
+                    columns["amount_bought"][start:end].tolist(), units_bought,
+                    columns["price"][start:end].tolist())]
+
+    def cost_range(self, first, last, report_writer=None, exporter=None):
+        """Costs the recipes first .. last - 1 and returns their result rows,
+        the same as batch mode would for the recipe files"""
+
+        columns = self.columns
+        offsets = numpy.asarray(columns["recipe_offsets"][first:last + 1])
+        start, end = int(offsets[0]), int(offsets[-1])
+
+        # Only these slices of the columns are read from the disk.
+        with rcc_metrics.timer("parse"):
+            recipe_ids = numpy.repeat(numpy.arange(last - first, dtype=numpy.intp), numpy.diff(offsets))
+            servings = numpy.asarray(columns["servings"][first:last])
+            amount_used = numpy.asarray(columns["amount_used"][start:end])
+            amount_bought = numpy.asarray(columns["amount_bought"][start:end])
+            unit_used_ids = self.unit_map[columns["unit_used"][start:end]]
+            unit_bought_ids = self.unit_map[columns["unit_bought"][start:end]]
+            prices = numpy.asarray(columns["price"][start:end])
+            if self.price_rate != 1:
+                prices = numpy.rint(prices * self.price_rate).astype(numpy.int64)
+
+            # Ingredient names are only read for rows between mass and volume.
+            densities = rcc_vector.row_densities(unit_used_ids, unit_bought_ids,
+                                                 lambda rows: self.row_names(rows + start))
+
+            # The names of the recipes, read in one go.
+            name_offsets = numpy.asarray(columns["recipe_name_offsets"][first:last + 1])
+            names = bytes(columns["recipe_names"][name_offsets[0]:name_offsets[-1]])
+            name_offsets = (name_offsets - name_offsets[0]).tolist()
+
+        rcc_metrics.count("rows_parsed", end - start)
+
+        costs, totals, per_serve, failed = cost_columns(recipe_ids, amount_used, unit_used_ids,
+                                                        amount_bought, unit_bought_ids,
+                                                        prices, servings, densities)
+        results = []
+        exported = {}  # id(result) -> (rows, costs) of the costed recipes
+
+        for recipe_id in range(last - first):
+            name = names[name_offsets[recipe_id]:name_offsets[recipe_id + 1]].decode("utf-8")
+            result = new_result({"Recipe Name": name})
+            result["Servings"] = int(servings[recipe_id])
+            results.append(result)
+
+            # The scalar check finds the row that failed and gives its error message.
+            if failed[recipe_id]:
+                find_error(result, self.recipe_rows(first + recipe_id))
+                continue
+
+            first_row, last_row = offsets[recipe_id] - start, offsets[recipe_id + 1] - start
+            result["Ingredients"] = int(last_row - first_row)
+            result["Total Cost to Make"] = rcc_money.to_dollars(int(totals[recipe_id]))
+            result["Cost Per Serve"] = rcc_money.to_dollars(int(per_serve[recipe_id]))
+
+            if report_writer is not None or exporter is not None:
+                rows = self.recipe_rows(first + recipe_id)
+                recipe_costs = costs[first_row:last_row].tolist()
+                exported[id(result)] = (rows, recipe_costs)
+
+            if report_writer is not None:
+                write_recipe_report(report_writer, result["Recipe Name"], result["Servings"],
+                                    rows, recipe_costs,
+                                    int(totals[recipe_id]), int(per_serve[recipe_id]))
+
+        export_recipes(exporter, results, exported)
+        return results
+
+    def ranges(self, size=CHUNK_SIZE):
+        """Yields (first, last) recipe ranges of up to size recipes"""
+
+        for first in range(0, self.recipes, size):
+            yield first, min(first + size, self.recipes)
+
+    def cost(self, report_writer=None, exporter=None):
+        """Yields the result row of every recipe in the store"""
+
+        for first, last in self.ranges():
+            yield from self.cost_range(first, last, report_writer, exporter)
+
+
+# Functions
+
+def is_store(filename):
+    """Checks if a batch file name is a recipe store"""
+    return filename.endswith(STORE_SUFFIX) or os.path.isfile(os.path.join(filename, "store.json"))
+
+
+def read_amount(value, unit):
+    """Turns a stored amount back into what parsing gave (amounts with no unit are whole numbers)"""
+    return int(value) if unit is None else float(value)
+
+
+def make_store(filenames, path, catalogue=None, packs=None):
+    """Converts recipe files into a recipe store at path.
+    Yields an error result row for every recipe that could not be stored."""
+
+    os.makedirs(path, exist_ok=True)
+
+    # The store.json of an old store goes first, so a store that is being
+    # written over can't be opened with half of its columns rewritten.
+    try:
+        os.remove(os.path.join(path, "store.json"))
+    except FileNotFoundError:
+        pass
+
+    files = {name: open(os.path.join(path, f"{name}.bin"), "wb") for name in COLUMNS}
+    lengths = dict.fromkeys(COLUMNS, 0)
+    recipes = rows = recipe_name_bytes = ingredient_name_bytes = 0
+
+    def write(name, values):
+        array = numpy.asarray(values, dtype=COLUMNS[name])
+        array.tofile(files[name])
+        lengths[name] += len(array)
+
+    try:
+        for chunk in read_chunks(filenames, catalogue, packs=packs):
+            recipe_columns = {name: [] for name in RECIPE_COLUMNS}
+            row_columns = {name: [] for name in ROW_COLUMNS}
+            row_columns["currency"] = []
+
+            for recipe in chunk:
+                try:
+                    servings, recipe_rows = parse_recipe(recipe)
+                except ValueError as error:
+                    result = new_result(recipe)
+                    result["Error"] = str(error)
+                    yield result
+                    continue
+
+                name = str(recipe["Recipe Name"]).strip().encode("utf-8")
+                recipe_columns["recipe_offsets"].append(rows)
+                recipe_columns["servings"].append(servings)
+                recipe_columns["recipe_names"].append(name)
+                recipe_columns["recipe_name_offsets"].append(recipe_name_bytes)
+                recipe_name_bytes += len(name)
+                recipes += 1
+
+                for ingredient_name, amount_used, unit_used, amount_bought, unit_bought, price, \
+                        currency_id in recipe_rows:
+                    ingredient_name = ingredient_name.encode("utf-8")
+                    row_columns["amount_used"].append(amount_used)
+                    row_columns["unit_used"].append(unit_registry.ids[unit_used])
+                    row_columns["amount_bought"].append(amount_bought)
+                    row_columns["unit_bought"].append(unit_registry.ids[unit_bought])
+                    row_columns["price"].append(price)
+                    row_columns["currency"].append(currency_id)
+                    row_columns["ingredient_names"].append(ingredient_name)
+                    row_columns["ingredient_name_offsets"].append(ingredient_name_bytes)
+                    ingredient_name_bytes += len(ingredient_name)
+                    rows += 1
+
+            # Names are written as raw bytes, prices as micro-cents of the reporting currency.
+            recipe_columns["recipe_names"] = numpy.frombuffer(
+                b"".join(recipe_columns["recipe_names"]), dtype=numpy.uint8)
+            row_columns["ingredient_names"] = numpy.frombuffer(
+                b"".join(row_columns["ingredient_names"]), dtype=numpy.uint8)
+            row_columns["price"] = rcc_money.from_dollars_array(
+                currency_table.to_report_array(row_columns["price"], row_columns.pop("currency")))
+
+            for name, values in {**recipe_columns, **row_columns}.items():
+                write(name, values)
+
+        # The end of the last recipe (and of the last names).
+        write("recipe_offsets", [rows])
+        write("recipe_name_offsets", [recipe_name_bytes])
+        write("ingredient_name_offsets", [ingredient_name_bytes])
+
+    finally:
+        for file in files.values():
+            file.close()
+
+    # Written last (and renamed into place), so a store that was not finished can't be opened.
+    with open(os.path.join(path, "store.json.tmp"), "w", encoding="utf-8") as file:
+        json.dump({"version": STORE_VERSION, "recipes": recipes, "rows": rows,
+                   "units": unit_registry.names, "currency": currency_table.report,
+                   "lengths": lengths}, file, indent=2)
+    os.replace(os.path.join(path, "store.json.tmp"), os.path.join(path, "store.json"))
+
+
+def run_make_store(filenames, path, catalogue=None, packs=None, fuzzy=False, as_of=None):
+    """Converts recipe files into a recipe store and prints the recipes that were left out
+    (with as_of, a day number, the catalogue prices are the ones it had on that day)"""
+
+    price_catalogue = None if catalogue is None else PriceCatalogue(catalogue, fuzzy, as_of)
+    pack_list = None if packs is None else PackList(packs)
+    left_out = 0
+
+    try:
+        for result in make_store(filenames, path, price_catalogue, pack_list):
+            print(f"{result['Recipe Name'] or '(no name)'}: {result['Error']}")
+            left_out += 1
+    finally:
+        if price_catalogue is not None:
+            price_catalogue.close()
+
+    print(f"Saved the recipe store to {path} ({left_out} recipes left out)")
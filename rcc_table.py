@@ -0,0 +1,153 @@
+"""Plain-text table renderer for the Recipe Cost Calculator.
+
+Draws the 'psql' (report files) and 'fancy_grid' (screen) tables exactly
+the way tabulate does, without importing it. The column widths and
+types are worked out in one pass over the raw values of the recipe
+dictionary, then the lines are built a row at a time.
+
+It only handles the tables the program makes: single line ASCII text
+cells with no spaces around them, in text or whole number columns.
+For anything else (decimal number columns, wide characters, colour
+codes, line breaks) render_table() returns None and make_table() uses
+tabulate, so the output is always the same.
+"""
+import re
+
+# tabulate's pattern for numbers like 1,234.5
+THOUSANDS_PATTERN = re.compile(r"^(([+-]?[0-9]{1,3})(?:,([0-9]{3}))*)?(?(1)\.[0-9]*|\.[0-9]+)?$")
+
+# Extra width tabulate gives every header
+MIN_PADDING = 2
+
+# Cell types, from the least to the most generic (as tabulate sorts them)
+EMPTY, TRUE_FALSE, WHOLE_NUMBER, DECIMAL_NUMBER, TEXT = 0, 1, 2, 3, 5
+
+# Table format -> (line above, line below header, line between rows, line below, row)
+# Each line is (begin, fill, separator, end) and the row is (begin, separator, end).
+TABLE_FORMATS = {
+    "psql": (("+", "-", "+", "+"), ("|", "-", "+", "|"), None, ("+", "-", "+", "+"),
+             ("|", "|", "|")),
+    "fancy_grid": (("╒", "═", "╤", "╕"), ("╞", "═", "╪", "╡"), ("├", "─", "┼", "┤"),
+                   ("╘", "═", "╧", "╛"), ("│", "│", "│")),
+}
+
+
+# Functions
+
+def cell_type(value):
+    """Works out the type tabulate would give a (stripped, ASCII) cell"""
+
+    if value == "":
+        return EMPTY
+    if value == "True" or value == "False":
+        return TRUE_FALSE
+
+    # Most cells end in a unit or a letter, they can only be
+    # numbers if they are "inf", "nan" or "infinity".
+    if value[-1].isalpha() and not value.lower().endswith(("inf", "nan", "infinity")):
+        return TEXT
+
+    try:
+        int(value)
+        return WHOLE_NUMBER
+    except ValueError:
+        pass
+
+    if THOUSANDS_PATTERN.match(value):
+        return DECIMAL_NUMBER if "." in value else WHOLE_NUMBER
+
+    try:
+        number = float(value)
+    except ValueError:
+        return TEXT
+
+    # Numbers too big for a float only count as numbers when they are written as inf / nan.
+    if number != number or number in (float("inf"), float("-inf")):
+        return DECIMAL_NUMBER if value.lower() in ("inf", "-inf", "nan") else TEXT
+
+    return DECIMAL_NUMBER
+
+
+def column_layout(header, values):
+    """Works out the width and alignment ("left" / "right") of a column in one pass.
+    Returns None if the column needs tabulate."""
+
+    width = len(header) + MIN_PADDING
+    column_type = TRUE_FALSE
+
+    for value in values:
+        if (type(value) is not str or not value.isascii() or value != value.strip()
+                or "\n" in value or "\r" in value or "\x1b" in value):
+            return None
+
+        width = max(width, len(value))
+        if column_type != TEXT:
+            column_type = max(column_type, cell_type(value))
+
+    if column_type == DECIMAL_NUMBER:
+        return None
+
+    return width, "right" if column_type == WHOLE_NUMBER else "left"
+
+
+def make_line(widths, line):
+    """Makes a horizontal line of the table"""
+
+    begin, fill, separator, end = line
+    return (begin + separator.join(fill * (width + 2) for width in widths) + end).rstrip()
+
+
+def make_row(cells, widths, aligns, row):
+    """Makes a row of the table, padding each cell to its column width"""
+
+    begin, separator, end = row
+    padded = [f" {cell:>{width}} " if align == "right" else f" {cell:<{width}} "
+              for cell, width, align in zip(cells, widths, aligns)]
+    return (begin + separator.join(padded) + end).rstrip()
+
+
+def table_lines(recipe_dict, tablefmt, layout):
+    """Yields the lines of the table one at a time"""
+
+    line_above, line_below_header, line_between_rows, line_below, row = TABLE_FORMATS[tablefmt]
+    widths = [width for width, align in layout]
+    aligns = [align for width, align in layout]
+
+    yield make_line(widths, line_above)
+    yield make_row(recipe_dict.keys(), widths, aligns, row)
+    yield make_line(widths, line_below_header)
+
+    between = None if line_between_rows is None else make_line(widths, line_between_rows)
+    for number, cells in enumerate(zip(*recipe_dict.values())):
+        if number and between is not None:
+            yield between
+        yield make_row(cells, widths, aligns, row)
+
+    yield make_line(widths, line_below)
+
+
+def render_table(recipe_dict, tablefmt):
+    """Draws the dictionary of columns as a table, the same as
+    tabulate(recipe_dict, headers='keys', tablefmt=tablefmt, showindex=False).
+    Returns None if the table has to be drawn by tabulate."""
+
+    if tablefmt not in TABLE_FORMATS:
+        return None
+
+    columns = list(recipe_dict.values())
+    if len(columns) == 0 or len(columns[0]) == 0 or any(len(column) != len(columns[0])
+                                                        for column in columns):
+        return None
+
+    layout = []
+    for header, values in recipe_dict.items():
+        column = None
+        if (type(header) is str and header.isascii()
+                and "\n" not in header and "\r" not in header and "\x1b" not in header):
+            column = column_layout(header, values)
+
+        if column is None:
+            return None
+        layout.append(column)
+
+    return "\n".join(table_lines(recipe_dict, tablefmt, layout))
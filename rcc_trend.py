@@ -0,0 +1,129 @@
+"""Recipe cost trends for the Recipe Cost Calculator.
+
+Costs every recipe from FROM to TO on each day that the price of one of
+its catalogue ingredients changed (and on FROM), from the catalogue's
+price history (rcc_history). Like --as-of, only the ingredients with no
+Amount Bought and Price Paid are filled in from the catalogue, so every
+point of a trend is the cost --as-of that day gives.
+
+The days are found by binary searching the sorted days of each
+ingredient's prices, and the points of many recipes are costed together
+by the columnar engine, a chunk at a time.
+
+    python B02_RCC_Final.py --batch recipes.csv --catalogue prices.db --trend 2024-01-01 2024-12-31
+"""
+import sys
+from datetime import date
+from itertools import islice
+
+import rcc_metrics
+from rcc_catalogue import PriceCatalogue
+from rcc_batch import (CHUNK_SIZE, RESULT_FIELDS, cost_recipes, fill_ingredient, read_recipes,
+                       recipe_ingredients, write_csv_results, write_jsonl_results)
+
+# Columns of the trends, a row per recipe per day
+TREND_FIELDS = ["Recipe Name", "Date"] + RESULT_FIELDS[1:]
+
+
+# Functions
+
+def catalogue_ingredients(recipe, catalogue):
+    """Returns the indexes and catalogue names of the ingredients with no
+    Amount Bought and Price Paid (the ones filled in from the catalogue)"""
+
+    indexes = []
+    keys = []
+
+    if not recipe_ingredients(recipe):
+        return indexes, keys
+
+    for index, ingredient in enumerate(recipe["Ingredients"]):
+        if not isinstance(ingredient, dict):
+            continue
+
+        bought = str(ingredient.get("Amount Bought") or "").strip()
+        price = str(ingredient.get("Price Paid") or "").strip()
+
+        if bought == "" and price == "":
+            indexes.append(index)
+            keys.append(catalogue.canonical(str(ingredient.get("Ingredient Name") or "")))
+
+    return indexes, keys
+
+
+def recipe_on(recipe, indexes, keys, catalogue, day):
+    """A copy of the recipe with its catalogue ingredients filled in with the prices on a day"""
+
+    if not indexes:
+        return recipe
+
+    ingredients = list(recipe.get("Ingredients") or [])
+
+    for index, key in zip(indexes, keys):
+        entry = catalogue.price_on(key, day)
+        if entry is not None:
+            ingredients[index] = dict(ingredients[index])
+            fill_ingredient(ingredients[index], entry)
+
+    return {**recipe, "Ingredients": ingredients}
+
+
+def trend_points(recipes, catalogue, start, end):
+    """Yields (day, the recipe on that day) for every point of the trends of the recipes"""
+
+    for recipe in recipes:
+        indexes, keys = catalogue_ingredients(recipe, catalogue)
+
+        for day in catalogue.history.change_days(keys, start, end):
+            yield day, recipe_on(recipe, indexes, keys, catalogue, day)
+
+
+def trend_files(filenames, catalogue, start, end, chunk_size=CHUNK_SIZE):
+    """Yields the trend rows of every recipe in the recipe files"""
+
+    for filename in filenames:
+        points = trend_points(read_recipes(filename), catalogue, start, end)
+
+        while True:
+            chunk = list(islice(points, chunk_size))
+            if len(chunk) == 0:
+                break
+
+            days = [day for day, recipe in chunk]
+            results = cost_recipes([recipe for day, recipe in chunk])
+            rcc_metrics.count("trend_points", len(chunk))
+
+            for day, result in zip(days, results):
+                yield {"Recipe Name": result["Recipe Name"], "Date": date.fromordinal(day).isoformat(),
+                       **result}
+
+
+def run_trend(filenames, start, end, output=None, output_format="csv", catalogue=None, fuzzy=False):
+    """Writes the cost trend of every recipe in the recipe files from start to end
+    (day numbers) to the output file (or the screen), using the price history of
+    the catalogue file. With fuzzy, misspelt ingredient names are matched to the
+    closest catalogue names."""
+
+    # Opened as of a day, so the catalogue is only read.
+    price_catalogue = PriceCatalogue(catalogue, fuzzy, start)
+    trends = trend_files(filenames, price_catalogue, start, end)
+
+    try:
+        if output is None:
+            write_trends(trends, sys.stdout, output_format)
+            return
+
+        with open(output, "w", encoding="utf-8", newline="") as file:
+            write_trends(trends, file, output_format)
+
+    finally:
+        price_catalogue.close()
+
+
+def write_trends(trends, file, output_format):
+    """Writes the trend rows as csv or json lines as they come in"""
+
+    if output_format == "jsonl":
+        write_jsonl_results(trends, file)
+    else:
+        write_csv_results(trends, file, TREND_FIELDS)
@@ -0,0 +1,364 @@
+"""Unit registry for the Recipe Cost Calculator.
+
+Built once at start up from units_dict. Every unit alias gets an integer
+id, and the conversion between every pair of units is worked out up
+front, so checking and converting two units is a single lookup.
+Amount strings ("250ml", "2 cups", "3 fl oz") are parsed with a
+precompiled pattern and remembered in a bounded LRU cache, so repeated
+strings skip parsing.
+
+Units are a graph: more units can be defined in terms of any unit that
+is already known ("pinch" = 1/16 tsp, "stick" = 113 g, "dash" = 2 pinch).
+The graph is searched once, when the units are defined, and each new
+unit gets its base unit and factor like the built in ones.
+
+Mass and volume are bridged by the density of the ingredient (grams per
+millilitre), so "used 2 cups of flour, bought 1kg" can be costed. The
+conversion between two units for an ingredient is worked out the first
+time it is asked for and remembered for that (unit, unit, ingredient).
+
+A unit that isn't known gets a "did you mean" from a trigram index of the
+unit names (rcc_fuzzy), made the first time a unit is misspelt.
+"""
+import json
+import math
+import re
+from collections import deque
+from functools import lru_cache
+
+from rcc_catalogue import normalize_name
+
+# Amount with a unit, e.g. 100g, 25.5 millilitres, 3 tablespoons or 2 fl oz
+AMOUNT_PATTERN = re.compile(r"([0-9]*\.?[0-9]+)\s*([a-zA-Z]+(?:\s+[a-zA-Z]+)*)")
+
+# Unit names that can be defined (the unit part of AMOUNT_PATTERN)
+UNIT_NAME_PATTERN = re.compile(r"[a-z]+(?: [a-z]+)*")
+
+# Number of different amount strings remembered by the parse cache
+PARSE_CACHE_SIZE = 8192
+
+# Number of (unit, unit, ingredient) conversions remembered
+CONVERSION_CACHE_SIZE = 65536
+
+# Base units that an ingredient's density bridges
+MASS_BASE = "g"
+VOLUME_BASE = "ml"
+
+# Least similarity for a unit to be suggested (unit names are short, so a bit lower
+# than for ingredient names: kgs -> kg)
+SUGGEST_CUTOFF = 0.4
+
+
+class UnitRegistry:
+    """Unit aliases interned to ids, with precomputed conversion factors"""
+
+    def __init__(self, units, densities=None, cache_size=PARSE_CACHE_SIZE):
+
+        # name -> (base unit, factor), more are added by define_units().
+        self.units = dict(units)
+
+        # Ingredient (normalized name) -> grams per millilitre
+        self.densities = {}
+
+        # Units and densities added after start up (so they can be given to other processes)
+        self.user_units = {}
+        self.user_densities = {}
+
+        self.parse_cached = lru_cache(maxsize=cache_size)(self.parse_uncached)
+        self.conversion = lru_cache(maxsize=CONVERSION_CACHE_SIZE)(self.find_conversion)
+        self.density = lru_cache(maxsize=CONVERSION_CACHE_SIZE)(self.find_density)
+
+        self.build_tables()
+        for name, density in (densities or {}).items():
+            self.densities[normalize_name(name)] = density
+
+    def build_tables(self):
+        """Works out the unit ids and the conversion tables from the units"""
+
+        # Unit ids, the position of each alias in the units dictionary.
+        self.names = list(self.units)
+        self.ids = {name: unit_id for unit_id, name in enumerate(self.names)}
+
+        # Base unit id and factor of every unit id.
+        self.base_names = list(dict.fromkeys(base for base, factor in self.units.values()))
+        self.bases = [self.base_names.index(self.units[name][0]) for name in self.names]
+        self.factors = [self.units[name][1] for name in self.names]
+
+        # Base unit x base unit factors, None where the base units can't be converted
+        # (mass and volume are only bridged for an ingredient with a density).
+        self.base_table = [[1 if base_1 == base_2 else None for base_2 in range(len(self.base_names))]
+                           for base_1 in range(len(self.base_names))]
+
+        # Unit x unit table of (multiply by, divide by) pairs, None where the units
+        # are not compatible. Keeping the two factors apart gives exactly the
+        # same numbers as quantity * factor_1 / factor_2.
+        self.table = [[self.make_conversion(unit_1, unit_2) for unit_2 in range(len(self.names))]
+                      for unit_1 in range(len(self.names))]
+
+        # The same conversions looked up by the unit aliases, unit -> unit ->
+        # (multiply by, divide by). Nested so a lookup hashes the two names
+        # (whose hashes are cached) instead of making and hashing a tuple.
+        self.conversions = {name_1: {name_2: self.table[unit_1][unit_2]
+                                     for unit_2, name_2 in enumerate(self.names)
+                                     if self.table[unit_1][unit_2] is not None}
+                            for unit_1, name_1 in enumerate(self.names)}
+
+        # Index of the unit names for "did you mean", made on the first misspelt unit.
+        self.name_index = None
+
+        self.parse_cached.cache_clear()
+        self.conversion.cache_clear()
+
+    def make_conversion(self, unit_1, unit_2, bridge=None):
+        """Works out the (multiply by, divide by) pair from unit_1 to unit_2
+        (ids), using the bridge factor if the base units are different"""
+
+        base_factor = self.base_table[self.bases[unit_1]][self.bases[unit_2]]
+        if base_factor is None:
+            base_factor = bridge
+        if base_factor is None:
+            return None
+
+        return self.factors[unit_1] * base_factor, self.factors[unit_2]
+
+    def bridge(self, base_1, base_2, density):
+        """The factor from base unit base_1 to base_2 (names) for an ingredient
+        with this density, or None if there isn't one"""
+
+        if density is None:
+            return None
+        if base_1 == VOLUME_BASE and base_2 == MASS_BASE:
+            return density
+        if base_1 == MASS_BASE and base_2 == VOLUME_BASE:
+            return 1 / density
+        return None
+
+    def find_density(self, ingredient):
+        """The density of an ingredient (grams per millilitre), or None.
+        Cached by the name as written by density()."""
+
+        if ingredient is None or not self.densities:
+            return None
+        return self.densities.get(normalize_name(ingredient))
+
+    def find_conversion(self, u1, u2, ingredient=None):
+        """Finds the (multiply by, divide by) pair from u1 to u2 (aliases) for an
+        ingredient, or None if they can't be converted. Cached by conversion()."""
+
+        conversion = self.conversions[u1].get(u2)
+        if conversion is not None or ingredient is None:
+            return conversion
+
+        unit_1, unit_2 = self.ids[u1], self.ids[u2]
+        bridge = self.bridge(self.base_names[self.bases[unit_1]], self.base_names[self.bases[unit_2]],
+                             self.density(ingredient))
+        return self.make_conversion(unit_1, unit_2, bridge)
+
+    def are_compatible(self, u1, u2, ingredient=None):
+        """Checks if two units (aliases) can be converted into each other
+        (mass and volume only for an ingredient with a density)"""
+
+        if u2 in self.conversions[u1]:
+            return True
+        return ingredient is not None and self.conversion(u1, u2, ingredient) is not None
+
+    def convert(self, quantity, u1, u2, ingredient=None):
+        """Converts an amount from unit u1 to unit u2 (aliases)"""
+
+        conversion = self.conversions[u1].get(u2)
+        if conversion is None:
+            conversion = self.conversion(u1, u2, ingredient)
+
+        multiply_by, divide_by = conversion
+        return quantity * multiply_by / divide_by
+
+    def define_units(self, definitions):
+        """Adds units defined as an amount of another unit, e.g. {"pinch": "0.0625 tsp"}.
+        A unit can be defined in terms of another new unit; the graph of definitions
+        is searched (breadth first) from the known units to find each one's base unit.
+        Raises a ValueError if a unit can't be reached from the known units."""
+
+        # unit -> [(other unit, how many of the other unit make one of this unit)]
+        edges = {}
+        for name, amount in definitions.items():
+            name = " ".join(str(name).lower().split())
+            number, unit = self.split_amount(str(amount), definitions)
+
+            if not UNIT_NAME_PATTERN.fullmatch(name):
+                raise ValueError(f"❌ {name} is not a valid unit name (letters and spaces only).")
+            if name in self.units:
+                raise ValueError(f"❌ The unit {name} is already defined.")
+
+            edges.setdefault(name, []).append((unit, number))
+            edges.setdefault(unit, []).append((name, 1 / number))
+
+        # Searches out from the known units to the new ones.
+        found = {}
+        queue = deque(name for name in edges if name in self.units)
+        while queue:
+            unit = queue.popleft()
+            base, factor = self.units[unit] if unit in self.units else found[unit]
+
+            for other, number in edges[unit]:
+                if other not in self.units and other not in found:
+                    found[other] = (base, factor / number)
+                    queue.append(other)
+
+        missing = [name for name in edges if name not in self.units and name not in found]
+        if missing:
+            raise ValueError(f"❌ The units {', '.join(missing)} are not defined in terms of a known unit.")
+
+        self.units.update(found)
+        self.user_units.update(definitions)
+        self.build_tables()
+
+    def split_amount(self, amount, definitions):
+        """Splits the amount of a unit definition into the number and the unit name,
+        the unit can be a known unit or one of the definitions"""
+
+        match = AMOUNT_PATTERN.fullmatch(amount.strip())
+        if not match or float(match.group(1)) <= 0:
+            raise ValueError(f"❌ {amount} is not a valid unit amount (e.g. 0.0625 tsp).")
+
+        unit = " ".join(match.group(2).lower().split())
+        if unit not in self.units and unit not in {" ".join(str(name).lower().split())
+                                                   for name in definitions}:
+            raise ValueError(f"❌ {amount} uses the unknown unit {unit}.")
+
+        return float(match.group(1)), unit
+
+    def define_densities(self, densities):
+        """Adds ingredient densities, as grams per millilitre or as an amount of each
+        (e.g. {"flour": "1 cup = 125g"})"""
+
+        for ingredient, density in densities.items():
+            if isinstance(density, str):
+                density = self.parse_density(density)
+            if not density > 0:
+                raise ValueError(f"❌ The density of {ingredient} has to be more than 0.")
+
+            self.densities[normalize_name(ingredient)] = float(density)
+
+        self.user_densities.update(densities)
+        self.conversion.cache_clear()
+        self.density.cache_clear()
+
+    def parse_density(self, text):
+        """Works out grams per millilitre from "<volume> = <mass>" (either way round)"""
+
+        parts = text.split("=")
+        if len(parts) != 2:
+            raise ValueError(f"❌ {text} is not a valid density (e.g. 1 cup = 125g).")
+
+        amounts = {}
+        for part in parts:
+            number, unit_id = self.parse_amount(part)
+            amounts[self.base_names[self.bases[unit_id]]] = number * self.factors[unit_id]
+
+        if set(amounts) != {MASS_BASE, VOLUME_BASE}:
+            raise ValueError(f"❌ {text} has to be a volume = a mass (e.g. 1 cup = 125g).")
+
+        return amounts[MASS_BASE] / amounts[VOLUME_BASE]
+
+    def load(self, filename):
+        """Adds the units and densities in a units file:
+            {"units": {"pinch": "0.0625 tsp", ...}, "densities": {"flour": "1 cup = 125g", ...}}"""
+
+        with open(filename, encoding="utf-8") as file:
+            data = json.load(file)
+
+        self.define_units(data.get("units") or {})
+        self.define_densities(data.get("densities") or {})
+
+    def parse_uncached(self, response):
+        """Parses a stripped amount string into (number, unit id, error message)"""
+
+        # Simple integer with no Unit (e.g. 4 (eggs) or 10 (grapes))
+        if response.isdigit():
+
+            if int(response) == 0:
+                return None, None, "❌ Please enter an integer greater than 0."
+
+            # Too big to work out costs with (it would be inf as a float)
+            if float(response) == math.inf:
+                return None, None, "❌ Please enter a valid input! (e.g. 100kg, 20 millilitres or just 4.)"
+
+            return int(response), self.ids[None], None
+
+        # Quantity with unit (e.g. 100g, 25.5 millilitres or 3 tablespoons)
+        match = AMOUNT_PATTERN.fullmatch(response)
+        if not match:
+            return None, None, "❌ Please enter a valid input! (e.g. 100kg, 20 millilitres or just 4.)"
+
+        number = float(match.group(1))
+        unit = " ".join(match.group(2).lower().split())
+
+        if number <= 0:
+            return None, None, "❌ Please enter a number higher than 0."
+        if number == math.inf:
+            return None, None, "❌ Please enter a valid input! (e.g. 100kg, 20 millilitres or just 4.)"
+
+        if unit not in self.ids:
+            suggestion = self.suggest(unit)
+            return None, None, ("❌ Invalid unit! Valid units include"
+                                " weight classes(kg, g, oz, lb) and volume classes"
+                                "(l, ml, tsp, tbsp, cups, fl oz)"
+                                + (f" Did you mean {suggestion}?" if suggestion else ""))
+
+        return number, self.ids[unit], None
+
+    def suggest(self, unit):
+        """The known unit closest to a misspelt one (e.g. cupz -> cups), or None"""
+
+        if self.name_index is None:
+            from rcc_fuzzy import NameIndex
+            self.name_index = NameIndex(name for name in self.names if name is not None)
+
+        return self.name_index.closest(unit, SUGGEST_CUTOFF)
+
+    def parse_amount(self, response):
+        """Splits an amount string into the number and the unit id.
+        Raises a ValueError with the error message if it is not valid."""
+
+        number, unit_id, error = self.parse_cached(response.strip())
+
+        if error is not None:
+            raise ValueError(error)
+
+        return number, unit_id
+
+
+# The units of the program
+
+units_dict = {
+    # No unit
+    None: ("none", 1),
+
+    # Mass
+    "g": ("g", 1), "gram": ("g", 1), "grams": ("g", 1),
+    "kg": ("g", 1000), "kilogram": ("g", 1000), "kilograms": ("g", 1000),
+    "oz": ("g", 28.349523125), "ounce": ("g", 28.349523125), "ounces": ("g", 28.349523125),
+    "lb": ("g", 453.59237), "lbs": ("g", 453.59237), "pound": ("g", 453.59237),
+    "pounds": ("g", 453.59237),
+
+    # Volume
+    "ml": ("ml", 1), "millilitre": ("ml", 1), "millilitres": ("ml", 1),
+    "l": ("ml", 1000), "litre": ("ml", 1000), "litres": ("ml", 1000),
+    "tsp": ("ml", 5), "teaspoon": ("ml", 5), "teaspoons": ("ml", 5),
+    "tbsp": ("ml", 15), "tablespoon": ("ml", 15), "tablespoons": ("ml", 15),
+    "cup": ("ml", 250), "cups": ("ml", 250),
+    "fl oz": ("ml", 29.5735295625), "floz": ("ml", 29.5735295625),
+    "fluid ounce": ("ml", 29.5735295625), "fluid ounces": ("ml", 29.5735295625),
+    "pinch": ("ml", 0.3125), "pinches": ("ml", 0.3125),
+}
+
+# Densities of common ingredients (grams per millilitre), so amounts used
+# by volume can be costed against amounts bought by weight (and the other way).
+densities_dict = {
+    "water": 1.0, "milk": 1.03, "cream": 1.0, "oil": 0.92, "honey": 1.42,
+    "flour": 0.5, "plain flour": 0.5, "sugar": 0.8, "brown sugar": 0.8,
+    "butter": 0.96, "salt": 1.2, "rice": 0.8, "cocoa": 0.4,
+}
+
+# Unit ids and conversion factors, worked out once at start up.
+unit_registry = UnitRegistry(units_dict, densities_dict)
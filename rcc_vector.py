@@ -0,0 +1,96 @@
+"""Columnar (NumPy) unit checks for the Recipe Cost Calculator.
+
+Checks and converts whole columns of ingredients at once instead of one
+ingredient at a time, for the columnar cost engine (rcc_batch.cost_columns()
+and rcc_scaling). Units are turned into the integer ids of the unit
+registry so its conversion table can be looked up as arrays.
+Every step does the same maths in the same order as the scalar functions
+in B02_RCC_Final.py, so the numbers come out the same.
+"""
+import numpy
+
+from rcc_units import MASS_BASE, VOLUME_BASE, unit_registry
+
+
+def build_tables():
+    """Turns the unit registry into arrays (again, after units are added to it)"""
+
+    global UNIT_IDS, MULTIPLY_BY, DIVIDE_BY, FACTORS, IS_MASS, IS_VOLUME
+
+    UNIT_IDS = unit_registry.ids
+
+    # Unit x unit conversion table as arrays, NaN where the units are not compatible.
+    MULTIPLY_BY = numpy.array([[numpy.nan if conversion is None else conversion[0] for conversion in row]
+                               for row in unit_registry.table])
+    DIVIDE_BY = numpy.array([[numpy.nan if conversion is None else conversion[1] for conversion in row]
+                             for row in unit_registry.table])
+
+    # Factor to the base unit, and whether the base unit is g or ml, of every unit id.
+    FACTORS = numpy.array(unit_registry.factors, dtype=float)
+    base_names = numpy.array([unit_registry.base_names[base] for base in unit_registry.bases])
+    IS_MASS = base_names == MASS_BASE
+    IS_VOLUME = base_names == VOLUME_BASE
+
+
+build_tables()
+
+
+# Functions
+
+def encode_units(units):
+    """Turns a list of units (None for no unit) into an array of unit ids"""
+    return numpy.fromiter((UNIT_IDS[unit] for unit in units), dtype=numpy.intp)
+
+
+def row_densities(unit_used, unit_bought, read_names):
+    """Looks up the densities of the ingredients whose units are not compatible
+    (NaN for the other rows, and for ingredients with no density).
+    read_names(rows) gives the ingredient names of those rows, so the names
+    of the other rows are never needed. Returns None if there are no such rows."""
+
+    if not unit_registry.densities:
+        return None
+
+    rows = numpy.flatnonzero(numpy.isnan(MULTIPLY_BY[unit_bought, unit_used]))
+    if len(rows) == 0:
+        return None
+
+    densities = numpy.full(len(unit_used), numpy.nan)
+    found = [unit_registry.density(name) for name in read_names(rows)]
+    densities[rows] = [numpy.nan if density is None else density for density in found]
+    return densities
+
+
+def check_rows(amount_used, unit_used, amount_bought, unit_bought, densities=None):
+    """Checks columns of ingredients in one go, the same as check_amount_bought().
+
+    Returns the amounts bought converted into the units of the amounts used,
+    and a mask of the rows that passed the unit and amount checks.
+    Rows between mass and volume are converted with their density (if given)."""
+
+    multiply_by = MULTIPLY_BY[unit_bought, unit_used]
+    divide_by = DIVIDE_BY[unit_bought, unit_used]
+
+    # Same bridge as UnitRegistry.bridge(): ml -> g is times the density,
+    # g -> ml is times 1 / density.
+    if densities is not None:
+        bridged = numpy.isnan(multiply_by) & ~numpy.isnan(densities)
+        if bridged.any():
+            rows = numpy.flatnonzero(bridged)
+            bought, used = unit_bought[rows], unit_used[rows]
+            bridge = numpy.full(len(rows), numpy.nan)
+
+            to_mass = IS_VOLUME[bought] & IS_MASS[used]
+            to_volume = IS_MASS[bought] & IS_VOLUME[used]
+            bridge[to_mass] = densities[rows][to_mass]
+            bridge[to_volume] = 1 / densities[rows][to_volume]
+
+            multiply_by = multiply_by.copy()
+            divide_by = divide_by.copy()
+            multiply_by[rows] = FACTORS[bought] * bridge
+            divide_by[rows] = FACTORS[used]
+
+    compatible = ~numpy.isnan(multiply_by)
+    converted_amt = amount_bought * multiply_by / divide_by
+    return converted_amt, compatible & (converted_amt >= amount_used)
+
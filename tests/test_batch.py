@@ -0,0 +1,26 @@
+"""Tests for batch mode (rcc_batch).
+
+    python -m unittest discover tests
+"""
+import unittest
+
+from rcc_batch import cost_recipe, cost_recipes
+
+GOOD = {"Recipe Name": "Eggs", "Servings": "1", "Ingredients": [
+    {"Ingredient Name": "Eggs", "Amount Used": "2", "Amount Bought": "12", "Price Paid": "6"}]}
+
+
+class RecipeShapeTest(unittest.TestCase):
+
+    def test_bad_shapes_are_error_rows(self):
+        recipes = [["oops"], {"Recipe Name": "Flour", "Servings": "2", "Ingredients": "flour"},
+                   {"Recipe Name": "Row", "Servings": "2", "Ingredients": ["flour"]}, GOOD]
+
+        results = cost_recipes(recipes)
+        self.assertEqual([result["Error"][:1] for result in results], ["❌", "❌", "❌", ""])
+        self.assertEqual(results, [cost_recipe(recipe) for recipe in recipes])
+        self.assertEqual(results[3]["Total Cost to Make"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
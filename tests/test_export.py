@@ -0,0 +1,43 @@
+"""Tests for the bulk export (rcc_export).
+
+    python -m unittest discover tests
+"""
+import os
+import tempfile
+import unittest
+
+from rcc_batch import run_batch
+from rcc_store import run_make_store
+
+RECIPES = """Recipe Name,Servings,Ingredient Name,Amount Used,Amount Bought,Price Paid
+Scones,4,Flour,350g,1kg,3.337
+Scones,4,Butter,2tbsp,500g,6.19
+Scones,4,Milk,1cup,2l,4.1
+Bad,1,Flour,100g,1kg,3
+"""
+
+
+class ExportTest(unittest.TestCase):
+
+    def test_store_exports_the_same_as_csv(self):
+        with tempfile.TemporaryDirectory() as folder:
+            recipes = os.path.join(folder, "recipes.csv")
+            store = os.path.join(folder, "recipes.rccstore")
+            with open(recipes, "w", encoding="utf-8") as file:
+                file.write(RECIPES)
+            run_make_store([recipes], store)
+
+            from_csv = os.path.join(folder, "csv.csv")
+            from_store = os.path.join(folder, "store.csv")
+            run_batch([recipes], os.devnull, export=from_csv)
+            run_batch([store], os.devnull, export=from_store)
+
+            with open(from_csv, encoding="utf-8") as csv_file, \
+                    open(from_store, encoding="utf-8") as store_file:
+                exported = csv_file.read()
+                self.assertEqual(exported, store_file.read())
+            self.assertIn(",3.337,", exported)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+"""Tests for the micro-cent money columns (rcc_money).
+
+    python -m unittest discover tests
+"""
+import unittest
+
+from rcc_batch import cost_recipe, cost_recipes
+from rcc_scaling import scale_recipes
+
+# 100 ingredients at the biggest price, adding up to more than int64 micro-cents.
+DEAR = {"Recipe Name": "Dear", "Servings": "1", "Ingredients": [
+    {"Ingredient Name": f"Gold {number}", "Amount Used": "1", "Amount Bought": "1",
+     "Price Paid": "999999999"} for number in range(100)]}
+
+
+class MoneyColumnsTest(unittest.TestCase):
+
+    def test_big_totals_do_not_overflow(self):
+        result = cost_recipes([DEAR])[0]
+        self.assertEqual(result["Error"], "")
+        self.assertEqual(result["Total Cost to Make"], 99999999900.0)
+        self.assertEqual(result["Total Cost to Make"], cost_recipe(DEAR)["Total Cost to Make"])
+
+    def test_big_curves_do_not_overflow(self):
+        curve = scale_recipes([DEAR], 3)
+        self.assertEqual([row["Total Cost to Make"] for row in curve],
+                         [99999999900.0, 199999999800.0, 299999999700.0])
+        self.assertEqual([row["Shopping Cost"] for row in curve],
+                         [99999999900.0, 199999999800.0, 299999999700.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Tests for the cheapest-pack optimizer (rcc_packs).
+
+    python -m unittest discover tests
+"""
+import os
+import tempfile
+import unittest
+
+from rcc_batch import cost_recipes
+from rcc_packs import PackList, fill_from_packs
+
+PACKS = """Ingredient Name,Amount Bought,Price Paid
+Milk,500g,2
+Milk,1kg,3.5
+Jam,500g,4
+"""
+
+
+def recipe(name, amount_used):
+    return {"Recipe Name": name, "Servings": "1", "Ingredients": [
+        {"Ingredient Name": name, "Amount Used": amount_used}]}
+
+
+class FillFromPacksTest(unittest.TestCase):
+
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "packs.csv")
+            with open(filename, "w", encoding="utf-8") as file:
+                file.write(PACKS)
+            self.packs = PackList(filename)
+
+    def test_volume_against_mass_packs(self):
+        # 2 cups of milk is 515g, so one 1kg pack is cheaper than two 500g ones.
+        milk, jam = recipe("Milk", "2 cups"), recipe("Jam", "1 cup")
+        fill_from_packs([milk["Ingredients"][0], jam["Ingredients"][0]], self.packs)
+        self.assertEqual(milk["Ingredients"][0]["Amount Bought"], "1000.0g")
+
+        # Jam has no density, so no pack can be picked for it.
+        milk_result, jam_result = cost_recipes([milk, jam])
+        self.assertEqual(milk_result["Error"], "")
+        self.assertIn("compatible with cup", jam_result["Error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Tests for the incrementally costed recipes (rcc_recipe).
+
+    python -m unittest discover tests
+"""
+import unittest
+
+import rcc_money
+from rcc_batch import cost_recipe
+from rcc_recipe import RecipeBook, RecipeModel
+
+# Flour is listed twice, batch mode costs it as two rows.
+RECIPE = {"Recipe Name": "Bread", "Servings": "2", "Ingredients": [
+    {"Ingredient Name": "Flour", "Amount Used": "100g", "Amount Bought": "1kg", "Price Paid": "3"},
+    {"Ingredient Name": "flour", "Amount Used": "200g", "Amount Bought": "1kg", "Price Paid": "3"},
+    {"Ingredient Name": "Eggs", "Amount Used": "2", "Amount Bought": "12", "Price Paid": "6"}]}
+
+
+def batch_total(recipe):
+    return cost_recipe(recipe)["Total Cost to Make"]
+
+
+class RecipeModelTest(unittest.TestCase):
+
+    def test_duplicate_names_cost_like_batch(self):
+        model = RecipeModel.from_recipe(RECIPE)
+        self.assertEqual(model.ingredient_count, 3)
+        self.assertEqual(rcc_money.to_dollars(model.total_cost), batch_total(RECIPE))
+
+    def test_price_change_reaches_every_row(self):
+        book = RecipeBook()
+        book.add(RecipeModel.from_recipe(RECIPE))
+        self.assertEqual(book.change_price("FLOUR", 4.5), [])
+
+        changed = {**RECIPE, "Ingredients": [dict(row) for row in RECIPE["Ingredients"]]}
+        changed["Ingredients"][0]["Price Paid"] = changed["Ingredients"][1]["Price Paid"] = "4.5"
+        self.assertEqual(rcc_money.to_dollars(book.recipes["Bread"].total_cost), batch_total(changed))
+
+    def test_bad_change_changes_nothing(self):
+        book = RecipeBook()
+        book.add(RecipeModel.from_recipe(RECIPE))
+        total = book.recipes["Bread"].total_cost
+
+        # 150g packs are big enough for one flour row but not the other.
+        self.assertEqual(book.change_price("flour", 1, 150, "g"), ["Bread"])
+        self.assertEqual(book.recipes["Bread"].total_cost, total)
+
+    def test_unitless_pack_is_not_the_old_unit(self):
+        book = RecipeBook()
+        book.add(RecipeModel.from_recipe(RECIPE))
+        total = book.recipes["Bread"].total_cost
+
+        # 500 with no unit can't be used for flour in grams, like batch mode.
+        self.assertEqual(book.change_price("flour", 5, 500, None), ["Bread"])
+        self.assertEqual(book.recipes["Bread"].total_cost, total)
+
+
+if __name__ == "__main__":
+    unittest.main()
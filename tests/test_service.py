@@ -0,0 +1,90 @@
+"""Tests for the local costing service (rcc_service).
+
+    python -m unittest discover tests
+"""
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+import rcc_service
+
+GOOD_RECIPE = {"Recipe Name": "Pancakes", "Servings": "4", "Ingredients": [
+    {"Ingredient Name": "flour", "Amount Used": "500g", "Amount Bought": "1kg", "Price Paid": "2.50"}]}
+
+# An Amount Bought too big to be a float (1e400 kg)
+BAD_RECIPE = {"Recipe Name": "Huge", "Servings": "1", "Ingredients": [
+    {"Ingredient Name": "flour", "Amount Used": "1kg", "Amount Bought": "1" + "0" * 400 + "kg",
+     "Price Paid": "2"}]}
+
+
+async def post(port, body):
+    """Sends a POST /cost and returns (status, reply data)"""
+
+    reader, writer = await asyncio.open_connection(rcc_service.HOST, port)
+    body = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+    writer.write(b"POST /cost HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+                 b"Content-Length: %d\r\n\r\n%s" % (len(body), body))
+    await writer.drain()
+
+    reply = await asyncio.wait_for(reader.read(), 5)
+    writer.close()
+
+    head, _, data = reply.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(data)
+
+
+class ServiceTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.service = rcc_service.CostingService()
+        self.service.start()
+        self.server = await asyncio.start_server(self.service.handle_connection, rcc_service.HOST, 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.service.stop()
+
+    async def test_bad_then_good(self):
+        status, data = await post(self.port, BAD_RECIPE)
+        self.assertEqual(status, 200)
+        self.assertTrue(data["Error"].startswith("flour: ❌"))
+
+        status, data = await post(self.port, GOOD_RECIPE)
+        self.assertEqual(status, 200)
+        self.assertEqual(data["Total Cost to Make"], 1.25)
+
+    async def test_costing_error_keeps_the_batcher_running(self):
+        # Any exception out of the engine only fails the request it came from,
+        # a bad recipe with 400 and anything else with 500.
+        for error, expected in ((ValueError, 400), (OverflowError, 500)):
+            with mock.patch.object(rcc_service, "cost_recipes", side_effect=error):
+                status, data = await post(self.port, GOOD_RECIPE)
+            self.assertEqual(status, expected)
+            self.assertFalse(self.service.batcher.done())
+
+        status, data = await post(self.port, GOOD_RECIPE)
+        self.assertEqual(status, 200)
+
+    async def test_badly_shaped_recipes(self):
+        status, data = await post(self.port, [["oops"]])
+        self.assertEqual(status, 400)
+
+        status, data = await post(self.port, {**GOOD_RECIPE, "Ingredients": "flour"})
+        self.assertEqual(status, 200)
+        self.assertTrue(data["Error"].startswith("❌"))
+
+    async def test_negative_content_length(self):
+        reader, writer = await asyncio.open_connection(rcc_service.HOST, self.port)
+        writer.write(b"POST /cost HTTP/1.1\r\nContent-Length: -1\r\n\r\n")
+        await writer.drain()
+
+        reply = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        self.assertTrue(reply.startswith(b"HTTP/1.1 400"))
+
+
+if __name__ == "__main__":
+    unittest.main()